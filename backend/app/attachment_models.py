@@ -0,0 +1,12 @@
+"""Pydantic models for the attachment endpoints."""
+
+from pydantic import BaseModel
+
+
+class AttachmentResponse(BaseModel):
+    """Metadata of a stored attachment."""
+
+    attachment_id: str
+    recipient_id: str
+    content_type: str
+    size: int
@@ -0,0 +1,245 @@
+"""Attachment router that streams uploads and downloads through a chunked AEAD."""
+
+import asyncio
+import logging
+import os
+import re
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import attachment_models
+from config import get_settings
+from crypto.stream import (
+    TAG_SIZE,
+    StreamDecryptor,
+    StreamEncryptor,
+    chunk_range,
+    new_stream_key,
+)
+from database import get_async_db
+from repositories import (
+    AttachmentRecord,
+    create_attachment_async,
+    find_user_by_id_async,
+    get_attachment_async,
+)
+from security import AuthenticatedUser, current_user
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+router = APIRouter(prefix="/api/attachments", tags=["Attachments"])
+
+_RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def _attachment_path(attachment_id: UUID) -> Path:
+    return Path(settings.attachment_storage_dir) / f"{attachment_id}.bin"
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Attachments are limited to {settings.attachment_max_bytes} bytes.",
+    )
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single ``Range: bytes=...`` header into an inclusive byte range.
+
+    Returns None when the whole file should be sent: no header, a header we
+    do not understand, or several ranges (which servers may ignore).
+
+    Raises:
+        ValueError: If the range lies entirely outside the file
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.fullmatch(header.strip())
+    if match is None or (not match.group(1) and not match.group(2)):
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+async def _write_upload(request: Request, encryptor: StreamEncryptor, path: Path) -> None:
+    # Ciphertext goes to a side file and is renamed into place once complete
+    partial = path.with_suffix(".part")
+    handle = await asyncio.to_thread(open, partial, "wb")
+    try:
+        async for data in request.stream():
+            if encryptor.size + len(data) > settings.attachment_max_bytes:
+                raise _too_large()
+            sealed = list(encryptor.update(data))
+            if sealed:
+                await asyncio.to_thread(handle.writelines, sealed)
+        await asyncio.to_thread(handle.write, encryptor.finish())
+        await asyncio.to_thread(handle.close)
+        await asyncio.to_thread(os.replace, partial, path)
+    except BaseException:
+        handle.close()
+        partial.unlink(missing_ok=True)
+        raise
+
+
+@router.post(
+    "",
+    response_model=attachment_models.AttachmentResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_attachment(
+    request: Request,
+    recipient_id: UUID = Query(description="User the attachment is shared with"),
+    user: AuthenticatedUser = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> attachment_models.AttachmentResponse:
+    """
+    Store the raw request body as an attachment for ``recipient_id``.
+
+    The body is read as it arrives and sealed in ``ATTACHMENT_CHUNK_SIZE``
+    chunks straight to disk, so memory use does not grow with file size.
+    The ``Content-Type`` header is kept and returned on download.
+
+    Returns 404 for an unknown recipient, 413 past ``ATTACHMENT_MAX_BYTES``.
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > settings.attachment_max_bytes:
+        raise _too_large()
+    if await find_user_by_id_async(db, recipient_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Recipient not found.",
+        )
+    # Do not hold a connection for the length of the upload
+    await db.close()
+
+    attachment_id = uuid.uuid4()
+    key, nonce_prefix = new_stream_key()
+    chunk_size = settings.attachment_chunk_size
+    encryptor = StreamEncryptor(key, nonce_prefix, chunk_size)
+    path = _attachment_path(attachment_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    await _write_upload(request, encryptor, path)
+
+    record = AttachmentRecord(
+        id=attachment_id,
+        owner_id=user.id,
+        recipient_id=recipient_id,
+        content_type=request.headers.get("content-type", "application/octet-stream")[:255],
+        size=encryptor.size,
+        chunk_size=chunk_size,
+        content_key=key,
+        nonce_prefix=nonce_prefix,
+    )
+    try:
+        await create_attachment_async(db, record)
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+
+    return attachment_models.AttachmentResponse(
+        attachment_id=str(attachment_id),
+        recipient_id=str(recipient_id),
+        content_type=record.content_type,
+        size=record.size,
+    )
+
+
+def _read_chunk(handle: BinaryIO, offset: int, length: int) -> bytes:
+    handle.seek(offset)
+    return handle.read(length)
+
+
+async def _plaintext_chunks(
+    record: AttachmentRecord, path: Path, start: int, end: int
+) -> AsyncIterator[bytes]:
+    decryptor = StreamDecryptor(
+        record.content_key, record.nonce_prefix, record.chunk_size, record.size
+    )
+    wanted = chunk_range(start, end, record.chunk_size)
+    remaining = wanted.length
+    handle = await asyncio.to_thread(open, path, "rb")
+    try:
+        for index in range(wanted.first, wanted.last + 1):
+            sealed = await asyncio.to_thread(
+                _read_chunk, handle, decryptor.offset(index), record.chunk_size + TAG_SIZE
+            )
+            plaintext = decryptor.open_chunk(index, sealed)
+            if index == wanted.first:
+                plaintext = plaintext[wanted.skip :]
+            plaintext = plaintext[:remaining]
+            remaining -= len(plaintext)
+            yield plaintext
+    finally:
+        handle.close()
+
+
+@router.get("/{attachment_id}")
+async def download_attachment(
+    attachment_id: UUID,
+    request: Request,
+    user: AuthenticatedUser = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    Stream an attachment to its owner or recipient.
+
+    Supports a single ``Range: bytes=...`` request; only the chunks covering
+    the range are read and decrypted.
+
+    Returns 404 if the attachment does not exist or belongs to someone else,
+    416 for a range outside the file.
+    """
+    record = await get_attachment_async(db, attachment_id)
+    path = _attachment_path(attachment_id)
+    if record is None or user.id not in (record.owner_id, record.recipient_id) or not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found.",
+        )
+
+    try:
+        byte_range = parse_range(request.headers.get("range"), record.size)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail="Requested range is outside the attachment.",
+            headers={"Content-Range": f"bytes */{record.size}"},
+        )
+
+    headers = {"Accept-Ranges": "bytes"}
+    status_code = status.HTTP_200_OK
+    start, end = 0, record.size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{record.size}"
+    headers["Content-Length"] = str(end - start + 1)
+
+    body = _plaintext_chunks(record, path, start, end) if record.size else iter(())
+    return StreamingResponse(
+        body,
+        status_code=status_code,
+        media_type=record.content_type,
+        headers=headers,
+    )
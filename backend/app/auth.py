@@ -1,87 +1,367 @@
-"""Authentication router with /auth/login endpoint using Argon2id and ML-KEM."""
+"""Authentication router with login, register, refresh and logout endpoints using Argon2id and ML-KEM."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import logging
+import math
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import auth_models
+from config import get_settings
 from crypto.jwt import create_jwt_token
-from crypto.password import verify_password
+from crypto.kek import PrivateKeyUnwrapError, unwrap_private_key
+from crypto.password import (
+    HashingOverloadedError,
+    hash_password_async,
+    password_needs_rehash,
+    verify_dummy_password_async,
+    verify_password_async,
+)
 from crypto.pqc import (
+    check_public_key,
     decapsulate,
     decode_key_base64,
+    derive_session_binding,
     encapsulate,
     encode_key_base64,
 )
-from database import get_db
-from repositories import find_user_by_email
+from crypto.reservoir import take_kem_keypair_async
+from database import AsyncSessionLocal, get_async_db
+from db_models import User
+from ratelimit import RateLimit, bucket_key, check_rate_limits, client_ip
+from repositories import (
+    RefreshTokenReuseError,
+    UserKeyMaterial,
+    create_user_async,
+    find_user_by_email_async,
+    get_user_key_material_async,
+    issue_refresh_token_async,
+    revoke_refresh_token_async,
+    rotate_refresh_token_async,
+    update_password_hash_async,
+)
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
 
+def _hashing_busy() -> HTTPException:
+    """Build the 503 response used when the hashing executor is saturated."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy. Please retry shortly.",
+        headers={"Retry-After": str(settings.password_hash_retry_after_seconds)},
+    )
+
+
+@router.post(
+    "/register",
+    response_model=auth_models.RegisterResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def register(
+    payload: auth_models.RegisterRequest,
+    db: AsyncSession = Depends(get_async_db),
+) -> auth_models.RegisterResponse:
+    """
+    Create a user account and issue a JWT token.
+    
+    Flow:
+    1. Reject emails that are already registered
+    2. Hash the password with Argon2id on the hashing executor
+    3. Take a pre-generated ML-KEM keypair, or check the client's own public
+       key when it generates the keypair on device (no private key is stored)
+    4. Store the user and issue a JWT token
+    
+    Returns the new user ID, token and base64 public key; 400 for a missing or
+    malformed on-device public key, 409 if the email is taken.
+    """
+    device_public_key = None
+    if payload.generate_on_device:
+        if payload.public_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="public_key is required when generate_on_device is set.",
+            )
+        try:
+            device_public_key = decode_key_base64(payload.public_key)
+            device_algorithm = check_public_key(device_public_key, payload.kem_algorithm)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid ML-KEM public key.",
+            )
+
+    existing = await find_user_by_email_async(db, payload.email)
+    if existing:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already registered.",
+        )
+
+    try:
+        password_hash = await hash_password_async(payload.password)
+    except HashingOverloadedError:
+        raise _hashing_busy()
+
+    if device_public_key is not None:
+        public_key, private_blob, algorithm = device_public_key, None, device_algorithm
+    else:
+        # O(1) take from the background-filled reservoir; each key is used once
+        keypair, algorithm = await take_kem_keypair_async()
+        public_key, private_blob = keypair.public_key, keypair.private_key
+
+    try:
+        user = await create_user_async(
+            db,
+            email=payload.email,
+            password_hash=password_hash,
+            pqc_public_key=public_key,
+            pqc_private_blob=private_blob,
+            display_name=payload.display_name,
+            pqc_algorithm=algorithm,
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already registered.",
+        )
+
+    token = create_jwt_token(user.id, redirect="/dashboard")
+    refresh_token = await issue_refresh_token_async(db, user.id)
+
+    return auth_models.RegisterResponse(
+        user_id=str(user.id),
+        auth_token=token,
+        refresh_token=refresh_token,
+        key_id=str(user.pqc_key_id),
+        public_key=encode_key_base64(public_key),
+    )
+
+
+async def _enforce_login_rate_limit(request: Request, email: str) -> None:
+    """
+    Charge the caller's IP and the target email one login attempt each.
+
+    Raises:
+        HTTPException: 429 with Retry-After when either bucket is empty
+    """
+    if not settings.login_rate_limit_enabled:
+        return
+    wait = await check_rate_limits(
+        [
+            (
+                bucket_key("login-ip", client_ip(request)),
+                RateLimit(settings.login_ip_burst, settings.login_ip_per_minute),
+            ),
+            (
+                bucket_key("login-email", email.lower().strip()),
+                RateLimit(settings.login_email_burst, settings.login_email_per_minute),
+            ),
+        ]
+    )
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please retry later.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+async def _rehash_password(user_id, password: str, old_hash: str) -> None:
+    """Upgrade a stored hash to the configured Argon2id parameters."""
+    try:
+        new_hash = await hash_password_async(password)
+    except HashingOverloadedError:
+        return  # Retried on the user's next login
+    async with AsyncSessionLocal() as db:
+        if await update_password_hash_async(db, user_id, old_hash, new_hash):
+            logger.info(f"Upgraded password hash parameters for user {user_id}")
+
+
 @router.post("/login", response_model=auth_models.LoginResponse)
-def login(
+async def login(
     payload: auth_models.LoginRequest,
-    db: Session = Depends(get_db),
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
 ) -> auth_models.LoginResponse:
     """
     Authenticate a user and issue a JWT token.
     
     Flow:
-    1. Verify user exists
-    2. Compare Argon2id password hash
-    3. Perform ML-KEM handshake (server uses stored private key to derive shared secret)
-    4. Issue JWT token with user ID and redirect path
+    1. Charge the per-IP and per-email rate limits, before any lookup
+    2. Verify user exists
+    3. Compare Argon2id password hash, scheduling a rehash after the
+       response if it was made with outdated parameters
+    4. If the client sent a KEM ciphertext, decapsulate it with the stored
+       private key and bind the derived secret into the token
+    5. Issue a short-lived JWT and a refresh token for renewing it
     
-    Returns JWT token on success, 401 on failure.
+    Returns JWT and refresh tokens on success, 401 on failure, 400 for an unusable KEM
+    ciphertext, 429 when rate limited, 503 when the hashing executor is saturated.
     """
-    # Find user by email
-    user = find_user_by_email(db, payload.email)
+    await _enforce_login_rate_limit(request, payload.email)
+
+    # Find user by email; unknown emails still pay for one verification so
+    # response time does not reveal whether an account exists
+    user = await find_user_by_email_async(db, payload.email)
     if not user:
+        if settings.login_dummy_verify:
+            try:
+                await verify_dummy_password_async(payload.password)
+            except HashingOverloadedError:
+                raise _hashing_busy()
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials.",
         )
 
-    # Verify password hash
-    if not verify_password(payload.password, user.password_hash):
+    # Verify password hash on the dedicated hashing executor
+    try:
+        password_ok = await verify_password_async(payload.password, user.password_hash)
+    except HashingOverloadedError:
+        raise _hashing_busy()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials.",
         )
+    if password_needs_rehash(user.password_hash):
+        background_tasks.add_task(
+            _rehash_password, user.id, payload.password, user.password_hash
+        )
 
-    # Perform ML-KEM handshake if user has PQC keys
-    # For Phase 1, we'll derive a shared secret if keys exist,
-    # otherwise we'll generate a new keypair for future use
-    if user.pqc_public_key and user.pqc_private_blob:
+    # Client-driven ML-KEM handshake: the client encapsulates against the
+    # user's public key and the server performs exactly one decapsulation
+    session_binding = None
+    if payload.kem_ciphertext is not None:
+        keys = await get_user_key_material_async(db, user.id)
+        if keys is None or not keys.private_key:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No ML-KEM key registered for this account.",
+            )
         try:
-            # Client would encapsulate using our public key
-            # For now, server simulates the handshake by encapsulating against its own public key
-            public_key_bytes = decode_key_base64(user.pqc_public_key)
-            private_key_bytes = decode_key_base64(user.pqc_private_blob)
-            
-            # In a real flow, client sends ciphertext, server decapsulates
-            # For MVP, we derive shared secret server-side to wrap JWT signing
-            encapsulation_result = encapsulate(public_key_bytes)
-            
-            # Derive shared secret (in real flow, client would send ciphertext)
-            # Server uses this to enhance JWT security
-            shared_secret = decapsulate(
-                private_key_bytes,
-                encapsulation_result.ciphertext,
+            # Unwrapping and decapsulation are CPU-bound; keep them off the event loop
+            shared_secret = await run_in_threadpool(
+                _decapsulate_login,
+                user,
+                keys,
+                decode_key_base64(payload.kem_ciphertext),
+            )
+        except PrivateKeyUnwrapError as e:
+            # A missing or retired KEK or a corrupt blob is our fault, not the client's
+            logger.error(f"Could not unwrap private key for user {user.id}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="ML-KEM key is unavailable.",
             )
-            
-            # Use shared secret to enhance JWT (wrap signing key)
-            # For Phase 1, we'll use the shared secret as additional entropy
-            _ = shared_secret  # Store for future JWT enhancement
-        except Exception as e:
-            # If ML-KEM fails, still issue token (graceful degradation)
-            # Log error for debugging
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"ML-KEM handshake failed for user {user.id}: {e}")
+        except (ValueError, RuntimeError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid KEM ciphertext.",
+            )
+        session_binding = derive_session_binding(shared_secret)
+    elif settings.pqc_simulated_handshake:
+        keys = await get_user_key_material_async(db, user.id)
+        if keys is not None and keys.public_key and keys.private_key:
+            await run_in_threadpool(_simulated_handshake, user, keys)
 
     # Issue JWT token
-    token = create_jwt_token(user.id, redirect="/dashboard")
+    token = create_jwt_token(
+        user.id, redirect="/dashboard", session_binding=session_binding
+    )
+    refresh_token = await issue_refresh_token_async(db, user.id, session_binding)
+
+    return auth_models.LoginResponse(
+        token=token, redirect="/dashboard", refresh_token=refresh_token
+    )
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token.",
+    )
+
+
+@router.post("/refresh", response_model=auth_models.LoginResponse)
+async def refresh(
+    payload: auth_models.RefreshRequest,
+    db: AsyncSession = Depends(get_async_db),
+) -> auth_models.LoginResponse:
+    """
+    Exchange a refresh token for a new JWT and a new refresh token.
+
+    No password check runs here: the refresh token is looked up by its
+    SHA-256 digest. Each refresh token works once; replaying a rotated token
+    revokes every token issued from the same login.
+
+    Returns the new token pair, 401 if the refresh token is invalid or reused.
+    """
+    try:
+        grant = await rotate_refresh_token_async(db, payload.refresh_token)
+    except RefreshTokenReuseError as e:
+        logger.warning(f"Refresh token reuse detected: {e}")
+        raise _invalid_refresh_token()
+    if grant is None:
+        raise _invalid_refresh_token()
+
+    token = create_jwt_token(
+        grant.user_id, redirect="/dashboard", session_binding=grant.session_binding
+    )
+    return auth_models.LoginResponse(
+        token=token, redirect="/dashboard", refresh_token=grant.refresh_token
+    )
 
-    return auth_models.LoginResponse(token=token, redirect="/dashboard")
 
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    payload: auth_models.RefreshRequest,
+    db: AsyncSession = Depends(get_async_db),
+) -> None:
+    """
+    Revoke the refresh token and every token rotated from the same login.
+
+    Access tokens already issued stay valid until they expire, which the
+    short JWT lifetime keeps brief. Unknown tokens are ignored.
+    """
+    await revoke_refresh_token_async(db, payload.refresh_token)
+
+
+def _decapsulate_login(user: User, keys: UserKeyMaterial, ciphertext: bytes) -> bytes:
+    """
+    Unwrap the user's stored private key and decapsulate a login ciphertext.
+
+    Raises:
+        PrivateKeyUnwrapError: If the stored key cannot be unwrapped
+        ValueError: If the ciphertext has the wrong size
+        RuntimeError: If liboqs fails
+    """
+    with unwrap_private_key(user.id, keys.private_key) as private_key:
+        return decapsulate(private_key, ciphertext, keys.algorithm)
+
+
+def _simulated_handshake(user: User, keys: UserKeyMaterial) -> None:
+    """
+    Legacy Phase 1 handshake: encapsulate against the user's own public key
+    and immediately decapsulate. Costs two KEM operations and its result is
+    discarded; only enabled via PQC_SIMULATED_HANDSHAKE.
+    """
+    try:
+        with unwrap_private_key(user.id, keys.private_key) as private_key:
+            try:
+                encapsulation_result = encapsulate(keys.public_key, keys.algorithm)
+                decapsulate(private_key, encapsulation_result.ciphertext, keys.algorithm)
+            except Exception as e:
+                # If ML-KEM fails, still issue token (graceful degradation)
+                logger.warning(f"ML-KEM handshake failed for user {user.id}: {e}")
+    except PrivateKeyUnwrapError as e:
+        logger.error(f"Could not unwrap private key for user {user.id}: {e}")
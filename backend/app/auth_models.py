@@ -1,5 +1,7 @@
 """Pydantic models for authentication endpoints."""
 
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -8,12 +10,42 @@ class LoginRequest(BaseModel):
 
     email: EmailStr
     password: str = Field(min_length=1, max_length=256)
+    # Base64 ML-KEM ciphertext encapsulated against the user's public key
+    kem_ciphertext: Optional[str] = Field(default=None, max_length=8192)
 
 
 class LoginResponse(BaseModel):
-    """Login response payload with JWT token and redirect path."""
+    """Login response payload with JWT token, refresh token and redirect path."""
 
     token: str
     redirect: str = "/dashboard"
+    refresh_token: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    """Refresh or logout request carrying an opaque refresh token."""
 
+    refresh_token: str = Field(min_length=1, max_length=256)
 
+
+class RegisterRequest(BaseModel):
+    """Registration request payload."""
+
+    email: EmailStr
+    password: str = Field(min_length=8, max_length=256)
+    display_name: str = Field(min_length=1, max_length=100)
+    generate_on_device: bool = False
+    # Base64 ML-KEM public key, required when generate_on_device is set
+    public_key: Optional[str] = Field(default=None, max_length=8192)
+    # Variant of public_key (PQC_KEM_ALGORITHM if omitted)
+    kem_algorithm: Optional[str] = Field(default=None, max_length=64)
+
+
+class RegisterResponse(BaseModel):
+    """Registration response with the new user's ID, tokens and public key."""
+
+    user_id: str
+    auth_token: str
+    refresh_token: Optional[str] = None
+    key_id: Optional[str] = None
+    public_key: Optional[str] = None
@@ -0,0 +1,207 @@
+"""Pub/sub brokers that relay per-recipient delivery events between processes."""
+
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from cache import TTLCache
+from config import get_settings
+from database import AsyncSessionLocal
+from db_models import DeliveryEvent
+from group_commit import GroupCommitWriter
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Called with (recipient_id, event) for events that reach this process
+DeliverCallback = Callable[[UUID, dict[str, Any]], Any]
+
+
+class MessageBroker(ABC):
+    """
+    Fans delivery events out to every app process.
+
+    Each process starts the broker with a callback that hands events to its
+    own connections (the WebSocket hub). ``publish`` makes an event visible
+    to all processes, including the one that published it.
+    """
+
+    @abstractmethod
+    async def start(self, deliver: DeliverCallback) -> None:
+        """Begin delivering events to ``deliver``."""
+
+    @abstractmethod
+    async def publish(self, recipient_id: UUID, event: dict[str, Any]) -> None:
+        """Publish an event for a recipient to every process."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Flush pending publishes and stop delivering."""
+
+
+class LocalBroker(MessageBroker):
+    """Single-process broker that delivers straight to the local callback."""
+
+    def __init__(self):
+        self._deliver: Optional[DeliverCallback] = None
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+
+    async def publish(self, recipient_id: UUID, event: dict[str, Any]) -> None:
+        if self._deliver is not None:
+            self._deliver(recipient_id, event)
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+
+class DatabaseBroker(MessageBroker):
+    """
+    Multi-process broker backed by the ``delivery_events`` table.
+
+    Publishes are delivered locally at once and appended to the table through
+    a group-commit writer; every process polls the table every
+    ``poll_interval`` seconds and delivers events published by the others.
+
+    Row IDs can commit out of order on Postgres, so each poll also rereads
+    events newer than ``settle`` seconds and skips IDs it has already seen.
+    Events older than ``retention`` seconds are pruned; clients that were
+    offline longer catch up from the message store instead.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        poll_interval: float,
+        retention: float,
+        settle: float,
+        max_batch: int = 256,
+        max_delay: float = 0.005,
+    ):
+        self._session_factory = session_factory
+        self._poll_interval = poll_interval
+        self._retention = retention
+        self._settle = settle
+        self._origin = str(uuid.uuid4())
+        self._writer = GroupCommitWriter(
+            self._write_events,
+            max_batch=max_batch,
+            max_delay=max_delay,
+            max_pending=max_batch * 16,
+        )
+        self._seen: TTLCache[int, bool] = TTLCache(maxsize=65536, ttl=settle * 4)
+        self._cursor = 0
+        self._deliver: Optional[DeliverCallback] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+        async with self._session_factory() as db:
+            latest = await db.scalar(select(DeliveryEvent.id).order_by(DeliveryEvent.id.desc()))
+        self._cursor = latest or 0
+        self._writer.start()
+        self._poller = asyncio.create_task(self._poll_loop(), name="broker-poll")
+
+    async def publish(self, recipient_id: UUID, event: dict[str, Any]) -> None:
+        if self._deliver is not None:
+            self._deliver(recipient_id, event)
+        await self._writer.submit(
+            {
+                "recipient_id": recipient_id,
+                "origin": self._origin,
+                "payload": event,
+                "created_at": datetime.utcnow(),
+            }
+        )
+
+    async def stop(self) -> None:
+        await self._writer.stop()
+        poller, self._poller = self._poller, None
+        if poller is not None:
+            poller.cancel()
+            try:
+                await poller
+            except asyncio.CancelledError:
+                pass
+        self._deliver = None
+
+    async def poll(self) -> int:
+        """
+        Deliver events published by other processes since the last poll.
+
+        Returns:
+            Number of events delivered
+        """
+        since = datetime.utcnow() - timedelta(seconds=self._settle)
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(DeliveryEvent)
+                .where(
+                    or_(DeliveryEvent.id > self._cursor, DeliveryEvent.created_at >= since),
+                    DeliveryEvent.origin != self._origin,
+                )
+                .order_by(DeliveryEvent.id)
+            )
+            events = result.scalars().all()
+
+        delivered = 0
+        for event in events:
+            self._cursor = max(self._cursor, event.id)
+            if self._seen.get(event.id) is not None:
+                continue
+            self._seen.set(event.id, True)
+            if self._deliver is not None:
+                self._deliver(event.recipient_id, event.payload)
+                delivered += 1
+        return delivered
+
+    async def prune(self) -> None:
+        """Delete events older than the retention window."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self._retention)
+        async with self._session_factory() as db:
+            await db.execute(delete(DeliveryEvent).where(DeliveryEvent.created_at < cutoff))
+            await db.commit()
+
+    async def _write_events(self, rows: Sequence[dict]) -> None:
+        async with self._session_factory() as db:
+            await db.execute(insert(DeliveryEvent), list(rows))
+            await db.commit()
+
+    async def _poll_loop(self) -> None:
+        polls_per_prune = max(1, int(self._retention / self._poll_interval))
+        polls = 0
+        while True:
+            try:
+                await self.poll()
+                polls += 1
+                if polls % polls_per_prune == 0:
+                    await self.prune()
+            except Exception as e:
+                logger.error(f"Delivery event poll failed: {e}")
+            await asyncio.sleep(self._poll_interval)
+
+
+def create_broker() -> MessageBroker:
+    """Build the broker selected by ``MESSAGE_BROKER``."""
+    if settings.message_broker == "database":
+        return DatabaseBroker(
+            AsyncSessionLocal,
+            poll_interval=settings.broker_poll_interval_ms / 1000,
+            retention=settings.broker_event_retention_seconds,
+            settle=settings.broker_settle_seconds,
+            max_batch=settings.message_batch_max_size,
+            max_delay=settings.message_batch_max_delay_ms / 1000,
+        )
+    return LocalBroker()
+
+
+broker = create_broker()
@@ -0,0 +1,115 @@
+"""In-process LRU cache with per-entry TTL used for hot lookups."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, NamedTuple, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats(NamedTuple):
+    """Snapshot of cache counters."""
+
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe bounded LRU cache whose entries expire after a TTL.
+
+    ``on_evict`` is called (outside the lock) for every entry that leaves the
+    cache, whether it expired, was pushed out by size, or was invalidated.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._on_evict = on_evict
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: K) -> Optional[V]:
+        """Return the cached value, or None if absent or expired."""
+        evicted = None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            if entry is not None:
+                del self._entries[key]
+                self._evictions += 1
+                evicted = [(key, entry[1])]
+        self._notify(evicted)
+        return None
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        """Store a value, optionally with a TTL shorter or longer than the default."""
+        ttl = self._ttl if ttl is None else ttl
+        if ttl <= 0 or self._maxsize <= 0:
+            return
+
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + ttl, value)
+            while len(self._entries) > self._maxsize:
+                old_key, (_, old_value) = self._entries.popitem(last=False)
+                evicted.append((old_key, old_value))
+            self._evictions += len(evicted)
+        if previous is not None and previous[1] is not value:
+            evicted.append((key, previous[1]))
+        self._notify(evicted)
+
+    def pop(self, key: K) -> Optional[V]:
+        """Invalidate a single entry, returning its value if present."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._notify([(key, entry[1])])
+        return entry[1]
+
+    def clear(self) -> None:
+        """Invalidate every entry."""
+        with self._lock:
+            evicted = [(key, entry[1]) for key, entry in self._entries.items()]
+            self._entries.clear()
+        self._notify(evicted)
+
+    def stats(self) -> CacheStats:
+        """Return size and hit/miss counters."""
+        with self._lock:
+            return CacheStats(
+                size=len(self._entries),
+                maxsize=self._maxsize,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _notify(self, evicted: Optional[list[tuple[K, V]]]) -> None:
+        if self._on_evict is None or not evicted:
+            return
+        for key, value in evicted:
+            self._on_evict(key, value)
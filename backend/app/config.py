@@ -1,9 +1,10 @@
-"""Application configuration with SQLite database URL and JWT settings."""
+"""Application configuration with database URL and JWT settings."""
 
+import warnings
 from functools import lru_cache
-from typing import List
+from typing import List, Literal, Optional
 
-from pydantic import Field, computed_field
+from pydantic import Field, computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 DEFAULT_ALLOWED_ORIGINS: List[str] = [
@@ -31,26 +32,392 @@ class Settings(BaseSettings):
     database_url: str = Field(
         default="sqlite:///./pqc_messenger.db",
         alias="DATABASE_URL",
-        description="SQLite database URL for user storage",
+        description="SQLite or PostgreSQL database URL for user storage",
+    )
+    database_echo: bool = Field(
+        default=False,
+        alias="DATABASE_ECHO",
+        description="Log every SQL statement (independent of ENVIRONMENT)",
+    )
+    database_auto_migrate: bool = Field(
+        default=True,
+        alias="DATABASE_AUTO_MIGRATE",
+        description="Run Alembic migrations to head on startup",
+    )
+    
+    # Server database (Postgres) pool configuration
+    database_pool_size: int = Field(
+        default=10,
+        alias="DATABASE_POOL_SIZE",
+        description="Persistent connections per engine in each app replica",
+    )
+    database_max_overflow: int = Field(
+        default=20,
+        alias="DATABASE_MAX_OVERFLOW",
+        description="Extra connections allowed beyond the pool under bursts",
+    )
+    database_pool_pre_ping: bool = Field(
+        default=True,
+        alias="DATABASE_POOL_PRE_PING",
+        description="Test pooled connections on checkout so server restarts are survived",
+    )
+    database_pool_recycle: int = Field(
+        default=1800,
+        alias="DATABASE_POOL_RECYCLE",
+        description="Seconds after which a pooled connection is replaced (-1 disables)",
+    )
+    database_statement_cache_size: int = Field(
+        default=100,
+        alias="DATABASE_STATEMENT_CACHE_SIZE",
+        description="Server-side prepared statements cached per connection (0 for PgBouncer)",
+    )
+    
+    # SQLite tuning profile, applied to every new connection
+    sqlite_tuned: bool = Field(
+        default=True,
+        alias="SQLITE_TUNED",
+        description="Apply the pragmas below and size the connection pool",
+    )
+    sqlite_journal_mode: Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"] = Field(
+        default="WAL",
+        alias="SQLITE_JOURNAL_MODE",
+        description="WAL lets readers proceed while a single writer commits",
+    )
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = Field(
+        default="NORMAL",
+        alias="SQLITE_SYNCHRONOUS",
+        description="NORMAL is durable across app crashes in WAL mode, fsyncs at checkpoints",
+    )
+    sqlite_mmap_size: int = Field(
+        default=256 * 1024 * 1024,
+        alias="SQLITE_MMAP_SIZE",
+        description="Bytes of the database file to memory-map for reads",
+    )
+    sqlite_cache_size: int = Field(
+        default=-64000,
+        alias="SQLITE_CACHE_SIZE",
+        description="Page cache size; negative values are KiB per connection",
+    )
+    sqlite_busy_timeout_ms: int = Field(
+        default=5000,
+        alias="SQLITE_BUSY_TIMEOUT_MS",
+        description="How long a connection waits for a lock before failing",
+    )
+    sqlite_pool_size: int = Field(
+        default=8,
+        alias="SQLITE_POOL_SIZE",
+        description="Pooled connections per engine for concurrent readers",
+    )
+    sqlite_max_overflow: int = Field(
+        default=8,
+        alias="SQLITE_MAX_OVERFLOW",
+        description="Extra connections allowed beyond the pool under bursts",
     )
     
     # JWT configuration
     jwt_secret_key: str = Field(
         default="dev-secret-key-change-in-production",
         alias="JWT_SECRET_KEY",
-        description="Secret key for JWT token signing",
+        description="Secret key for JWT token signing when no keyring file is set",
     )
     jwt_algorithm: str = Field(
         default="HS256",
         alias="JWT_ALGORITHM",
         description="JWT signing algorithm",
     )
-    jwt_expiration_hours: int = Field(
-        default=24,
+    jwt_keyring_file: str | None = Field(
+        default=None,
+        alias="JWT_KEYRING_FILE",
+        description="Keyring of kid-tagged HS/EdDSA/ML-DSA keys; overrides the secret above",
+    )
+    jwt_expiration_minutes: int = Field(
+        default=15,
+        alias="JWT_EXPIRATION_MINUTES",
+        description="Access token lifetime; clients renew through /api/auth/refresh",
+    )
+    jwt_expiration_hours: int | None = Field(
+        default=None,
         alias="JWT_EXPIRATION_HOURS",
-        description="JWT token expiration time in hours",
+        exclude=True,
+        description="Deprecated; used as the token lifetime when JWT_EXPIRATION_MINUTES is unset",
+    )
+    refresh_token_expiration_days: int = Field(
+        default=30,
+        alias="REFRESH_TOKEN_EXPIRATION_DAYS",
+        description="Lifetime of each refresh token; rotation issues a fresh one",
+    )
+    jwt_cache_size: int = Field(
+        default=10000,
+        alias="JWT_CACHE_SIZE",
+        description="Verified tokens whose claims are kept in the in-process cache",
+    )
+    jwt_cache_ttl_seconds: int = Field(
+        default=300,
+        alias="JWT_CACHE_TTL_SECONDS",
+        description="Longest a verified token is trusted without re-checking its signature",
     )
     
+    # Argon2id cost parameters; stored hashes using other values are
+    # upgraded on the next successful login (tune with python -m crypto.calibrate)
+    argon2_time_cost: int = Field(
+        default=3,
+        alias="ARGON2_TIME_COST",
+        description="Argon2id iterations over memory",
+    )
+    argon2_memory_cost: int = Field(
+        default=65536,
+        alias="ARGON2_MEMORY_COST",
+        description="Argon2id memory per hash in KiB",
+    )
+    argon2_parallelism: int = Field(
+        default=4,
+        alias="ARGON2_PARALLELISM",
+        description="Argon2id lanes per hash",
+    )
+
+    # Login rate limiting, checked before any user lookup or hashing
+    login_rate_limit_enabled: bool = Field(
+        default=True,
+        alias="LOGIN_RATE_LIMIT_ENABLED",
+        description="Reject login attempts beyond the per-IP and per-email buckets with 429",
+    )
+    rate_limit_store: Literal["memory", "database"] = Field(
+        default="memory",
+        alias="RATE_LIMIT_STORE",
+        description="memory for one process; database to share buckets between workers",
+    )
+    rate_limit_memory_max_keys: int = Field(
+        default=100000,
+        alias="RATE_LIMIT_MEMORY_MAX_KEYS",
+        description="Buckets kept by the in-memory store before the least recent is dropped",
+    )
+    rate_limit_trust_forwarded_for: bool = Field(
+        default=False,
+        alias="RATE_LIMIT_TRUST_FORWARDED_FOR",
+        description="Take the client IP from X-Forwarded-For (only behind a trusted proxy)",
+    )
+    rate_limit_trusted_proxy_hops: int = Field(
+        default=1,
+        ge=1,
+        alias="RATE_LIMIT_TRUSTED_PROXY_HOPS",
+        description="Trusted proxies in front of the app; the client IP is this many X-Forwarded-For entries from the right",
+    )
+    login_ip_burst: int = Field(
+        default=20,
+        alias="LOGIN_IP_BURST",
+        description="Login attempts one IP may make at once",
+    )
+    login_ip_per_minute: float = Field(
+        default=30.0,
+        alias="LOGIN_IP_PER_MINUTE",
+        description="Sustained login attempts per minute from one IP",
+    )
+    login_email_burst: int = Field(
+        default=5,
+        alias="LOGIN_EMAIL_BURST",
+        description="Login attempts for one email at once",
+    )
+    login_email_per_minute: float = Field(
+        default=3.0,
+        alias="LOGIN_EMAIL_PER_MINUTE",
+        description="Sustained login attempts per minute for one email",
+    )
+
+    # Password hashing executor configuration
+    password_hash_workers: int = Field(
+        default=4,
+        alias="PASSWORD_HASH_WORKERS",
+        description="Number of threads dedicated to Argon2id hashing and verification",
+    )
+    password_hash_max_queue: int = Field(
+        default=32,
+        alias="PASSWORD_HASH_MAX_QUEUE",
+        description="Maximum hashing jobs waiting for a worker before requests are rejected",
+    )
+    login_dummy_verify: bool = Field(
+        default=True,
+        alias="LOGIN_DUMMY_VERIFY",
+        description="Verify unknown emails against a dummy hash so every login costs the same",
+    )
+    password_hash_retry_after_seconds: int = Field(
+        default=1,
+        alias="PASSWORD_HASH_RETRY_AFTER_SECONDS",
+        description="Retry-After value sent when the hashing queue is full",
+    )
+
+    # ML-KEM configuration
+    pqc_simulated_handshake: bool = Field(
+        default=False,
+        alias="PQC_SIMULATED_HANDSHAKE",
+        description="Run the legacy server-side encapsulate+decapsulate on login",
+    )
+    pqc_kem_algorithm: Optional[str] = Field(
+        default=None,
+        alias="PQC_KEM_ALGORITHM",
+        description="ML-KEM variant for new keys; existing keys keep their own (first enabled if unset)",
+    )
+    kem_pool_max_idle: int = Field(
+        default=16,
+        alias="KEM_POOL_MAX_IDLE",
+        description="Idle liboqs KEM contexts kept per algorithm for reuse",
+    )
+    kem_batch_workers: int = Field(
+        default=4,
+        alias="KEM_BATCH_WORKERS",
+        description="Threads used to split large batch KEM operations",
+    )
+    kem_batch_parallel_threshold: int = Field(
+        default=256,
+        alias="KEM_BATCH_PARALLEL_THRESHOLD",
+        description="Batch size at which KEM operations are spread across workers",
+    )
+    kem_reservoir_enabled: bool = Field(
+        default=True,
+        alias="KEM_RESERVOIR_ENABLED",
+        description="Pre-generate ML-KEM keypairs on a background thread",
+    )
+    kem_reservoir_low_watermark: int = Field(
+        default=8,
+        alias="KEM_RESERVOIR_LOW_WATERMARK",
+        description="Refill the keypair reservoir when it drops below this size",
+    )
+    kem_reservoir_high_watermark: int = Field(
+        default=32,
+        alias="KEM_RESERVOIR_HIGH_WATERMARK",
+        description="Number of keypairs the reservoir refills up to",
+    )
+
+    # Hybrid X25519 + ML-KEM session keys (crypto/session.py)
+    session_aead: Literal["ChaCha20-Poly1305", "AES-256-GCM"] = Field(
+        default="ChaCha20-Poly1305",
+        alias="SESSION_AEAD",
+        description="AEAD used to seal payloads under a session key",
+    )
+    session_key_cache_size: int = Field(
+        default=10000,
+        alias="SESSION_KEY_CACHE_SIZE",
+        description="Derived session keys kept per direction (0 disables caching)",
+    )
+    session_key_ttl_seconds: float = Field(
+        default=3600.0,
+        alias="SESSION_KEY_TTL_SECONDS",
+        description="How long a derived session key is reused before a fresh key exchange",
+    )
+    session_key_max_messages: int = Field(
+        default=1_000_000,
+        alias="SESSION_KEY_MAX_MESSAGES",
+        description="Seals per session key before rekeying, bounding random-nonce reuse",
+    )
+
+    # Private key envelope encryption (crypto/kek.py)
+    private_key_kek_file: Optional[str] = Field(
+        default=None,
+        alias="PRIVATE_KEY_KEK_FILE",
+        description="JSON file of KEKs that wrap stored private keys (unset stores them raw)",
+    )
+    private_key_cache_size: int = Field(
+        default=1024,
+        alias="PRIVATE_KEY_CACHE_SIZE",
+        description="Unwrapped private keys kept in memory (0 disables caching)",
+    )
+    private_key_cache_ttl_seconds: float = Field(
+        default=300.0,
+        alias="PRIVATE_KEY_CACHE_TTL_SECONDS",
+        description="Seconds an unwrapped private key stays cached before it is zeroed",
+    )
+
+    # Public key directory cache
+    public_key_cache_size: int = Field(
+        default=10000,
+        alias="PUBLIC_KEY_CACHE_SIZE",
+        description="Maximum public key lookups held in the in-process cache",
+    )
+    public_key_cache_ttl_seconds: int = Field(
+        default=300,
+        alias="PUBLIC_KEY_CACHE_TTL_SECONDS",
+        description="Seconds a cached public key lookup stays valid",
+    )
+
+    # Message group-commit writer
+    message_batch_max_size: int = Field(
+        default=256,
+        alias="MESSAGE_BATCH_MAX_SIZE",
+        description="Most message inserts written in one transaction",
+    )
+    message_batch_max_delay_ms: float = Field(
+        default=5.0,
+        alias="MESSAGE_BATCH_MAX_DELAY_MS",
+        description="How long a batch stays open for more messages after the first",
+    )
+    message_queue_max_pending: int = Field(
+        default=4096,
+        alias="MESSAGE_QUEUE_MAX_PENDING",
+        description="Messages waiting to be written before senders are made to wait",
+    )
+    inbox_settle_ms: float = Field(
+        default=2000.0,
+        alias="INBOX_SETTLE_MS",
+        description="Inbox sync skips messages newer than this, so a late commit cannot land behind a cursor",
+    )
+
+    # Cross-process delivery broker
+    message_broker: Literal["local", "database"] = Field(
+        default="local",
+        alias="MESSAGE_BROKER",
+        description="local for a single process; database to relay pushes between replicas",
+    )
+    broker_poll_interval_ms: float = Field(
+        default=50.0,
+        alias="BROKER_POLL_INTERVAL_MS",
+        description="How often each process polls for events published elsewhere",
+    )
+    broker_settle_seconds: float = Field(
+        default=1.0,
+        alias="BROKER_SETTLE_SECONDS",
+        description="Window re-read on each poll to catch events that committed out of order",
+    )
+    broker_event_retention_seconds: float = Field(
+        default=60.0,
+        alias="BROKER_EVENT_RETENTION_SECONDS",
+        description="Age after which relayed events are pruned",
+    )
+
+    # Attachment storage
+    attachment_storage_dir: str = Field(
+        default="./attachments",
+        alias="ATTACHMENT_STORAGE_DIR",
+        description="Directory holding encrypted attachment files",
+    )
+    attachment_chunk_size: int = Field(
+        default=65536,
+        alias="ATTACHMENT_CHUNK_SIZE",
+        description="Plaintext bytes per encrypted chunk; bounds memory per transfer",
+    )
+    attachment_max_bytes: int = Field(
+        default=100 * 1024 * 1024,
+        alias="ATTACHMENT_MAX_BYTES",
+        description="Largest accepted upload",
+    )
+
+    # WebSocket delivery hub
+    ws_send_queue_size: int = Field(
+        default=64,
+        alias="WS_SEND_QUEUE_SIZE",
+        description="Events buffered per connection before it is evicted as a slow consumer",
+    )
+    ws_send_timeout_seconds: float = Field(
+        default=10.0,
+        alias="WS_SEND_TIMEOUT_SECONDS",
+        description="How long a single push may take before the connection is evicted",
+    )
+
+    # Prometheus-style metrics (metrics.py)
+    metrics_enabled: bool = Field(
+        default=True,
+        alias="METRICS_ENABLED",
+        description="Serve /metrics and time requests and hot paths (off removes the timers)",
+    )
+
     # Store as string to prevent Pydantic Settings from trying to JSON-decode
     allowed_origins_str: str | None = Field(
         default=None, alias="ALLOWED_ORIGINS", exclude=True
@@ -62,6 +429,28 @@ class Settings(BaseSettings):
         """Parse allowed origins from string or return defaults."""
         return parse_origins(self.allowed_origins_str)
 
+    @model_validator(mode="after")
+    def _apply_legacy_jwt_expiration(self) -> "Settings":
+        """Honor the pre-refresh-token JWT_EXPIRATION_HOURS setting with a warning."""
+        if self.jwt_expiration_hours is None:
+            return self
+        if "jwt_expiration_minutes" in self.model_fields_set:
+            warnings.warn(
+                "JWT_EXPIRATION_HOURS is deprecated and ignored because "
+                "JWT_EXPIRATION_MINUTES is set; remove it",
+                FutureWarning,
+                stacklevel=2,
+            )
+            return self
+        warnings.warn(
+            "JWT_EXPIRATION_HOURS is deprecated; set JWT_EXPIRATION_MINUTES instead "
+            "(access tokens are now renewed through /api/auth/refresh)",
+            FutureWarning,
+            stacklevel=2,
+        )
+        self.jwt_expiration_minutes = self.jwt_expiration_hours * 60
+        return self
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
@@ -0,0 +1,165 @@
+"""
+Benchmark Argon2id parameters on this host and recommend the strongest set.
+
+Each candidate is measured the way logins load the server: ``--concurrency``
+threads (the hashing executor size by default) verify passwords at once, and
+the 95th percentile verify latency must stay within ``--target-ms``. The
+memory budget caps ``memory_cost`` so that every worker hashing at once
+still fits in RAM.
+
+Usage (from backend/app):
+    python -m crypto.calibrate --target-ms 250 --concurrency 4 --memory-budget-mib 1024
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional, Sequence
+
+from argon2 import PasswordHasher
+
+from config import get_settings
+
+settings = get_settings()
+
+# Memory costs in KiB, from the OWASP minimum (19 MiB) upwards
+MEMORY_COSTS = (19456, 32768, 47104, 65536, 131072, 262144)
+MAX_TIME_COST = 8
+
+
+class Argon2Params(NamedTuple):
+    """One candidate parameter set."""
+
+    time_cost: int
+    memory_cost: int
+    parallelism: int
+
+    @property
+    def strength(self) -> int:
+        """Total KiB processed per hash, used to rank candidates."""
+        return self.time_cost * self.memory_cost
+
+
+class CalibrationResult(NamedTuple):
+    """Verify latency measured for one parameter set under load."""
+
+    params: Argon2Params
+    p50_ms: float
+    p95_ms: float
+    verifies_per_second: float
+
+
+def measure(params: Argon2Params, concurrency: int, rounds: int) -> CalibrationResult:
+    """Time ``rounds`` verifies on each of ``concurrency`` threads running together."""
+    hasher = PasswordHasher(
+        time_cost=params.time_cost,
+        memory_cost=params.memory_cost,
+        parallelism=params.parallelism,
+    )
+    password_hash = hasher.hash("calibration-password")
+
+    def worker(_: int) -> list[float]:
+        latencies = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            hasher.verify(password_hash, "calibration-password")
+            latencies.append((time.perf_counter() - started) * 1000)
+        return latencies
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = [ms for batch in executor.map(worker, range(concurrency)) for ms in batch]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p95_index = min(len(latencies) - 1, int(len(latencies) * 0.95))
+    return CalibrationResult(
+        params=params,
+        p50_ms=statistics.median(latencies),
+        p95_ms=latencies[p95_index],
+        verifies_per_second=len(latencies) / elapsed,
+    )
+
+
+def recommend(
+    results: Sequence[CalibrationResult], target_ms: float
+) -> Optional[CalibrationResult]:
+    """Return the strongest result within the latency target, or None."""
+    within = [r for r in results if r.p95_ms <= target_ms]
+    if not within:
+        return None
+    return max(within, key=lambda r: (r.params.strength, r.params.memory_cost))
+
+
+def calibrate(
+    target_ms: float,
+    concurrency: int,
+    memory_budget_kib: int,
+    parallelism: int,
+    rounds: int,
+) -> list[CalibrationResult]:
+    """
+    Measure every candidate that fits the memory budget.
+
+    For each memory cost, ``time_cost`` is raised until the target is missed,
+    since more passes only get slower.
+    """
+    results = []
+    for memory_cost in MEMORY_COSTS:
+        if memory_cost * concurrency > memory_budget_kib:
+            break
+        for time_cost in range(1, MAX_TIME_COST + 1):
+            result = measure(
+                Argon2Params(time_cost, memory_cost, parallelism), concurrency, rounds
+            )
+            results.append(result)
+            print(
+                f"t={time_cost} m={memory_cost // 1024}MiB p={parallelism}: "
+                f"p50 {result.p50_ms:.1f} ms, p95 {result.p95_ms:.1f} ms, "
+                f"{result.verifies_per_second:.1f} verifies/s"
+            )
+            if result.p95_ms > target_ms:
+                break
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Calibrate Argon2id parameters")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="p95 verify latency")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.password_hash_workers,
+        help="simultaneous verifies (defaults to PASSWORD_HASH_WORKERS)",
+    )
+    parser.add_argument("--memory-budget-mib", type=int, default=1024)
+    parser.add_argument("--parallelism", type=int, default=settings.argon2_parallelism)
+    parser.add_argument("--rounds", type=int, default=5, help="verifies per thread")
+    args = parser.parse_args(argv)
+
+    current = Argon2Params(
+        settings.argon2_time_cost, settings.argon2_memory_cost, settings.argon2_parallelism
+    )
+    print(f"Current: {current}")
+    results = calibrate(
+        args.target_ms,
+        args.concurrency,
+        args.memory_budget_mib * 1024,
+        args.parallelism,
+        args.rounds,
+    )
+    best = recommend(results, args.target_ms)
+    if best is None:
+        parser.exit(1, f"No candidate meets a p95 of {args.target_ms:.0f} ms\n")
+
+    print(
+        f"\nRecommended for p95 <= {args.target_ms:.0f} ms at concurrency {args.concurrency}:"
+    )
+    print(f"ARGON2_TIME_COST={best.params.time_cost}")
+    print(f"ARGON2_MEMORY_COST={best.params.memory_cost}")
+    print(f"ARGON2_PARALLELISM={best.params.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
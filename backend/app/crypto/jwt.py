@@ -1,29 +1,47 @@
 """JWT token generation and validation utilities."""
 
 import datetime
+import hashlib
+import time
 from typing import Optional
 from uuid import UUID
 
 import jwt
 
+from cache import TTLCache
 from config import get_settings
+from crypto.keyring import get_keyring
+from metrics import OPERATION_LATENCY, timed
 
 settings = get_settings()
 
+# Verified claims keyed by SHA-256 of the token, so raw tokens are not kept
+# as dictionary keys. Only valid tokens are cached, each until its ``exp``.
+_claims_cache: TTLCache[bytes, dict] = TTLCache(
+    maxsize=settings.jwt_cache_size,
+    ttl=settings.jwt_cache_ttl_seconds,
+)
 
-def create_jwt_token(user_id: UUID | str, redirect: str = "/dashboard") -> str:
+
+@timed(OPERATION_LATENCY, "create_jwt_token")
+def create_jwt_token(
+    user_id: UUID | str,
+    redirect: str = "/dashboard",
+    session_binding: Optional[str] = None,
+) -> str:
     """
     Create a JWT token for a user.
     
     Args:
         user_id: User's unique identifier
         redirect: Redirect path after login (default: /dashboard)
+        session_binding: ML-KEM session binding from the login handshake
     
     Returns:
         Encoded JWT token string
     """
     now = datetime.datetime.utcnow()
-    expiration = now + datetime.timedelta(hours=settings.jwt_expiration_hours)
+    expiration = now + datetime.timedelta(minutes=settings.jwt_expiration_minutes)
     
     payload = {
         "sub": str(user_id),  # Subject (user ID)
@@ -31,11 +49,15 @@ def create_jwt_token(user_id: UUID | str, redirect: str = "/dashboard") -> str:
         "iat": now,
         "redirect": redirect,
     }
+    if session_binding is not None:
+        payload["kem"] = session_binding
     
+    key = get_keyring().active
     token = jwt.encode(
         payload,
-        settings.jwt_secret_key,
-        algorithm=settings.jwt_algorithm,
+        key.signing_key,
+        algorithm=key.algorithm,
+        headers={"kid": key.kid} if key.kid else None,
     )
     
     return token
@@ -45,6 +67,9 @@ def decode_jwt_token(token: str) -> Optional[dict]:
     """
     Decode and validate a JWT token.
     
+    The verification key is looked up by the token's ``kid`` header in the
+    keyring, and only that key's algorithm is accepted.
+    
     Args:
         token: JWT token string
     
@@ -52,10 +77,13 @@ def decode_jwt_token(token: str) -> Optional[dict]:
         Decoded payload dictionary or None if invalid
     """
     try:
+        key = get_keyring().resolve(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
         payload = jwt.decode(
             token,
-            settings.jwt_secret_key,
-            algorithms=[settings.jwt_algorithm],
+            key.verifying_key,
+            algorithms=[key.algorithm],
         )
         return payload
     except jwt.ExpiredSignatureError:
@@ -64,3 +92,41 @@ def decode_jwt_token(token: str) -> Optional[dict]:
         return None
 
 
+def _token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def verify_jwt_token_cached(token: str) -> Optional[dict]:
+    """
+    Validate a JWT token, reusing claims verified earlier.
+
+    A token's claims stay cached until its ``exp`` (or the cache TTL, if
+    sooner), so repeat requests skip signature verification and parsing.
+    The returned dict is shared; callers must not modify it.
+
+    Args:
+        token: JWT token string
+
+    Returns:
+        Decoded payload dictionary or None if invalid
+    """
+    digest = _token_digest(token)
+    claims = _claims_cache.get(digest)
+    if claims is not None:
+        return claims
+
+    claims = decode_jwt_token(token)
+    if claims is not None:
+        remaining = claims.get("exp", 0) - time.time()
+        _claims_cache.set(digest, claims, ttl=min(remaining, settings.jwt_cache_ttl_seconds))
+    return claims
+
+
+def forget_jwt_token(token: str) -> None:
+    """Drop a token's cached claims so the next use is verified again."""
+    _claims_cache.pop(_token_digest(token))
+
+
+def jwt_claims_cache() -> TTLCache:
+    """Return the verified-claims cache (for stats and tests)."""
+    return _claims_cache
@@ -0,0 +1,264 @@
+"""
+Envelope encryption of stored ML-KEM private keys under a server KEK.
+
+The key-encryption key (KEK) file lists every KEK blobs may be unwrapped
+with and names the one new blobs are wrapped with::
+
+    {"active": "2026-10", "keys": {"2026-10": "<base64 of 32 bytes>"}}
+
+Each user's wrapping key is derived from the KEK with HKDF-SHA256 over the
+user ID, and the private key is sealed with AES-256-GCM using the user ID
+as associated data, so a blob copied onto another user's row fails to
+unwrap. A wrapped blob is::
+
+    b"PQK1" || len(kid) (1 byte) || kid || nonce (12 bytes) || ciphertext+tag
+
+Blobs without the prefix are raw keys stored before wrapping existed (or
+while no KEK is configured); they are used as-is until ``rewrap`` runs
+(see ``kek_cli``).
+
+Unwrapped keys are kept in a bounded TTL cache as ``bytearray`` values and
+zeroed when they leave it, so hot users skip the KDF and decrypt. Callers
+lease a key for the length of a ``with`` block; an entry evicted while
+leased is zeroed when its last lease ends rather than under the caller.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, Union
+from uuid import UUID
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from cache import CacheStats, TTLCache
+from config import get_settings
+
+settings = get_settings()
+
+WRAPPED_PREFIX = b"PQK1"
+KEK_SIZE = 32
+NONCE_SIZE = 12
+
+# Domain separation label for per-user wrapping keys
+WRAP_KEY_LABEL = b"pqc-messenger/private-key-wrap/v1"
+
+
+class PrivateKeyUnwrapError(ValueError):
+    """Raised when a stored private key cannot be unwrapped with the configured KEKs."""
+
+
+class KekRing(NamedTuple):
+    """Loaded KEKs by key ID, plus the one used for new blobs."""
+
+    keys: dict[str, bytes]
+    active: str
+
+
+def load_kek_file(path: Union[str, Path]) -> KekRing:
+    """
+    Load a KEK file.
+
+    Raises:
+        ValueError: If a key has the wrong size or the active key is missing
+    """
+    data = json.loads(Path(path).read_text())
+    keys = {kid: base64.b64decode(value) for kid, value in data.get("keys", {}).items()}
+    for kid, key in keys.items():
+        if len(key) != KEK_SIZE or len(kid.encode()) > 255:
+            raise ValueError(f"Invalid KEK {kid!r}")
+    active = data.get("active")
+    if active not in keys:
+        raise ValueError(f"Active KEK {active!r} is not in {path}")
+    return KekRing(keys, active)
+
+
+@lru_cache
+def get_kek_ring() -> Optional[KekRing]:
+    """Return the configured KEKs, or None when private keys are stored raw."""
+    if not settings.private_key_kek_file:
+        return None
+    return load_kek_file(settings.private_key_kek_file)
+
+
+def _wrapping_key(kek: bytes, user_id: UUID) -> AESGCM:
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=KEK_SIZE,
+        salt=None,
+        info=WRAP_KEY_LABEL + user_id.bytes,
+    )
+    return AESGCM(hkdf.derive(kek))
+
+
+def is_wrapped(blob: bytes) -> bool:
+    """Return True if ``blob`` was produced by ``wrap_private_key``."""
+    return bytes(blob[: len(WRAPPED_PREFIX)]) == WRAPPED_PREFIX
+
+
+def wrapped_kid(blob: bytes) -> Optional[str]:
+    """Return the KEK ID a blob is wrapped under, or None for raw keys."""
+    if not is_wrapped(blob):
+        return None
+    length = blob[len(WRAPPED_PREFIX)]
+    start = len(WRAPPED_PREFIX) + 1
+    return bytes(blob[start : start + length]).decode()
+
+
+def wrap_private_key(user_id: UUID, private_key: bytes) -> bytes:
+    """Seal a private key under the active KEK; returned unchanged if none is configured."""
+    ring = get_kek_ring()
+    if ring is None:
+        return bytes(private_key)
+    kid = ring.active.encode()
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = _wrapping_key(ring.keys[ring.active], user_id).encrypt(
+        nonce, private_key, user_id.bytes
+    )
+    return WRAPPED_PREFIX + bytes([len(kid)]) + kid + nonce + ciphertext
+
+
+def _unwrap(user_id: UUID, blob: bytes) -> bytearray:
+    ring = get_kek_ring()
+    kid = wrapped_kid(blob)
+    if ring is None or kid not in ring.keys:
+        raise PrivateKeyUnwrapError(f"Private key is wrapped under unknown KEK {kid!r}")
+    offset = len(WRAPPED_PREFIX) + 1 + len(kid.encode())
+    nonce = blob[offset : offset + NONCE_SIZE]
+    try:
+        plaintext = _wrapping_key(ring.keys[kid], user_id).decrypt(
+            nonce, blob[offset + NONCE_SIZE :], user_id.bytes
+        )
+    except InvalidTag:
+        raise PrivateKeyUnwrapError("Private key failed to unwrap for this user") from None
+    return bytearray(plaintext)
+
+
+def rewrap_private_key(user_id: UUID, blob: bytes) -> Optional[bytes]:
+    """
+    Return ``blob`` wrapped under the active KEK, wrapping raw keys as well.
+
+    Bypasses the unwrapped-key cache, since rewrapping touches every key once.
+
+    Returns:
+        The new blob, or None if ``blob`` is already under the active KEK
+
+    Raises:
+        ValueError: If no KEK is configured
+        PrivateKeyUnwrapError: If the blob does not unwrap
+    """
+    ring = get_kek_ring()
+    if ring is None:
+        raise ValueError("PRIVATE_KEY_KEK_FILE is not set")
+    if wrapped_kid(blob) == ring.active:
+        return None
+    if not is_wrapped(blob):
+        return wrap_private_key(user_id, blob)
+    raw = _unwrap(user_id, blob)
+    try:
+        return wrap_private_key(user_id, raw)
+    finally:
+        raw[:] = bytes(len(raw))
+
+
+class _CachedKey:
+    """Unwrapped key plus how many callers are using it."""
+
+    __slots__ = ("key", "leases", "evicted")
+
+    def __init__(self, key: bytearray):
+        self.key = key
+        self.leases = 0
+        self.evicted = False
+
+
+# Guards lease counts and eviction flags of every cached key
+_lease_lock = threading.Lock()
+
+
+def _wipe(entry: _CachedKey) -> None:
+    entry.key[:] = bytes(len(entry.key))
+
+
+def _zeroize(_, entry: _CachedKey) -> None:
+    with _lease_lock:
+        entry.evicted = True
+        if entry.leases:
+            return  # The last lease wipes it
+    _wipe(entry)
+
+
+def _lease(entry: Optional[_CachedKey]) -> Optional[_CachedKey]:
+    """Take a lease on a cached entry, or return None if it was already evicted."""
+    if entry is None:
+        return None
+    with _lease_lock:
+        if entry.evicted:
+            return None
+        entry.leases += 1
+    return entry
+
+
+def _release(entry: _CachedKey) -> None:
+    with _lease_lock:
+        entry.leases -= 1
+        wipe = entry.evicted and entry.leases == 0
+    if wipe:
+        _wipe(entry)
+
+
+_unwrapped_keys: TTLCache[tuple[UUID, bytes], _CachedKey] = TTLCache(
+    maxsize=settings.private_key_cache_size,
+    ttl=settings.private_key_cache_ttl_seconds,
+    on_evict=_zeroize,
+)
+# Serializes misses, so concurrent logins for one user unwrap its key once
+_unwrap_lock = threading.Lock()
+
+
+@contextmanager
+def unwrap_private_key(user_id: UUID, blob: bytes) -> Iterator[Union[bytes, bytearray]]:
+    """
+    Lease the raw private key stored in ``blob``, from the cache when possible.
+
+    The key stays intact until the ``with`` block ends, even if the cache
+    evicts it meanwhile; do not keep a reference past the block.
+
+    Raises:
+        PrivateKeyUnwrapError: If the blob is wrapped under an unknown KEK,
+            is corrupt or belongs to another user
+    """
+    if not is_wrapped(blob):
+        yield blob
+        return
+    cache_key = (user_id, hashlib.sha256(blob).digest())
+    entry = _lease(_unwrapped_keys.get(cache_key))
+    if entry is None:
+        with _unwrap_lock:
+            entry = _lease(_unwrapped_keys.get(cache_key))
+            if entry is None:
+                entry = _CachedKey(_unwrap(user_id, blob))
+                entry.leases = 1
+                _unwrapped_keys.set(cache_key, entry)
+    try:
+        yield entry.key
+    finally:
+        _release(entry)
+
+
+def private_key_cache_stats() -> CacheStats:
+    """Return counters for the unwrapped private key cache."""
+    return _unwrapped_keys.stats()
+
+
+def clear_private_key_cache() -> None:
+    """Zero and drop every cached private key."""
+    _unwrapped_keys.clear()
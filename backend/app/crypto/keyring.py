@@ -0,0 +1,277 @@
+"""
+JWT signing keyring with key IDs, EdDSA and ML-DSA support.
+
+A keyring file lists every key tokens may be verified with and names the
+one new tokens are signed with::
+
+    {
+      "active": "2026-10-ed25519",
+      "keys": [
+        {"kid": "2026-10-ed25519", "alg": "EdDSA",
+         "private_key": "<base64>", "public_key": "<base64>"},
+        {"kid": "2026-04-hs256", "alg": "HS256", "secret": "<base64>"}
+      ]
+    }
+
+Tokens carry the signing key's ``kid`` header, so rotating means adding a
+key, making it active, and removing the old one once its tokens expire.
+Asymmetric keys may be listed without ``private_key``; services that only
+verify tokens load such a public keyring (see ``export-public`` below).
+
+Usage (from backend/app):
+    python -m crypto.keyring generate --file keyring.json --alg ML-DSA-65 --kid k2 --activate
+    python -m crypto.keyring export-public --file keyring.json > public-keyring.json
+"""
+
+import argparse
+import base64
+import json
+import secrets
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import jwt
+import oqs
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey,
+)
+from jwt.algorithms import Algorithm
+from jwt.exceptions import InvalidKeyError
+
+from config import get_settings
+from crypto.secret_files import write_secret_file
+
+settings = get_settings()
+
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+ML_DSA_ALGORITHMS = ("ML-DSA-44", "ML-DSA-65", "ML-DSA-87")
+
+
+class MLDSAAlgorithm(Algorithm):
+    """PyJWT algorithm signing with ML-DSA (Dilithium) via liboqs."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def prepare_key(self, key: bytes) -> bytes:
+        return bytes(key)
+
+    def sign(self, msg: bytes, key: bytes) -> bytes:
+        with oqs.Signature(self.name, key) as signer:
+            return signer.sign(msg)
+
+    def verify(self, msg: bytes, key: bytes, sig: bytes) -> bool:
+        with oqs.Signature(self.name) as verifier:
+            return verifier.verify(msg, sig, key)
+
+    # Keys are raw liboqs bytes with no registered JWK form; they are
+    # distributed as keyring files instead
+    @staticmethod
+    def to_jwk(key_obj, as_dict: bool = False):
+        raise InvalidKeyError("ML-DSA keys have no JWK representation; use a keyring file")
+
+    @staticmethod
+    def from_jwk(jwk):
+        raise InvalidKeyError("ML-DSA keys have no JWK representation; use a keyring file")
+
+
+# Only the ML-DSA variants this liboqs build provides can be used
+ENABLED_ML_DSA_ALGORITHMS = tuple(
+    name for name in ML_DSA_ALGORITHMS if name in oqs.get_enabled_sig_mechanisms()
+)
+for _name in ENABLED_ML_DSA_ALGORITHMS:
+    jwt.register_algorithm(_name, MLDSAAlgorithm(_name))
+
+
+class JWTKey(NamedTuple):
+    """One keyring entry; ``signing_key`` is None for verify-only keys."""
+
+    kid: Optional[str]
+    algorithm: str
+    signing_key: Any
+    verifying_key: Any
+
+
+class Keyring:
+    """
+    Preloaded map of key ID to key, plus the active signing key.
+
+    ``fallback`` verifies tokens without a ``kid`` header; it is only set
+    when no keyring file is configured, so tokens issued before keyrings
+    existed stay valid.
+    """
+
+    def __init__(
+        self,
+        keys: dict[str, JWTKey],
+        active_kid: Optional[str],
+        fallback: Optional[JWTKey] = None,
+    ):
+        self._keys = keys
+        self._active_kid = active_kid
+        self._fallback = fallback
+
+    @property
+    def active(self) -> JWTKey:
+        """
+        Return the key new tokens are signed with.
+
+        Raises:
+            RuntimeError: If the keyring has no active signing key
+        """
+        key = self._keys.get(self._active_kid) if self._active_kid else self._fallback
+        if key is None or key.signing_key is None:
+            raise RuntimeError("JWT keyring has no active signing key")
+        return key
+
+    def resolve(self, kid: Optional[str]) -> Optional[JWTKey]:
+        """Return the key for a token's ``kid`` header, or None if unknown."""
+        if kid is None:
+            return self._fallback
+        return self._keys.get(kid)
+
+    def kids(self) -> list[str]:
+        return sorted(self._keys)
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.b64decode(value)
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.b64encode(value).decode("ascii")
+
+
+def _load_entry(entry: dict) -> JWTKey:
+    """
+    Build a key from its keyring file entry.
+
+    Raises:
+        ValueError: If the algorithm is unsupported
+    """
+    kid, algorithm = entry["kid"], entry["alg"]
+    if algorithm in HMAC_ALGORITHMS:
+        secret = _b64decode(entry["secret"])
+        return JWTKey(kid, algorithm, secret, secret)
+
+    private_key = _b64decode(entry["private_key"]) if entry.get("private_key") else None
+    public_key = _b64decode(entry["public_key"])
+    if algorithm == "EdDSA":
+        return JWTKey(
+            kid,
+            algorithm,
+            Ed25519PrivateKey.from_private_bytes(private_key) if private_key else None,
+            Ed25519PublicKey.from_public_bytes(public_key),
+        )
+    if algorithm in ML_DSA_ALGORITHMS:
+        if algorithm not in ENABLED_ML_DSA_ALGORITHMS:
+            raise ValueError(f"{algorithm} is not enabled in liboqs")
+        return JWTKey(kid, algorithm, private_key, public_key)
+    raise ValueError(f"Unsupported JWT algorithm {algorithm!r} for key {kid!r}")
+
+
+def load_keyring_file(path: str | Path) -> Keyring:
+    """
+    Load a keyring file.
+
+    Raises:
+        ValueError: If an entry is invalid or the active key is not listed
+    """
+    data = json.loads(Path(path).read_text())
+    keys = {}
+    for entry in data.get("keys", []):
+        key = _load_entry(entry)
+        keys[key.kid] = key
+    active_kid = data.get("active")
+    if active_kid is not None and active_kid not in keys:
+        raise ValueError(f"Active JWT key {active_kid!r} is not in the keyring")
+    return Keyring(keys, active_kid)
+
+
+@lru_cache
+def get_keyring() -> Keyring:
+    """Return the configured keyring, loading it on first use."""
+    if settings.jwt_keyring_file:
+        return load_keyring_file(settings.jwt_keyring_file)
+    secret = settings.jwt_secret_key
+    legacy = JWTKey(None, settings.jwt_algorithm, secret, secret)
+    return Keyring({}, None, fallback=legacy)
+
+
+def generate_key_entry(algorithm: str, kid: str) -> dict:
+    """
+    Generate a keyring file entry with fresh key material.
+
+    Raises:
+        ValueError: If the algorithm is unsupported
+    """
+    if algorithm in HMAC_ALGORITHMS:
+        return {"kid": kid, "alg": algorithm, "secret": _b64encode(secrets.token_bytes(64))}
+    if algorithm == "EdDSA":
+        private_key = Ed25519PrivateKey.generate()
+        return {
+            "kid": kid,
+            "alg": algorithm,
+            "private_key": _b64encode(private_key.private_bytes_raw()),
+            "public_key": _b64encode(private_key.public_key().public_bytes_raw()),
+        }
+    if algorithm in ML_DSA_ALGORITHMS:
+        with oqs.Signature(algorithm) as signer:
+            public_key = signer.generate_keypair()
+            private_key = signer.export_secret_key()
+        return {
+            "kid": kid,
+            "alg": algorithm,
+            "private_key": _b64encode(private_key),
+            "public_key": _b64encode(public_key),
+        }
+    raise ValueError(f"Unsupported JWT algorithm {algorithm!r}")
+
+
+def public_keyring(data: dict) -> dict:
+    """Strip private material, leaving a keyring that can only verify."""
+    keys = [
+        {k: v for k, v in entry.items() if k != "private_key"}
+        for entry in data.get("keys", [])
+        if entry["alg"] not in HMAC_ALGORITHMS
+    ]
+    return {"keys": keys}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage JWT keyring files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="add a new key to a keyring file")
+    generate.add_argument("--file", required=True)
+    generate.add_argument(
+        "--alg", required=True, choices=HMAC_ALGORITHMS + ("EdDSA",) + ML_DSA_ALGORITHMS
+    )
+    generate.add_argument("--kid", required=True)
+    generate.add_argument("--activate", action="store_true", help="sign new tokens with this key")
+
+    export = commands.add_parser("export-public", help="print the verify-only keyring")
+    export.add_argument("--file", required=True)
+
+    args = parser.parse_args(argv)
+    path = Path(args.file)
+    data = json.loads(path.read_text()) if path.exists() else {"keys": []}
+
+    if args.command == "export-public":
+        json.dump(public_keyring(data), sys.stdout, indent=2)
+        print()
+        return
+
+    if any(entry["kid"] == args.kid for entry in data["keys"]):
+        parser.error(f"kid {args.kid!r} already exists in {path}")
+    data["keys"].append(generate_key_entry(args.alg, args.kid))
+    if args.activate:
+        data["active"] = args.kid
+    write_secret_file(path, json.dumps(data, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,47 @@
 """Password hashing utilities using Argon2id."""
 
+import asyncio
+import secrets
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, TypeVar
+
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 
-_hasher = PasswordHasher()
+from config import get_settings
+from metrics import OPERATION_LATENCY, timed
+
+settings = get_settings()
+
+_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost,
+    parallelism=settings.argon2_parallelism,
+)
+
+T = TypeVar("T")
+
+
+class HashingOverloadedError(RuntimeError):
+    """Raised when the hashing executor has no room for another job."""
+
+
+class PasswordVerifyStats(NamedTuple):
+    """Counters for password verifications, real and dummy."""
+
+    verifies: int
+    dummy_verifies: int
+
+
+# Dedicated executor so Argon2id work never occupies Starlette's threadpool.
+# argon2-cffi releases the GIL while hashing, so threads scale with cores.
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+_in_flight = 0
+_verifies = 0
+_dummy_verifies = 0
 
 
 def hash_password(password: str) -> str:
@@ -11,8 +49,12 @@ def hash_password(password: str) -> str:
     return _hasher.hash(password)
 
 
+@timed(OPERATION_LATENCY, "verify_password")
 def verify_password(password: str, password_hash: str) -> bool:
     """Verify a password against an Argon2id hash."""
+    global _verifies
+    with _executor_lock:
+        _verifies += 1
     try:
         _hasher.verify(password_hash, password)
         return True
@@ -20,3 +62,127 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+@lru_cache(maxsize=1)
+def dummy_password_hash() -> str:
+    """Return a hash of a random password, made with the configured parameters."""
+    return hash_password(secrets.token_urlsafe(32))
+
+
+def _verify_dummy(password: str) -> None:
+    global _dummy_verifies
+    with _executor_lock:
+        _dummy_verifies += 1
+    verify_password(password, dummy_password_hash())
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """Return True if a hash was made with parameters other than the configured ones."""
+    return _hasher.check_needs_rehash(password_hash)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the hashing executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.password_hash_workers,
+                    thread_name_prefix="argon2",
+                )
+    return _executor
+
+
+def _release(_: Future) -> None:
+    global _in_flight
+    with _executor_lock:
+        _in_flight -= 1
+
+
+def _submit(fn: Callable[..., T], *args) -> "asyncio.Future[T]":
+    """
+    Schedule a hashing job, enforcing the configured queue-depth cap.
+
+    Raises:
+        HashingOverloadedError: If every worker is busy and the queue is full
+    """
+    global _in_flight
+    executor = _get_executor()
+    limit = settings.password_hash_workers + settings.password_hash_max_queue
+
+    with _executor_lock:
+        if _in_flight >= limit:
+            raise HashingOverloadedError(
+                f"Hashing queue full ({_in_flight} jobs in flight)"
+            )
+        _in_flight += 1
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        with _executor_lock:
+            _in_flight -= 1
+        raise
+
+    future.add_done_callback(_release)
+    return asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the bounded hashing executor.
+
+    Raises:
+        HashingOverloadedError: If the hashing queue is full
+    """
+    return await _submit(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """
+    Verify a password on the bounded hashing executor.
+
+    Raises:
+        HashingOverloadedError: If the hashing queue is full
+    """
+    return await _submit(verify_password, password, password_hash)
+
+
+async def verify_dummy_password_async(password: str) -> None:
+    """
+    Spend one verification on the dummy hash, as a login for an unknown email.
+
+    Runs on the same bounded executor as real verifications, so unknown and
+    known emails take the same time and queue the same way.
+
+    Raises:
+        HashingOverloadedError: If the hashing queue is full
+    """
+    await _submit(_verify_dummy, password)
+
+
+def password_verify_stats() -> PasswordVerifyStats:
+    """Return how many verifications ran, and how many of them were dummies."""
+    with _executor_lock:
+        return PasswordVerifyStats(verifies=_verifies, dummy_verifies=_dummy_verifies)
+
+
+def hashing_queue_depth() -> int:
+    """Return the number of hashing jobs waiting for a free worker."""
+    with _executor_lock:
+        return max(0, _in_flight - settings.password_hash_workers)
+
+
+def hashing_in_flight() -> int:
+    """Return the number of hashing jobs queued or running."""
+    with _executor_lock:
+        return _in_flight
+
+
+def shutdown_hashing_executor() -> None:
+    """Stop the hashing executor, waiting for running jobs to finish."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
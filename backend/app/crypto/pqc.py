@@ -1,17 +1,31 @@
 """Post-quantum cryptography service wrapper for ML-KEM operations using liboqs."""
 
 import base64
+import ctypes
+import hashlib
 import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import NamedTuple, Optional
+from typing import Callable, Iterator, NamedTuple, Optional, Sequence, Union
 
 import oqs
 
+from config import get_settings
+from metrics import OPERATION_LATENCY, timed
+
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 # ML-KEM algorithm candidates (Kyber variants)
 ML_KEM_CANDIDATES = ("ML-KEM-768", "Kyber768", "ML-KEM-1024", "Kyber1024")
 
+# Domain separation label for binding a KEM shared secret into a session
+SESSION_BINDING_LABEL = b"pqc-messenger/session-binding/v1"
+
 
 class KeyPair(NamedTuple):
     """Container for public and private key pair."""
@@ -27,33 +41,285 @@ class EncapsulationResult(NamedTuple):
     ciphertext: bytes
 
 
+class BatchResult(NamedTuple):
+    """Outcome of one item in a batch KEM operation; exactly one field is set."""
+
+    value: Optional[Union[EncapsulationResult, bytes]]
+    error: Optional[str]
+
+
+class KemMechanism(NamedTuple):
+    """Sizes and security level of one enabled KEM, read from liboqs once."""
+
+    name: str
+    public_key_size: int
+    secret_key_size: int
+    ciphertext_size: int
+    shared_secret_size: int
+    nist_level: int
+
+
+class KemPoolStats(NamedTuple):
+    """Snapshot of the KEM context pool for one algorithm."""
+
+    algorithm: str
+    idle: int
+    in_use: int
+    created: int
+    checkouts: int
+
+
+class _KemContextPool:
+    """
+    Thread-safe pool of reusable ``oqs.KeyEncapsulation`` contexts.
+
+    Contexts are keyed per algorithm and handed out exclusively, so callers
+    never share a context. Any secret key loaded into a context is wiped
+    before the context goes back to the pool.
+    """
+
+    def __init__(self, max_idle: int):
+        self._max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: dict[str, list[oqs.KeyEncapsulation]] = defaultdict(list)
+        self._in_use: dict[str, int] = defaultdict(int)
+        self._created: dict[str, int] = defaultdict(int)
+        self._checkouts: dict[str, int] = defaultdict(int)
+
+    @contextmanager
+    def checkout(self, algorithm: str) -> Iterator[oqs.KeyEncapsulation]:
+        """Borrow a context for ``algorithm``, creating one if none is idle."""
+        with self._lock:
+            idle = self._idle[algorithm]
+            kem = idle.pop() if idle else None
+            self._in_use[algorithm] += 1
+            self._checkouts[algorithm] += 1
+
+        try:
+            if kem is None:
+                kem = oqs.KeyEncapsulation(algorithm)
+                with self._lock:
+                    self._created[algorithm] += 1
+        except BaseException:
+            with self._lock:
+                self._in_use[algorithm] -= 1
+            raise
+
+        reusable = False
+        try:
+            yield kem
+            reusable = True
+        finally:
+            _clear_secret_key(kem)
+            with self._lock:
+                self._in_use[algorithm] -= 1
+                # Contexts that saw an error are dropped rather than reused
+                if reusable and len(self._idle[algorithm]) < self._max_idle:
+                    self._idle[algorithm].append(kem)
+                    kem = None
+            if kem is not None:
+                kem.free()
+
+    def stats(self) -> list[KemPoolStats]:
+        """Return per-algorithm pool counters."""
+        with self._lock:
+            algorithms = sorted(set(self._idle) | set(self._checkouts))
+            return [
+                KemPoolStats(
+                    algorithm=algorithm,
+                    idle=len(self._idle[algorithm]),
+                    in_use=self._in_use[algorithm],
+                    created=self._created[algorithm],
+                    checkouts=self._checkouts[algorithm],
+                )
+                for algorithm in algorithms
+            ]
+
+    def clear(self) -> None:
+        """Free every idle context."""
+        with self._lock:
+            idle = [kem for contexts in self._idle.values() for kem in contexts]
+            self._idle.clear()
+        for kem in idle:
+            kem.free()
+
+
+_kem_pool = _KemContextPool(max_idle=settings.kem_pool_max_idle)
+
+# Worker pool for large batch operations; liboqs calls release the GIL.
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+
+def _load_secret_key(kem: oqs.KeyEncapsulation, private_key: Union[bytes, bytearray]) -> None:
+    """
+    Load a secret key into a pooled context without re-instantiating it.
+
+    The key is copied straight into the context's buffer, so a ``bytearray``
+    (e.g. from the unwrapped key cache) leaves no intermediate copy behind.
+    """
+    length = kem.details["length_secret_key"]
+    secret_key = ctypes.create_string_buffer(length)
+    source = (
+        (ctypes.c_char * len(private_key)).from_buffer(private_key)
+        if isinstance(private_key, bytearray)
+        else private_key
+    )
+    ctypes.memmove(secret_key, source, min(len(private_key), length))
+    kem.secret_key = secret_key
+
+
+def _clear_secret_key(kem: oqs.KeyEncapsulation) -> None:
+    """Zero any secret key held by a context before it is reused."""
+    secret_key = getattr(kem, "secret_key", None)
+    if secret_key:
+        ctypes.memset(secret_key, 0, ctypes.sizeof(secret_key))
+
+
+def kem_pool_stats() -> list[KemPoolStats]:
+    """Return usage counters for the shared KEM context pool."""
+    return _kem_pool.stats()
+
+
+def clear_kem_pool() -> None:
+    """Release all idle KEM contexts held by the shared pool."""
+    _kem_pool.clear()
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """Return the batch worker pool, creating it on first use."""
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=settings.kem_batch_workers,
+                    thread_name_prefix="kem-batch",
+                )
+    return _batch_executor
+
+
+def shutdown_kem_batch_executor() -> None:
+    """Stop the batch worker pool, waiting for running chunks to finish."""
+    global _batch_executor
+    with _batch_executor_lock:
+        executor, _batch_executor = _batch_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class KemRegistry:
+    """
+    Metadata for every enabled ML-KEM mechanism, plus the default for new keys.
+
+    Keys are tagged with their algorithm, so operations look the mechanism
+    up here instead of probing liboqs, and reject inputs of the wrong size
+    before they reach a liboqs call.
+    """
+
+    def __init__(self, mechanisms: dict[str, KemMechanism], default: str):
+        self._mechanisms = mechanisms
+        self.default = default
+
+    def get(self, algorithm: Optional[str] = None) -> KemMechanism:
+        """
+        Return the mechanism for ``algorithm`` (the default if None).
+
+        Raises:
+            ValueError: If the algorithm is not an enabled ML-KEM mechanism
+        """
+        mechanism = self._mechanisms.get(algorithm or self.default)
+        if mechanism is None:
+            raise ValueError(f"Unsupported KEM algorithm {algorithm!r}")
+        return mechanism
+
+    def names(self) -> list[str]:
+        return list(self._mechanisms)
+
+
 @lru_cache(maxsize=1)
-def _resolve_kem_algorithm() -> str:
-    """Pick the first supported ML-KEM algorithm from candidates."""
+def get_kem_registry() -> KemRegistry:
+    """
+    Load every enabled ML-KEM candidate's metadata once.
+
+    The context opened to read each mechanism's sizes goes back to the pool,
+    so the first real operation does not pay for it.
+
+    Raises:
+        RuntimeError: If liboqs offers no ML-KEM candidate, or the configured
+            default is not among them
+    """
     available = set(oqs.get_enabled_kem_mechanisms())
     logger.info(f"Available KEM mechanisms: {sorted(available)}")
-    
+
+    mechanisms = {}
     for candidate in ML_KEM_CANDIDATES:
-        if candidate in available:
-            logger.info(f"Selected KEM algorithm: {candidate}")
-            return candidate
-    
-    raise RuntimeError(
-        f"No supported ML-KEM implementations found. Available: {sorted(available)}"
-    )
+        if candidate not in available:
+            continue
+        with _kem_pool.checkout(candidate) as kem:
+            details = kem.details
+        mechanisms[candidate] = KemMechanism(
+            name=candidate,
+            public_key_size=details["length_public_key"],
+            secret_key_size=details["length_secret_key"],
+            ciphertext_size=details["length_ciphertext"],
+            shared_secret_size=details["length_shared_secret"],
+            nist_level=details["claimed_nist_level"],
+        )
+    if not mechanisms:
+        raise RuntimeError(
+            f"No supported ML-KEM implementations found. Available: {sorted(available)}"
+        )
+
+    default = settings.pqc_kem_algorithm or next(iter(mechanisms))
+    if default not in mechanisms:
+        raise RuntimeError(
+            f"PQC_KEM_ALGORITHM {default!r} is not enabled. Available: {list(mechanisms)}"
+        )
+    logger.info(f"Selected KEM algorithm: {default} (enabled: {list(mechanisms)})")
+    return KemRegistry(mechanisms, default)
+
+
+def _resolve_kem_algorithm() -> str:
+    """Return the algorithm new keys are generated with."""
+    return get_kem_registry().default
+
+
+def _check_size(what: str, value: bytes, expected: int) -> None:
+    if len(value) != expected:
+        raise ValueError(f"Invalid {what} length {len(value)}, expected {expected}")
+
+
+def check_public_key(public_key: bytes, algorithm: Optional[str] = None) -> str:
+    """
+    Check a client-generated public key against its algorithm's key size.
+
+    Returns:
+        The resolved algorithm name (registry default if None)
+
+    Raises:
+        ValueError: If the algorithm is unknown or the key has the wrong size
+    """
+    mechanism = get_kem_registry().get(algorithm)
+    _check_size("public key", public_key, mechanism.public_key_size)
+    return mechanism.name
 
 
-def generate_kem_keypair() -> tuple[KeyPair, str]:
+@timed(OPERATION_LATENCY, "generate_kem_keypair")
+def generate_kem_keypair(algorithm: Optional[str] = None) -> tuple[KeyPair, str]:
     """
     Generate a new ML-KEM key pair.
     
+    Args:
+        algorithm: KEM algorithm name (registry default if None)
+    
     Returns:
         Tuple of (KeyPair(public_key, private_key), algorithm_name)
     """
-    algorithm = _resolve_kem_algorithm()
+    algorithm = get_kem_registry().get(algorithm).name
     
     try:
-        with oqs.KeyEncapsulation(algorithm) as kem:
+        with _kem_pool.checkout(algorithm) as kem:
             public_key = kem.generate_keypair()
             private_key = kem.export_secret_key()
             
@@ -68,22 +334,28 @@ def generate_kem_keypair() -> tuple[KeyPair, str]:
         raise RuntimeError(f"Key generation failed: {e}") from e
 
 
+@timed(OPERATION_LATENCY, "encapsulate")
 def encapsulate(public_key: bytes, algorithm: Optional[str] = None) -> EncapsulationResult:
     """
     Encapsulate a shared secret using the recipient's public key.
     
     Args:
         public_key: Recipient's public key bytes
-        algorithm: KEM algorithm name (auto-detected if None)
+        algorithm: KEM algorithm name (registry default if None)
     
     Returns:
         EncapsulationResult(shared_secret, ciphertext)
+
+    Raises:
+        ValueError: If the algorithm is unknown or the key has the wrong size
+        RuntimeError: If liboqs fails
     """
-    if algorithm is None:
-        algorithm = _resolve_kem_algorithm()
+    mechanism = get_kem_registry().get(algorithm)
+    algorithm = mechanism.name
+    _check_size("public key", public_key, mechanism.public_key_size)
     
     try:
-        with oqs.KeyEncapsulation(algorithm) as kem:
+        with _kem_pool.checkout(algorithm) as kem:
             ciphertext, shared_secret = kem.encap_secret(public_key)
             
             logger.debug(
@@ -99,6 +371,7 @@ def encapsulate(public_key: bytes, algorithm: Optional[str] = None) -> Encapsula
         raise RuntimeError(f"Encapsulation failed: {e}") from e
 
 
+@timed(OPERATION_LATENCY, "decapsulate")
 def decapsulate(
     private_key: bytes, ciphertext: bytes, algorithm: Optional[str] = None
 ) -> bytes:
@@ -108,16 +381,23 @@ def decapsulate(
     Args:
         private_key: Recipient's private key bytes
         ciphertext: Encapsulated ciphertext from sender
-        algorithm: KEM algorithm name (auto-detected if None)
+        algorithm: KEM algorithm name (registry default if None)
     
     Returns:
         Shared secret bytes
+
+    Raises:
+        ValueError: If the algorithm is unknown or an input has the wrong size
+        RuntimeError: If liboqs fails
     """
-    if algorithm is None:
-        algorithm = _resolve_kem_algorithm()
+    mechanism = get_kem_registry().get(algorithm)
+    algorithm = mechanism.name
+    _check_size("private key", private_key, mechanism.secret_key_size)
+    _check_size("ciphertext", ciphertext, mechanism.ciphertext_size)
     
     try:
-        with oqs.KeyEncapsulation(algorithm, private_key) as kem:
+        with _kem_pool.checkout(algorithm) as kem:
+            _load_secret_key(kem, private_key)
             shared_secret = kem.decap_secret(ciphertext)
             
             logger.debug(
@@ -131,6 +411,17 @@ def decapsulate(
         raise RuntimeError(f"Decapsulation failed: {e}") from e
 
 
+def derive_session_binding(shared_secret: bytes) -> str:
+    """
+    Derive a public session-binding value from a KEM shared secret.
+
+    The value proves possession of the shared secret without revealing it,
+    so a client can confirm the server decapsulated its ciphertext.
+    """
+    digest = hashlib.sha256(SESSION_BINDING_LABEL + shared_secret).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
 def encode_key_base64(key: bytes) -> str:
     """Encode a key as base64 string."""
     return base64.b64encode(key).decode("ascii")
@@ -141,3 +432,125 @@ def decode_key_base64(key_b64: str) -> bytes:
     return base64.b64decode(key_b64)
 
 
+def _run_batch(
+    items: Sequence[bytes],
+    run_chunk: Callable[[Sequence[bytes]], list[BatchResult]],
+    parallel: Optional[bool],
+) -> list[BatchResult]:
+    """Run ``run_chunk`` over ``items``, optionally split across batch workers."""
+    if parallel is None:
+        parallel = len(items) >= settings.kem_batch_parallel_threshold
+    workers = settings.kem_batch_workers
+    if not parallel or workers <= 1 or len(items) < 2:
+        return run_chunk(items)
+
+    chunk_size = -(-len(items) // workers)
+    chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+    results: list[BatchResult] = []
+    # map() yields chunk results in submission order, preserving input order
+    for chunk_results in _get_batch_executor().map(run_chunk, chunks):
+        results.extend(chunk_results)
+    return results
+
+
+def encapsulate_many(
+    public_keys: Sequence[bytes],
+    algorithm: Optional[str] = None,
+    parallel: Optional[bool] = None,
+) -> list[BatchResult]:
+    """
+    Encapsulate a shared secret for each recipient public key.
+
+    The algorithm is resolved once and each chunk reuses a single pooled
+    context. A failing key yields an error entry instead of aborting the batch.
+
+    Args:
+        public_keys: Recipient public keys
+        algorithm: KEM algorithm name (registry default if None)
+        parallel: Spread work across batch workers (auto by batch size if None)
+
+    Returns:
+        BatchResult per key, in input order, with EncapsulationResult values
+
+    Raises:
+        ValueError: If the algorithm is unknown
+    """
+    mechanism = get_kem_registry().get(algorithm)
+    algorithm = mechanism.name
+    expected = mechanism.public_key_size
+
+    def run_chunk(chunk: Sequence[bytes]) -> list[BatchResult]:
+        results = []
+        with _kem_pool.checkout(algorithm) as kem:
+            for public_key in chunk:
+                if len(public_key) != expected:
+                    error = f"Invalid public key length {len(public_key)}, expected {expected}"
+                    results.append(BatchResult(None, error))
+                    continue
+                try:
+                    ciphertext, shared_secret = kem.encap_secret(public_key)
+                except Exception as e:
+                    results.append(BatchResult(None, f"Encapsulation failed: {e}"))
+                    continue
+                value = EncapsulationResult(shared_secret=shared_secret, ciphertext=ciphertext)
+                results.append(BatchResult(value, None))
+        return results
+
+    results = _run_batch(public_keys, run_chunk, parallel)
+    failed = sum(1 for result in results if result.error is not None)
+    logger.debug(
+        f"Batch encapsulated {len(results) - failed}/{len(results)} secrets using {algorithm}"
+    )
+    return results
+
+
+def decapsulate_many(
+    private_key: bytes,
+    ciphertexts: Sequence[bytes],
+    algorithm: Optional[str] = None,
+    parallel: Optional[bool] = None,
+) -> list[BatchResult]:
+    """
+    Decapsulate many ciphertexts addressed to the same private key.
+
+    The private key is loaded once per chunk into a pooled context. A failing
+    ciphertext yields an error entry instead of aborting the batch.
+
+    Args:
+        private_key: Recipient's private key bytes
+        ciphertexts: Encapsulated ciphertexts from senders
+        algorithm: KEM algorithm name (registry default if None)
+        parallel: Spread work across batch workers (auto by batch size if None)
+
+    Returns:
+        BatchResult per ciphertext, in input order, with shared secret values
+
+    Raises:
+        ValueError: If the algorithm is unknown or the private key has the wrong size
+    """
+    mechanism = get_kem_registry().get(algorithm)
+    algorithm = mechanism.name
+    _check_size("private key", private_key, mechanism.secret_key_size)
+    expected = mechanism.ciphertext_size
+
+    def run_chunk(chunk: Sequence[bytes]) -> list[BatchResult]:
+        results = []
+        with _kem_pool.checkout(algorithm) as kem:
+            _load_secret_key(kem, private_key)
+            for ciphertext in chunk:
+                if len(ciphertext) != expected:
+                    error = f"Invalid ciphertext length {len(ciphertext)}, expected {expected}"
+                    results.append(BatchResult(None, error))
+                    continue
+                try:
+                    results.append(BatchResult(kem.decap_secret(ciphertext), None))
+                except Exception as e:
+                    results.append(BatchResult(None, f"Decapsulation failed: {e}"))
+        return results
+
+    results = _run_batch(ciphertexts, run_chunk, parallel)
+    failed = sum(1 for result in results if result.error is not None)
+    logger.debug(
+        f"Batch decapsulated {len(results) - failed}/{len(results)} secrets using {algorithm}"
+    )
+    return results
@@ -0,0 +1,200 @@
+"""Background-filled reservoir of pre-generated ML-KEM keypairs."""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from typing import NamedTuple, Optional
+
+from config import get_settings
+from crypto.pqc import KeyPair, _resolve_kem_algorithm, generate_kem_keypair
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class ReservoirStats(NamedTuple):
+    """Snapshot of the keypair reservoir for one algorithm."""
+
+    algorithm: str
+    available: int
+    hits: int
+    misses: int
+    generated: int
+    refill_rate: float  # keypairs generated per second of refill work
+
+
+class KeypairReservoir:
+    """
+    Per-algorithm pool of fresh keypairs refilled by a worker thread.
+
+    Keypairs live only in process memory and are removed from the reservoir
+    when taken, so each one is handed out exactly once. When the reservoir
+    is empty, ``take`` generates a keypair inline and records a miss;
+    ``take_async`` does the same on a worker thread so the event loop is
+    never blocked by keygen.
+    """
+
+    def __init__(self, low_watermark: int, high_watermark: int):
+        self._low_watermark = low_watermark
+        self._high_watermark = max(high_watermark, low_watermark)
+        self._condition = threading.Condition()
+        self._keypairs: dict[str, deque[KeyPair]] = defaultdict(deque)
+        self._hits: dict[str, int] = defaultdict(int)
+        self._misses: dict[str, int] = defaultdict(int)
+        self._generated: dict[str, int] = defaultdict(int)
+        self._refill_seconds: dict[str, float] = defaultdict(float)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self, algorithms: Optional[list[str]] = None) -> None:
+        """Start the refill thread for ``algorithms`` (default algorithm if None)."""
+        with self._condition:
+            if self._thread is not None:
+                return
+            for algorithm in algorithms or [_resolve_kem_algorithm()]:
+                self._keypairs.setdefault(algorithm, deque())
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="kem-reservoir", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the refill thread and drop every unused keypair."""
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join()
+        with self._condition:
+            for keypairs in self._keypairs.values():
+                keypairs.clear()
+
+    def take(self, algorithm: Optional[str] = None) -> tuple[KeyPair, str]:
+        """
+        Remove and return a fresh keypair.
+
+        Returns:
+            Tuple of (KeyPair(public_key, private_key), algorithm_name)
+        """
+        keypair, algorithm = self._pop(algorithm)
+        if keypair is None:
+            return generate_kem_keypair(algorithm)
+        return keypair, algorithm
+
+    async def take_async(self, algorithm: Optional[str] = None) -> tuple[KeyPair, str]:
+        """Like ``take``, but generate on a worker thread when the reservoir is empty."""
+        keypair, algorithm = self._pop(algorithm)
+        if keypair is None:
+            return await asyncio.to_thread(generate_kem_keypair, algorithm)
+        return keypair, algorithm
+
+    def _pop(self, algorithm: Optional[str]) -> tuple[Optional[KeyPair], str]:
+        """Remove a pooled keypair without blocking, recording a hit or miss."""
+        if algorithm is None:
+            algorithm = _resolve_kem_algorithm()
+
+        with self._condition:
+            keypairs = self._keypairs.get(algorithm)
+            keypair = keypairs.popleft() if keypairs else None
+            if keypair is not None:
+                self._hits[algorithm] += 1
+            else:
+                self._misses[algorithm] += 1
+            if keypairs is not None and len(keypairs) < self._low_watermark:
+                self._condition.notify()
+        return keypair, algorithm
+
+    def stats(self) -> list[ReservoirStats]:
+        """Return per-algorithm reservoir counters."""
+        with self._condition:
+            algorithms = sorted(set(self._keypairs) | set(self._misses))
+            return [
+                ReservoirStats(
+                    algorithm=algorithm,
+                    available=len(self._keypairs.get(algorithm, ())),
+                    hits=self._hits[algorithm],
+                    misses=self._misses[algorithm],
+                    generated=self._generated[algorithm],
+                    refill_rate=(
+                        self._generated[algorithm] / self._refill_seconds[algorithm]
+                        if self._refill_seconds[algorithm]
+                        else 0.0
+                    ),
+                )
+                for algorithm in algorithms
+            ]
+
+    def _next_to_refill(self) -> Optional[str]:
+        """Return an algorithm below its low watermark, if any."""
+        for algorithm, keypairs in self._keypairs.items():
+            if len(keypairs) < self._low_watermark:
+                return algorithm
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                algorithm = self._next_to_refill()
+                while algorithm is None and not self._stopping:
+                    self._condition.wait()
+                    algorithm = self._next_to_refill()
+                if self._stopping:
+                    return
+
+            # Refill up to the high watermark, generating outside the lock
+            while True:
+                started = time.perf_counter()
+                try:
+                    keypair, _ = generate_kem_keypair(algorithm)
+                except RuntimeError as e:
+                    logger.error(f"Keypair reservoir refill failed for {algorithm}: {e}")
+                    time.sleep(1)
+                    break
+                elapsed = time.perf_counter() - started
+
+                with self._condition:
+                    if self._stopping:
+                        return
+                    keypairs = self._keypairs[algorithm]
+                    keypairs.append(keypair)
+                    self._generated[algorithm] += 1
+                    self._refill_seconds[algorithm] += elapsed
+                    if len(keypairs) >= self._high_watermark:
+                        break
+
+
+_reservoir = KeypairReservoir(
+    low_watermark=settings.kem_reservoir_low_watermark,
+    high_watermark=settings.kem_reservoir_high_watermark,
+)
+
+
+def start_keypair_reservoir() -> None:
+    """Start background keypair generation if enabled in settings."""
+    if settings.kem_reservoir_enabled:
+        _reservoir.start()
+
+
+def stop_keypair_reservoir() -> None:
+    """Stop background keypair generation and discard unused keypairs."""
+    _reservoir.stop()
+
+
+def take_kem_keypair(algorithm: Optional[str] = None) -> tuple[KeyPair, str]:
+    """Take a single-use keypair from the reservoir, generating one on a miss."""
+    return _reservoir.take(algorithm)
+
+
+async def take_kem_keypair_async(algorithm: Optional[str] = None) -> tuple[KeyPair, str]:
+    """Take a single-use keypair, generating one off the event loop on a miss."""
+    return await _reservoir.take_async(algorithm)
+
+
+def keypair_reservoir_stats() -> list[ReservoirStats]:
+    """Return hit/miss and refill counters for the shared reservoir."""
+    return _reservoir.stats()
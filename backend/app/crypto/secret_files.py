@@ -0,0 +1,26 @@
+"""Owner-only writes for files holding key material."""
+
+import os
+import secrets
+from pathlib import Path
+
+
+def write_secret_file(path: Path, text: str) -> None:
+    """
+    Atomically replace ``path`` with ``text``, readable by the owner only.
+
+    The content goes to a temp file created with mode 0600 in the same
+    directory, so the secret is never on disk with looser permissions, and
+    is then renamed over ``path``.
+    """
+    temp = path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+    fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "w") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
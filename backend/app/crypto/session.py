@@ -0,0 +1,322 @@
+"""
+Hybrid X25519 + ML-KEM session keys and AEAD message sealing.
+
+A session key is derived with HKDF-SHA256 from both an X25519 and an
+ML-KEM shared secret, so it stays secret unless both are broken. The HKDF
+info binds the X25519 ephemeral and recipient keys and a digest of the KEM
+ciphertext, so a swapped ciphertext derives a different key.
+
+Sealing uses ChaCha20-Poly1305 or AES-256-GCM with random 96-bit nonces.
+Derived keys are cached per (sender, recipient, key id), so follow-up
+messages skip both key exchanges. A key is retired after
+``SESSION_KEY_MAX_MESSAGES`` seals or ``SESSION_KEY_TTL_SECONDS``,
+whichever comes first, which keeps random nonces far from colliding.
+
+Inputs may be ``bytes``, ``bytearray`` or ``memoryview``; sealing writes
+the nonce and ciphertext into one preallocated buffer without copying the
+plaintext.
+"""
+
+import hashlib
+import os
+import threading
+from typing import NamedTuple, Optional, Union
+from uuid import UUID
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+from cache import CacheStats, TTLCache
+from config import get_settings
+from crypto.pqc import decapsulate, encapsulate, generate_kem_keypair
+
+settings = get_settings()
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Domain separation label for hybrid session keys
+SESSION_KEY_LABEL = b"pqc-messenger/hybrid-session/v1"
+
+KEY_SIZE = 32
+NONCE_SIZE = 12
+TAG_SIZE = 16
+X25519_KEY_SIZE = 32
+
+AEAD_ALGORITHMS = {
+    "ChaCha20-Poly1305": ChaCha20Poly1305,
+    "AES-256-GCM": AESGCM,
+}
+
+
+class HybridPublicKey(NamedTuple):
+    """Recipient public keys for both key exchanges."""
+
+    x25519: bytes
+    ml_kem: bytes
+
+
+class HybridPrivateKey(NamedTuple):
+    """Recipient private keys for both key exchanges."""
+
+    x25519: bytes
+    ml_kem: bytes
+
+
+class HybridKeyPair(NamedTuple):
+    """Hybrid keypair plus the ML-KEM algorithm it was generated for."""
+
+    public_key: HybridPublicKey
+    private_key: HybridPrivateKey
+    algorithm: str
+
+
+class HybridEncapsulation(NamedTuple):
+    """Session key plus what the recipient needs to derive it."""
+
+    session_key: bytes
+    ephemeral_public_key: bytes
+    kem_ciphertext: bytes
+
+
+class SealedMessage(NamedTuple):
+    """
+    Sealed payload and its key-exchange header.
+
+    ``sealed`` is the nonce followed by the AEAD ciphertext and tag. The
+    header repeats unchanged for every message sealed under one cached key.
+    """
+
+    ephemeral_public_key: bytes
+    kem_ciphertext: bytes
+    sealed: bytearray
+
+
+def generate_hybrid_keypair(algorithm: Optional[str] = None) -> HybridKeyPair:
+    """Generate an X25519 keypair and an ML-KEM keypair for a recipient."""
+    x25519 = X25519PrivateKey.generate()
+    kem_keypair, algorithm = generate_kem_keypair(algorithm)
+    return HybridKeyPair(
+        public_key=HybridPublicKey(
+            x25519.public_key().public_bytes_raw(), kem_keypair.public_key
+        ),
+        private_key=HybridPrivateKey(x25519.private_bytes_raw(), kem_keypair.private_key),
+        algorithm=algorithm,
+    )
+
+
+def derive_session_key(
+    x25519_secret: Buffer,
+    kem_secret: Buffer,
+    ephemeral_public_key: Buffer,
+    recipient_x25519_public_key: Buffer,
+    kem_ciphertext: Buffer,
+) -> bytes:
+    """Combine both shared secrets into one session key with HKDF-SHA256."""
+    info = b"".join(
+        (
+            SESSION_KEY_LABEL,
+            bytes(ephemeral_public_key),
+            bytes(recipient_x25519_public_key),
+            hashlib.sha256(kem_ciphertext).digest(),
+        )
+    )
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=KEY_SIZE, salt=None, info=info)
+    return hkdf.derive(bytes(kem_secret) + bytes(x25519_secret))
+
+
+def hybrid_encapsulate(
+    recipient: HybridPublicKey, algorithm: Optional[str] = None
+) -> HybridEncapsulation:
+    """
+    Run both key exchanges against a recipient and derive a session key.
+
+    Raises:
+        RuntimeError: If ML-KEM encapsulation fails
+    """
+    ephemeral = X25519PrivateKey.generate()
+    ephemeral_public_key = ephemeral.public_key().public_bytes_raw()
+    x25519_secret = ephemeral.exchange(X25519PublicKey.from_public_bytes(recipient.x25519))
+    kem = encapsulate(recipient.ml_kem, algorithm)
+    session_key = derive_session_key(
+        x25519_secret,
+        kem.shared_secret,
+        ephemeral_public_key,
+        recipient.x25519,
+        kem.ciphertext,
+    )
+    return HybridEncapsulation(session_key, ephemeral_public_key, kem.ciphertext)
+
+
+def hybrid_decapsulate(
+    private_key: HybridPrivateKey,
+    ephemeral_public_key: Buffer,
+    kem_ciphertext: Buffer,
+    algorithm: Optional[str] = None,
+) -> bytes:
+    """
+    Derive the session key a sender encapsulated for this recipient.
+
+    Raises:
+        ValueError: If the ephemeral key is malformed
+        RuntimeError: If ML-KEM decapsulation fails
+    """
+    x25519 = X25519PrivateKey.from_private_bytes(private_key.x25519)
+    if len(ephemeral_public_key) != X25519_KEY_SIZE:
+        raise ValueError("Ephemeral X25519 key must be 32 bytes")
+    x25519_secret = x25519.exchange(X25519PublicKey.from_public_bytes(bytes(ephemeral_public_key)))
+    kem_secret = decapsulate(private_key.ml_kem, bytes(kem_ciphertext), algorithm)
+    return derive_session_key(
+        x25519_secret,
+        kem_secret,
+        ephemeral_public_key,
+        x25519.public_key().public_bytes_raw(),
+        kem_ciphertext,
+    )
+
+
+class SessionCipher:
+    """AEAD bound to one session key."""
+
+    def __init__(self, key: bytes, aead: Optional[str] = None):
+        aead = aead or settings.session_aead
+        if aead not in AEAD_ALGORITHMS:
+            raise ValueError(f"Unsupported AEAD {aead!r}")
+        self._aead = AEAD_ALGORITHMS[aead](key)
+
+    def seal(self, plaintext: Buffer, associated_data: Optional[Buffer] = None) -> bytearray:
+        """Encrypt into a new ``nonce || ciphertext || tag`` buffer."""
+        sealed = bytearray(NONCE_SIZE + len(plaintext) + TAG_SIZE)
+        view = memoryview(sealed)
+        view[:NONCE_SIZE] = os.urandom(NONCE_SIZE)
+        self._aead.encrypt_into(view[:NONCE_SIZE], plaintext, associated_data, view[NONCE_SIZE:])
+        return sealed
+
+    def open(self, sealed: Buffer, associated_data: Optional[Buffer] = None) -> bytes:
+        """
+        Decrypt a buffer produced by ``seal``.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: If the message was tampered with
+            ValueError: If the buffer is too short
+        """
+        view = memoryview(sealed)
+        if len(view) < NONCE_SIZE + TAG_SIZE:
+            raise ValueError("Sealed message is too short")
+        return self._aead.decrypt(view[:NONCE_SIZE], view[NONCE_SIZE:], associated_data)
+
+
+class _SenderSession:
+    """Cached outbound key with the header it was derived from."""
+
+    def __init__(self, encapsulation: HybridEncapsulation):
+        self.ephemeral_public_key = encapsulation.ephemeral_public_key
+        self.kem_ciphertext = encapsulation.kem_ciphertext
+        self.cipher = SessionCipher(encapsulation.session_key)
+        self.remaining = settings.session_key_max_messages
+        self.lock = threading.Lock()
+
+    def reserve(self) -> bool:
+        """Count one seal against the key; False once it is used up."""
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+_sender_sessions: TTLCache[tuple[UUID, UUID, UUID], _SenderSession] = TTLCache(
+    maxsize=settings.session_key_cache_size,
+    ttl=settings.session_key_ttl_seconds,
+)
+_recipient_sessions: TTLCache[tuple[UUID, bytes], SessionCipher] = TTLCache(
+    maxsize=settings.session_key_cache_size,
+    ttl=settings.session_key_ttl_seconds,
+)
+
+
+def _associated_data(
+    sender_id: UUID, recipient_id: UUID, key_id: UUID, associated_data: Optional[Buffer]
+) -> bytes:
+    header = sender_id.bytes + recipient_id.bytes + key_id.bytes
+    return header + bytes(associated_data) if associated_data else header
+
+
+def seal_for_recipient(
+    sender_id: UUID,
+    recipient_id: UUID,
+    key_id: UUID,
+    recipient: HybridPublicKey,
+    plaintext: Buffer,
+    associated_data: Optional[Buffer] = None,
+    algorithm: Optional[str] = None,
+) -> SealedMessage:
+    """
+    Seal a payload for a recipient's key, reusing a cached session key.
+
+    The sender, recipient and key IDs are authenticated along with
+    ``associated_data``, so a message cannot be replayed under other IDs.
+
+    Raises:
+        RuntimeError: If a new session needs ML-KEM and encapsulation fails
+    """
+    cache_key = (sender_id, recipient_id, key_id)
+    session = _sender_sessions.get(cache_key)
+    if session is None or not session.reserve():
+        session = _SenderSession(hybrid_encapsulate(recipient, algorithm))
+        session.reserve()
+        _sender_sessions.set(cache_key, session)
+
+    sealed = session.cipher.seal(
+        plaintext, _associated_data(sender_id, recipient_id, key_id, associated_data)
+    )
+    return SealedMessage(session.ephemeral_public_key, session.kem_ciphertext, sealed)
+
+
+def open_from_sender(
+    sender_id: UUID,
+    recipient_id: UUID,
+    key_id: UUID,
+    private_key: HybridPrivateKey,
+    message: SealedMessage,
+    associated_data: Optional[Buffer] = None,
+    algorithm: Optional[str] = None,
+) -> bytes:
+    """
+    Open a message sealed by ``seal_for_recipient``.
+
+    Session keys are cached by key ID and key-exchange header, so only the first
+    message under each sender key pays for decapsulation.
+
+    Raises:
+        cryptography.exceptions.InvalidTag: If the message or its IDs were tampered with
+        ValueError: If the key-exchange header is malformed
+        RuntimeError: If ML-KEM decapsulation fails
+    """
+    header = hashlib.sha256(bytes(message.ephemeral_public_key) + bytes(message.kem_ciphertext))
+    cache_key = (key_id, header.digest())
+    cipher = _recipient_sessions.get(cache_key)
+    if cipher is None:
+        session_key = hybrid_decapsulate(
+            private_key, message.ephemeral_public_key, message.kem_ciphertext, algorithm
+        )
+        cipher = SessionCipher(session_key)
+        _recipient_sessions.set(cache_key, cipher)
+    return cipher.open(
+        message.sealed, _associated_data(sender_id, recipient_id, key_id, associated_data)
+    )
+
+
+def session_cache_stats() -> tuple[CacheStats, CacheStats]:
+    """Return (sender, recipient) session key cache counters."""
+    return _sender_sessions.stats(), _recipient_sessions.stats()
+
+
+def clear_session_keys() -> None:
+    """Forget every cached session key, e.g. after a recipient rotates keys."""
+    _sender_sessions.clear()
+    _recipient_sessions.clear()
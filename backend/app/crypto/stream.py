@@ -0,0 +1,127 @@
+"""
+Chunked AEAD (STREAM construction) for attachments of any size.
+
+The plaintext is split into fixed-size chunks, each sealed on its own with
+ChaCha20-Poly1305 under the nonce ``prefix || counter || last``: a 7-byte
+random prefix per stream, the 4-byte big-endian chunk index and a 1-byte
+flag set only on the final chunk. Reordering, dropping or truncating
+chunks therefore fails authentication, while any chunk can be decrypted
+on its own, which is what makes range reads cheap.
+
+Every chunk but the last holds exactly ``chunk_size`` plaintext bytes, so
+chunk ``i`` starts at ciphertext offset ``i * (chunk_size + TAG_SIZE)``.
+"""
+
+import os
+from typing import Iterator, NamedTuple
+
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+
+from crypto.session import Buffer
+
+KEY_SIZE = 32
+NONCE_PREFIX_SIZE = 7
+TAG_SIZE = 16
+MAX_CHUNKS = 2**32
+
+
+class ChunkRange(NamedTuple):
+    """Chunks covering a plaintext byte range, and where to cut them."""
+
+    first: int
+    last: int
+    skip: int  # Bytes to drop from the first decrypted chunk
+    length: int  # Plaintext bytes wanted in total
+
+
+def new_stream_key() -> tuple[bytes, bytes]:
+    """Return a fresh (key, nonce prefix) pair for one stream."""
+    return ChaCha20Poly1305.generate_key(), os.urandom(NONCE_PREFIX_SIZE)
+
+
+def _nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    if index >= MAX_CHUNKS:
+        raise ValueError("Stream has too many chunks")
+    return prefix + index.to_bytes(4, "big") + (b"\x01" if last else b"\x00")
+
+
+def chunk_count(size: int, chunk_size: int) -> int:
+    """Number of chunks for ``size`` plaintext bytes; empty streams have one."""
+    return max(1, -(-size // chunk_size))
+
+
+def ciphertext_size(size: int, chunk_size: int) -> int:
+    """Total sealed size for ``size`` plaintext bytes."""
+    return size + chunk_count(size, chunk_size) * TAG_SIZE
+
+
+def chunk_range(start: int, end: int, chunk_size: int) -> ChunkRange:
+    """Map the inclusive plaintext range ``start..end`` onto chunk indices."""
+    return ChunkRange(
+        first=start // chunk_size,
+        last=end // chunk_size,
+        skip=start % chunk_size,
+        length=end - start + 1,
+    )
+
+
+class StreamEncryptor:
+    """
+    Seals chunks as they arrive.
+
+    The final chunk has to carry the ``last`` flag, but a streamed upload
+    only ends after its final bytes arrive, so one chunk is held back until
+    the next one (or ``finish``) shows whether it was the last.
+    """
+
+    def __init__(self, key: bytes, nonce_prefix: bytes, chunk_size: int):
+        self._aead = ChaCha20Poly1305(key)
+        self._prefix = nonce_prefix
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()
+        self._index = 0
+        self.size = 0
+
+    def update(self, data: Buffer) -> Iterator[bytes]:
+        """Buffer ``data`` and yield every chunk known not to be the last."""
+        self._buffer += data
+        self.size += len(data)
+        # Keep at least one full chunk back in case the stream ends here
+        while len(self._buffer) > self._chunk_size:
+            yield self._seal(memoryview(self._buffer)[: self._chunk_size], last=False)
+            del self._buffer[: self._chunk_size]
+
+    def finish(self) -> bytes:
+        """Seal whatever remains as the final chunk."""
+        sealed = self._seal(self._buffer, last=True)
+        self._buffer = bytearray()
+        return sealed
+
+    def _seal(self, chunk: Buffer, last: bool) -> bytes:
+        sealed = self._aead.encrypt(_nonce(self._prefix, self._index, last), chunk, None)
+        self._index += 1
+        return sealed
+
+
+class StreamDecryptor:
+    """Opens individual chunks of a stream whose plaintext size is known."""
+
+    def __init__(self, key: bytes, nonce_prefix: bytes, chunk_size: int, size: int):
+        self._aead = ChaCha20Poly1305(key)
+        self._prefix = nonce_prefix
+        self.chunk_size = chunk_size
+        self.chunks = chunk_count(size, chunk_size)
+
+    def offset(self, index: int) -> int:
+        """Ciphertext offset of chunk ``index``."""
+        return index * (self.chunk_size + TAG_SIZE)
+
+    def open_chunk(self, index: int, sealed: Buffer) -> bytes:
+        """
+        Decrypt chunk ``index``.
+
+        Raises:
+            cryptography.exceptions.InvalidTag: If the chunk was altered or moved
+        """
+        last = index == self.chunks - 1
+        return self._aead.decrypt(_nonce(self._prefix, index, last), sealed, None)
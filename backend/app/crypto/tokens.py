@@ -0,0 +1,25 @@
+"""Opaque refresh token generation and hashing."""
+
+import hashlib
+import secrets
+
+
+def hash_refresh_token(token: str) -> bytes:
+    """
+    Return the digest refresh tokens are stored and looked up by.
+
+    Tokens carry 256 bits of randomness, so a single fast SHA-256 is enough;
+    a slow password hash would only add latency to every refresh.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
+def new_refresh_token() -> tuple[str, bytes]:
+    """
+    Generate a refresh token.
+
+    Returns:
+        Tuple of (token to hand to the client, digest to store)
+    """
+    token = secrets.token_urlsafe(32)
+    return token, hash_refresh_token(token)
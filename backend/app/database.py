@@ -1,23 +1,133 @@
 """Database connection and session management using SQLAlchemy."""
 
-from sqlalchemy import create_engine
+import base64
+import logging
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from config import get_settings
 
+logger = logging.getLogger(__name__)
+
 settings = get_settings()
 
-# Create SQLite engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-    echo=settings.environment == "development",
-)
+
+def _is_sqlite_file(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+# Drivers used for each backend; sync for startup/migrations, async for requests
+SYNC_DRIVERS = {"postgresql": "psycopg"}
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def sync_database_url(database_url: str) -> str:
+    """Pick the sync driver for a database URL that does not name one."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if url.drivername != backend or backend not in SYNC_DRIVERS:
+        return database_url
+    return url.set(drivername=f"{backend}+{SYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def async_database_url(database_url: str) -> str:
+    """Map a database URL onto the async driver for its backend."""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend {backend!r}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(
+        hide_password=False
+    )
+
+
+def _connect_args(database_url: str) -> dict:
+    """Build driver connect arguments, including prepared statement caching."""
+    url = make_url(database_url)
+    driver = url.get_driver_name()
+    cache_size = settings.database_statement_cache_size
+    if url.get_backend_name() == "sqlite":
+        return {"check_same_thread": False} if driver == "pysqlite" else {}
+    if driver == "asyncpg":
+        # Statements are prepared on first use and reused per connection
+        args = {"prepared_statement_cache_size": cache_size}
+        if cache_size == 0:
+            args["statement_cache_size"] = 0
+        return args
+    if driver == "psycopg":
+        # Prepare server-side after a statement has run this many times
+        return {"prepare_threshold": 5 if cache_size else None}
+    return {}
+
+
+def _engine_options(database_url: str) -> dict:
+    """Build echo, pool and driver options for an engine on ``database_url``."""
+    options = {
+        "echo": settings.database_echo,
+        "connect_args": _connect_args(database_url),
+    }
+    if make_url(database_url).get_backend_name() == "sqlite":
+        if settings.sqlite_tuned and _is_sqlite_file(database_url):
+            options["pool_size"] = settings.sqlite_pool_size
+            options["max_overflow"] = settings.sqlite_max_overflow
+        return options
+
+    options.update(
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_pre_ping=settings.database_pool_pre_ping,
+        pool_recycle=settings.database_pool_recycle,
+    )
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Apply the configured SQLite tuning profile to a new connection."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    cursor.close()
+
+
+def _limit_prepared_statements(dbapi_connection, connection_record):
+    """Cap the number of statements psycopg keeps prepared per connection."""
+    dbapi_connection.prepared_max = settings.database_statement_cache_size or None
+
+
+# Create sync engine for startup tasks and migrations
+_sync_url = sync_database_url(settings.database_url)
+engine = create_engine(_sync_url, **_engine_options(_sync_url))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine for request handlers (aiosqlite in dev, asyncpg for Postgres)
+_async_url = async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **_engine_options(_async_url))
+
+if settings.sqlite_tuned and _is_sqlite_file(settings.database_url):
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+if engine.dialect.driver == "psycopg":
+    event.listen(engine, "connect", _limit_prepared_statements)
+
+# Create async session factory; objects stay usable after commit
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -31,8 +141,114 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for async FastAPI routes to get an AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def close_async_db():
+    """Dispose of pooled async connections on shutdown."""
+    await async_engine.dispose()
+
+
 def init_db():
-    """Initialize database tables."""
-    from db_models import User  # noqa: F401
+    """Bring the database schema up to date if auto-migration is enabled."""
+    if not settings.database_auto_migrate:
+        return
+    run_migrations()
+    _upgrade_legacy_users_table()
+
+
+def run_migrations(bind=engine, revision: str = "head"):
+    """
+    Apply Alembic migrations on ``bind`` up to ``revision``.
+
+    Databases created by ``create_all`` before migrations existed are adopted
+    by the initial revision without recreating their tables.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(Path(__file__).with_name("alembic.ini")))
+    with bind.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
+# Untagged legacy public keys are assigned an algorithm by their size
+_LEGACY_KEY_ALGORITHMS = {1184: "ML-KEM-768", 1568: "ML-KEM-1024"}
+
+
+def _upgrade_legacy_users_table(bind=engine):
+    """
+    Bring a SQLite ``users`` table created by an earlier release up to date.
+
+    Adds columns introduced since, rewrites base64 TEXT key values as raw
+    bytes, and moves inline public keys into the ``user_keys`` directory.
+    SQLite keeps the declared TEXT type but stores the rewritten values as
+    BLOBs, which is all the LargeBinary mapping needs.
+    """
+    if bind.dialect.name != "sqlite":
+        return
+    inspector = inspect(bind)
+    if not inspector.has_table("users"):
+        return
+    columns = {column["name"] for column in inspector.get_columns("users")}
+
+    with bind.begin() as connection:
+        for name, ddl in (("display_name", "VARCHAR(100)"), ("pqc_key_id", "VARCHAR(36)")):
+            if name not in columns:
+                connection.execute(text(f"ALTER TABLE users ADD COLUMN {name} {ddl}"))
+
+        rows = connection.execute(
+            text("SELECT id, pqc_private_blob FROM users WHERE typeof(pqc_private_blob) = 'text'")
+        ).all()
+        for row in rows:
+            connection.execute(
+                text("UPDATE users SET pqc_private_blob = :blob WHERE id = :id"),
+                {"id": row.id, "blob": _decode_legacy_key(row.pqc_private_blob)},
+            )
+        if rows:
+            logger.info(f"Converted {len(rows)} private keys from base64 to binary storage")
+
+        if "pqc_public_key" not in columns:
+            return
+
+        rows = connection.execute(
+            text(
+                "SELECT id, pqc_public_key, created_at FROM users "
+                "WHERE pqc_public_key IS NOT NULL AND pqc_key_id IS NULL"
+            )
+        ).all()
+        for row in rows:
+            public_key = _decode_legacy_key(row.pqc_public_key)
+            key_id = str(uuid.uuid4())
+            connection.execute(
+                text(
+                    "INSERT INTO user_keys (id, user_id, algorithm, public_key, created_at) "
+                    "VALUES (:id, :user_id, :algorithm, :public_key, :created_at)"
+                ),
+                {
+                    "id": key_id,
+                    "user_id": row.id,
+                    "algorithm": _LEGACY_KEY_ALGORITHMS.get(len(public_key), "ML-KEM-768"),
+                    "public_key": public_key,
+                    "created_at": row.created_at,
+                },
+            )
+            connection.execute(
+                text(
+                    "UPDATE users SET pqc_key_id = :key_id, pqc_public_key = NULL "
+                    "WHERE id = :id"
+                ),
+                {"id": row.id, "key_id": key_id},
+            )
+        if rows:
+            logger.info(f"Moved {len(rows)} public keys into the user_keys directory")
+
 
-    Base.metadata.create_all(bind=engine)
+def _decode_legacy_key(value):
+    if isinstance(value, str):
+        return base64.b64decode(value)
+    return value
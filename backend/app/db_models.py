@@ -3,30 +3,47 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, String, Text, TypeDecorator
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    TypeDecorator,
+)
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import deferred
 
 from database import Base
 
 
 class GUID(TypeDecorator):
-    """Platform-independent GUID type for SQLite compatibility."""
+    """Platform-independent GUID type: native UUID on Postgres, String(36) elsewhere."""
 
     impl = String
     cache_ok = True
 
     def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=True))
         return dialect.type_descriptor(String(36))
 
     def process_bind_param(self, value, dialect):
         if value is None:
             return value
-        elif isinstance(value, uuid.UUID):
-            return str(value)
-        else:
-            return str(uuid.UUID(value))
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(value)
+        if dialect.name == "postgresql":
+            return value
+        return str(value)
 
     def process_result_value(self, value, dialect):
-        if value is None:
+        if value is None or isinstance(value, uuid.UUID):
             return value
         else:
             return uuid.UUID(value)
@@ -40,10 +57,128 @@ class User(Base):
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
-    pqc_public_key = Column(Text, nullable=True)
-    pqc_private_blob = Column(Text, nullable=True)  # Encrypted private key
+    display_name = Column(String(100), nullable=True)
+    # Current key in user_keys; the private blob below belongs to it
+    pqc_key_id = Column(GUID(), nullable=True)
+    # Loaded on demand so credential lookups skip the blob; wrapped under a
+    # KEK when PRIVATE_KEY_KEK_FILE is set (see crypto/kek.py)
+    pqc_private_blob = deferred(Column(LargeBinary, nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
 
+
+class UserKey(Base):
+    """Public ML-KEM key published in the key directory."""
+
+    __tablename__ = "user_keys"
+    __table_args__ = (Index("ix_user_keys_user_id_created_at", "user_id", "created_at"),)
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    algorithm = Column(String(64), nullable=False)
+    public_key = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<UserKey(id={self.id}, user_id={self.user_id}, algorithm={self.algorithm})>"
+
+
+class Message(Base):
+    """Encrypted message envelope stored until the recipient fetches it."""
+
+    __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_recipient_id_created_at_id", "recipient_id", "created_at", "id"),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    sender_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    recipient_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Key the envelope refers to, as named by the client
+    key_id = Column(GUID(), nullable=False)
+    kem_ciphertext = Column(LargeBinary, nullable=True)  # ML-KEM encapsulation
+    payload = Column(LargeBinary, nullable=False)  # AEAD ciphertext
+    signature = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Message(id={self.id}, sender_id={self.sender_id}, recipient_id={self.recipient_id})>"
+
+
+class DeliveryEvent(Base):
+    """Per-recipient event relayed between app processes by the database broker."""
+
+    __tablename__ = "delivery_events"
+
+    # Monotonic cursor for pollers; SQLite only autoincrements INTEGER keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    recipient_id = Column(GUID(), nullable=False)
+    origin = Column(String(36), nullable=False)  # Publishing process
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<DeliveryEvent(id={self.id}, recipient_id={self.recipient_id})>"
+
+
+class RefreshToken(Base):
+    """Opaque refresh token, stored only as its SHA-256 digest."""
+
+    __tablename__ = "refresh_tokens"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    user_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_hash = Column(LargeBinary(32), nullable=False, unique=True)
+    # Every token rotated from the same login shares a family
+    family_id = Column(GUID(), nullable=False, index=True)
+    session_binding = Column(String(64), nullable=True)  # Carried into refreshed JWTs
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    used_at = Column(DateTime, nullable=True)  # Set when rotated
+    revoked_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<RefreshToken(id={self.id}, user_id={self.user_id}, family_id={self.family_id})>"
+
+
+class Attachment(Base):
+    """
+    File uploaded for a recipient, encrypted at rest in chunks.
+
+    The ciphertext lives in ``ATTACHMENT_STORAGE_DIR`` under the attachment
+    ID; the per-file key stays here, so neither the files nor the database
+    alone reveal the contents.
+    """
+
+    __tablename__ = "attachments"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    owner_id = Column(GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    recipient_id = Column(
+        GUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    content_type = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)  # Plaintext bytes
+    chunk_size = Column(Integer, nullable=False)
+    content_key = deferred(Column(LargeBinary(32), nullable=False))
+    nonce_prefix = Column(LargeBinary(7), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<Attachment(id={self.id}, owner_id={self.owner_id}, size={self.size})>"
+
+
+class RateLimitBucket(Base):
+    """Token bucket shared by every process when ``RATE_LIMIT_STORE=database``."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(64), primary_key=True)  # Scope plus hashed identifier
+    tokens = Column(Float, nullable=False)
+    refilled_at = Column(Float, nullable=False, index=True)  # Unix time
+
+    def __repr__(self):
+        return f"<RateLimitBucket(key={self.key}, tokens={self.tokens})>"
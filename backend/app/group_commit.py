@@ -0,0 +1,149 @@
+"""Group-commit writer that batches inserts from concurrent requests."""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class GroupCommitStats(NamedTuple):
+    """Snapshot of group-commit counters."""
+
+    pending: int
+    batches: int
+    rows: int
+    largest_batch: int
+
+
+class GroupCommitWriter:
+    """
+    Collects rows submitted by concurrent callers and writes them together.
+
+    The first row of a batch opens a window of ``max_delay`` seconds; every
+    row submitted within the window (up to ``max_batch`` rows) is handed to
+    ``flush`` in a single call, which is expected to write them in one
+    transaction. Each caller's ``submit`` resolves once its row is committed.
+
+    If a batch fails, its rows are retried one at a time so a single bad row
+    only fails its own caller.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[Sequence[Any]], Awaitable[None]],
+        max_batch: int,
+        max_delay: float,
+        max_pending: int,
+    ):
+        self._flush = flush
+        self._max_batch = max(1, max_batch)
+        self._max_delay = max_delay
+        self._max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_pending)
+        self._task = asyncio.create_task(self._run(), name="group-commit")
+
+    async def stop(self) -> None:
+        """Write every row already submitted, then stop the writer task."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        await self._queue.put(None)
+        await task
+
+    async def submit(self, row: Any) -> None:
+        """
+        Queue a row and wait until the batch containing it is committed.
+
+        Waits for room when ``max_pending`` rows are already queued.
+
+        Raises:
+            Exception: Whatever ``flush`` raised for this row
+        """
+        if not self.running:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        await future
+
+    def stats(self) -> GroupCommitStats:
+        """Return batch and row counters."""
+        return GroupCommitStats(
+            pending=self._queue.qsize() if self._queue is not None else 0,
+            batches=self._batches,
+            rows=self._rows,
+            largest_batch=self._largest_batch,
+        )
+
+    async def _collect(self, first) -> tuple[list, bool]:
+        """Gather rows for one batch; returns (batch, stop_requested)."""
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._max_delay
+        while len(batch) < self._max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch, stopping = await self._collect(first)
+            await self._write(batch)
+            if stopping:
+                return
+
+    async def _write(self, batch: list) -> None:
+        rows = [row for row, _ in batch]
+        try:
+            await self._flush(rows)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch, e)
+                return
+            logger.warning(f"Group commit of {len(batch)} rows failed, retrying singly: {e}")
+            for item in batch:
+                await self._write([item])
+            return
+
+        self._batches += 1
+        self._rows += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        self._resolve(batch, None)
+
+    @staticmethod
+    def _resolve(batch: list, error: Optional[BaseException]) -> None:
+        for _, future in batch:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(None)
+            else:
+                future.set_exception(error)
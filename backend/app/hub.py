@@ -0,0 +1,164 @@
+"""In-process fan-out hub that pushes events to live WebSocket connections."""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, NamedTuple
+from uuid import UUID
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class HubStats(NamedTuple):
+    """Snapshot of hub connection and delivery counters."""
+
+    users: int
+    connections: int
+    delivered: int
+    evicted: int
+
+
+class _Connection:
+    """One live socket with its bounded outbound queue."""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=queue_size)
+        self.evicted = asyncio.Event()
+        self.close_code = status.WS_1013_TRY_AGAIN_LATER
+        self.close_reason = "Slow consumer"
+
+
+class DeliveryHub:
+    """
+    Maps user IDs to their open WebSockets and fans events out to them.
+
+    ``publish`` never waits on a socket: each connection has a bounded queue
+    drained by its own sender task. A connection whose queue is full, or
+    whose socket does not accept a send within ``send_timeout`` seconds, is
+    evicted and closed with 1013 (try again later) so the client reconnects
+    and catches up from storage instead of buffering without limit here.
+    """
+
+    def __init__(self, queue_size: int, send_timeout: float):
+        self._queue_size = queue_size
+        self._send_timeout = send_timeout
+        self._connections: dict[UUID, set[_Connection]] = defaultdict(set)
+        self._delivered = 0
+        self._evicted = 0
+
+    async def serve(self, user_id: UUID, websocket: WebSocket) -> None:
+        """Deliver events to an accepted socket until it disconnects or is evicted."""
+        connection = _Connection(websocket, self._queue_size)
+        self._connections[user_id].add(connection)
+        tasks = [
+            asyncio.create_task(self._send_loop(connection)),
+            asyncio.create_task(self._receive_loop(websocket)),
+            asyncio.create_task(connection.evicted.wait()),
+        ]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancelled tasks unwind on their own; awaiting them here would
+            # re-enter cancellation when the server cancels this handler
+            for task in tasks:
+                task.cancel()
+            self._remove(user_id, connection)
+
+        if connection.evicted.is_set():
+            try:
+                await websocket.close(
+                    code=connection.close_code, reason=connection.close_reason
+                )
+            except RuntimeError:
+                pass  # Socket already closed by the peer
+
+    def publish(self, user_id: UUID, event: dict[str, Any]) -> int:
+        """
+        Queue an event for every connection of ``user_id``.
+
+        Returns:
+            Number of connections the event was queued for
+        """
+        queued = 0
+        for connection in list(self._connections.get(user_id, ())):
+            try:
+                connection.queue.put_nowait(event)
+                queued += 1
+            except asyncio.QueueFull:
+                self._evict(connection, "send queue full")
+        return queued
+
+    def stats(self) -> HubStats:
+        """Return connection and delivery counters."""
+        return HubStats(
+            users=len(self._connections),
+            connections=sum(len(c) for c in self._connections.values()),
+            delivered=self._delivered,
+            evicted=self._evicted,
+        )
+
+    def close_all(self) -> None:
+        """Close every connection with 1012 (service restart) on shutdown."""
+        for connections in list(self._connections.values()):
+            for connection in list(connections):
+                connection.close_code = status.WS_1012_SERVICE_RESTART
+                connection.close_reason = "Server shutting down"
+                connection.evicted.set()
+
+    def _evict(self, connection: _Connection, reason: str) -> None:
+        if connection.evicted.is_set():
+            return
+        logger.warning(f"Evicting slow WebSocket consumer: {reason}")
+        self._evicted += 1
+        connection.evicted.set()
+
+    def _remove(self, user_id: UUID, connection: _Connection) -> None:
+        connections = self._connections.get(user_id)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self._connections[user_id]
+
+    async def _send_loop(self, connection: _Connection) -> None:
+        while True:
+            event = await connection.queue.get()
+            try:
+                await asyncio.wait_for(
+                    connection.websocket.send_json(event), self._send_timeout
+                )
+            except asyncio.TimeoutError:
+                self._evict(connection, "send timed out")
+                return
+            except (WebSocketDisconnect, RuntimeError):
+                return
+            self._delivered += 1
+
+    @staticmethod
+    async def _receive_loop(websocket: WebSocket) -> None:
+        # Clients do not send anything yet; reading detects disconnects
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+        except (WebSocketDisconnect, RuntimeError):
+            return
+
+
+hub = DeliveryHub(
+    queue_size=settings.ws_send_queue_size,
+    send_timeout=settings.ws_send_timeout_seconds,
+)
+
+
+def hub_stats() -> HubStats:
+    """Return counters for the shared delivery hub."""
+    return hub.stats()
@@ -0,0 +1,84 @@
+"""
+Command line management of the private key KEK file and stored key blobs.
+
+Kept apart from ``crypto.kek`` so the crypto layer does not depend on the
+database.
+
+Usage (from backend/app):
+    python -m kek_cli generate --file kek.json --kid 2026-10 --activate
+    python -m kek_cli rewrap
+"""
+
+import argparse
+import base64
+import json
+import secrets
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import select, update
+
+from crypto.kek import KEK_SIZE, rewrap_private_key
+from crypto.secret_files import write_secret_file
+from database import SessionLocal
+from db_models import User
+
+
+def rewrap_all() -> int:
+    """
+    Wrap raw blobs and rewrap blobs under retired KEKs with the active KEK.
+
+    Returns:
+        Number of users updated
+
+    Raises:
+        ValueError: If no KEK is configured while private keys are stored
+    """
+    updated = 0
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(User.id, User.pqc_private_blob).where(User.pqc_private_blob.is_not(None))
+        ).all()
+        for user_id, blob in rows:
+            rewrapped = rewrap_private_key(user_id, blob)
+            if rewrapped is None:
+                continue
+            db.execute(
+                update(User)
+                .where(User.id == user_id, User.pqc_private_blob == blob)
+                .values(pqc_private_blob=rewrapped)
+            )
+            updated += 1
+        db.commit()
+    return updated
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manage the private key KEK")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="add a new KEK to a KEK file")
+    generate.add_argument("--file", required=True)
+    generate.add_argument("--kid", required=True)
+    generate.add_argument("--activate", action="store_true", help="wrap new keys with this KEK")
+
+    commands.add_parser("rewrap", help="wrap every stored private key with the active KEK")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "rewrap":
+        print(f"Rewrapped {rewrap_all()} private keys")
+        return
+
+    path = Path(args.file)
+    data = json.loads(path.read_text()) if path.exists() else {"keys": {}}
+    if args.kid in data["keys"]:
+        parser.error(f"kid {args.kid!r} already exists in {path}")
+    data["keys"][args.kid] = base64.b64encode(secrets.token_bytes(KEK_SIZE)).decode("ascii")
+    if args.activate or "active" not in data:
+        data["active"] = args.kid
+    write_secret_file(path, json.dumps(data, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
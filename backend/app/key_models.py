@@ -0,0 +1,17 @@
+"""Pydantic models for the public key directory endpoints."""
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class PublicKeyResponse(BaseModel):
+    """Public key directory entry with base64 key bytes."""
+
+    key_id: str
+    user_id: str
+    algorithm: str
+    public_key: str
+    created_at: datetime
+    expires_at: Optional[datetime] = None
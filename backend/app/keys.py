@@ -0,0 +1,71 @@
+"""Public key directory router with lookup and rotation endpoints."""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import key_models
+from crypto.pqc import encode_key_base64
+from crypto.reservoir import take_kem_keypair_async
+from database import get_async_db
+from repositories import PublicKeyRecord, get_public_key_async, rotate_user_key_async
+from security import AuthenticatedUser, current_user
+
+router = APIRouter(prefix="/api/keys", tags=["Keys"])
+
+
+def _to_response(record: PublicKeyRecord) -> key_models.PublicKeyResponse:
+    return key_models.PublicKeyResponse(
+        key_id=str(record.key_id),
+        user_id=str(record.user_id),
+        algorithm=record.algorithm,
+        public_key=encode_key_base64(record.public_key),
+        created_at=record.created_at,
+        expires_at=record.expires_at,
+    )
+
+
+@router.get("/users/{user_id}", response_model=key_models.PublicKeyResponse)
+async def get_user_public_key(
+    user_id: str,
+    db: AsyncSession = Depends(get_async_db),
+) -> key_models.PublicKeyResponse:
+    """Return a user's current public key; 404 if they have none."""
+    record = await get_public_key_async(db, user_id=user_id)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Public key not found.",
+        )
+    return _to_response(record)
+
+
+@router.post("/rotate", response_model=key_models.PublicKeyResponse)
+async def rotate_key(
+    user: AuthenticatedUser = Depends(current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> key_models.PublicKeyResponse:
+    """Replace the caller's keypair with a fresh one from the reservoir."""
+    keypair, algorithm = await take_kem_keypair_async()
+    record = await rotate_user_key_async(
+        db,
+        user.id,
+        keypair.public_key,
+        keypair.private_key,
+        algorithm,
+    )
+    return _to_response(record)
+
+
+@router.get("/{key_id}", response_model=key_models.PublicKeyResponse)
+async def get_key(
+    key_id: str,
+    db: AsyncSession = Depends(get_async_db),
+) -> key_models.PublicKeyResponse:
+    """Return a public key by key ID; 404 if unknown."""
+    record = await get_public_key_async(db, key_id=key_id)
+    if record is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Public key not found.",
+        )
+    return _to_response(record)
@@ -1,22 +1,49 @@
-"""FastAPI application entrypoint with health check endpoint."""
+"""FastAPI application entrypoint with health check, metrics and WebSocket delivery endpoints."""
 
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from attachments import router as attachments_router
 from auth import router as auth_router
+from broker import broker
 from config import get_settings
-from database import init_db
+from crypto.password import dummy_password_hash, shutdown_hashing_executor
+from crypto.pqc import clear_kem_pool, get_kem_registry, shutdown_kem_batch_executor
+from crypto.reservoir import start_keypair_reservoir, stop_keypair_reservoir
+from database import close_async_db, init_db
+from hub import hub
+from keys import router as keys_router
+from messages import router as messages_router
+from messages import start_message_writer, stop_message_writer
+from metrics import CONTENT_TYPE, MetricsMiddleware, render
+from runtime_metrics import register_runtime_metrics
+from security import authenticate_token
 
 settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database and worker pools on startup, release them on shutdown."""
     init_db()
+    if settings.login_dummy_verify:
+        dummy_password_hash()  # Hash once now rather than on the first unknown email
+    get_kem_registry()  # Fail fast if PQC_KEM_ALGORITHM is not enabled
+    start_keypair_reservoir()
+    start_message_writer()
+    await broker.start(hub.publish)
     yield
+    hub.close_all()
+    await stop_message_writer()
+    await broker.stop()
+    stop_keypair_reservoir()
+    shutdown_hashing_executor()
+    shutdown_kem_batch_executor()
+    clear_kem_pool()
+    await close_async_db()
 
 
 app = FastAPI(
@@ -36,8 +63,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.metrics_enabled:
+    # Outermost, so the recorded latency includes every other middleware
+    app.add_middleware(MetricsMiddleware)
+    register_runtime_metrics()
+
 # Include routers
 app.include_router(auth_router)
+app.include_router(keys_router)
+app.include_router(messages_router)
+app.include_router(attachments_router)
 
 
 @app.get("/api/healthz", tags=["Health"])
@@ -45,3 +80,30 @@ async def health_check() -> dict[str, str]:
     """Simple readiness probe used by Docker and infrastructure monitors."""
     return {"status": "ok"}
 
+
+if settings.metrics_enabled:
+
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        """Prometheus scrape target: latency histograms plus runtime gauges and counters."""
+        return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+
+@app.websocket("/api/ws")
+async def delivery_socket(websocket: WebSocket, token: str | None = None):
+    """
+    Push new message envelopes to the authenticated user as they are stored.
+
+    The JWT is taken from the ``token`` query parameter (browsers cannot set
+    headers on WebSockets) or a bearer Authorization header.
+    """
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    user = authenticate_token(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    await hub.serve(user.id, websocket)
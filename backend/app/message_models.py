@@ -0,0 +1,39 @@
+"""Pydantic models for the messaging endpoints."""
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class SendMessageRequest(BaseModel):
+    """Encrypted envelope submitted by the sender; binary fields are base64."""
+
+    recipient_id: UUID
+    message_body: str = Field(min_length=1, max_length=262144)  # AEAD payload
+    public_key_id: UUID
+    kem_ciphertext: Optional[str] = Field(default=None, max_length=8192)
+    signature: Optional[str] = Field(default=None, max_length=16384)
+    # Accepted for clients that cannot set an Authorization header
+    auth_token: Optional[str] = None
+
+
+class SendMessageResponse(BaseModel):
+    """Identifier of the stored envelope."""
+
+    message_id: str
+    signature_valid: bool
+
+
+class MessageEnvelope(BaseModel):
+    """Stored envelope as delivered to the recipient; binary fields are base64."""
+
+    message_id: str
+    sender_id: str
+    recipient_id: str
+    public_key_id: str
+    kem_ciphertext: Optional[str] = None
+    message_body: str
+    signature: Optional[str] = None
+    created_at: datetime
@@ -0,0 +1,264 @@
+"""Messaging router that accepts encrypted envelopes and stores them in batches."""
+
+import base64
+import binascii
+import json
+import logging
+import uuid
+from contextlib import aclosing
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional, Sequence
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import message_models
+from broker import broker
+from config import get_settings
+from crypto.pqc import decode_key_base64, encode_key_base64
+from database import AsyncSessionLocal, get_async_db
+from group_commit import GroupCommitStats, GroupCommitWriter
+from repositories import (
+    InboxPosition,
+    find_user_by_id_async,
+    get_public_key_async,
+    insert_messages_async,
+    stream_inbox_async,
+)
+from security import AuthenticatedUser, bearer_scheme, current_user, require_token
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+router = APIRouter(prefix="/api/messages", tags=["Messages"])
+
+
+async def _write_messages(rows: Sequence[dict]) -> None:
+    # Stamp the inbox ordering key as late as possible, right before the
+    # insert, so it trails the commit by one transaction rather than by the
+    # time a row spent queued; see ``_inbox_lines`` for the rest
+    created_at = datetime.utcnow()
+    for row in rows:
+        row["created_at"] = created_at
+    async with AsyncSessionLocal() as db:
+        await insert_messages_async(db, rows)
+
+
+_writer = GroupCommitWriter(
+    _write_messages,
+    max_batch=settings.message_batch_max_size,
+    max_delay=settings.message_batch_max_delay_ms / 1000,
+    max_pending=settings.message_queue_max_pending,
+)
+
+
+def start_message_writer() -> None:
+    """Start the group-commit writer on the running event loop."""
+    _writer.start()
+
+
+async def stop_message_writer() -> None:
+    """Write any queued messages and stop the group-commit writer."""
+    await _writer.stop()
+
+
+def message_writer_stats() -> GroupCommitStats:
+    """Return batch counters for the message writer."""
+    return _writer.stats()
+
+
+def _decode_field(name: str, value: str) -> bytes:
+    try:
+        return decode_key_base64(value)
+    except (binascii.Error, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{name} must be base64 encoded.",
+        )
+
+
+def to_envelope(row: dict) -> message_models.MessageEnvelope:
+    """Build the client-facing envelope for a stored message row."""
+    return message_models.MessageEnvelope(
+        message_id=str(row["id"]),
+        sender_id=str(row["sender_id"]),
+        recipient_id=str(row["recipient_id"]),
+        public_key_id=str(row["key_id"]),
+        kem_ciphertext=(
+            encode_key_base64(row["kem_ciphertext"]) if row["kem_ciphertext"] else None
+        ),
+        message_body=encode_key_base64(row["payload"]),
+        signature=encode_key_base64(row["signature"]) if row["signature"] else None,
+        created_at=row["created_at"],
+    )
+
+
+def encode_cursor(position: InboxPosition) -> str:
+    """Encode an inbox position as an opaque URL-safe cursor."""
+    data = json.dumps(
+        [position.created_at.isoformat(), str(position.message_id)], separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> InboxPosition:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, message_id = json.loads(base64.urlsafe_b64decode(padded))
+        return InboxPosition(datetime.fromisoformat(created_at), UUID(message_id))
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError("Malformed inbox cursor") from e
+
+
+@router.post(
+    "/send",
+    response_model=message_models.SendMessageResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def send_message(
+    payload: message_models.SendMessageRequest,
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> message_models.SendMessageResponse:
+    """
+    Store an encrypted envelope for the recipient.
+
+    Flow:
+    1. Authenticate the sender from the bearer token (or ``auth_token``)
+    2. Resolve ``public_key_id`` through the key directory cache and check
+       it belongs to the recipient, then decode the base64 envelope fields
+    3. Queue the row on the group-commit writer and wait for its commit
+    4. Publish the envelope to the recipient's WebSockets on every replica
+
+    The server never sees plaintext. Signatures are stored for the recipient
+    to check; ``signature_valid`` stays false until the server can verify them.
+    """
+    sender = require_token(credentials.credentials if credentials else payload.auth_token)
+
+    # A cached key that belongs to the recipient also proves they exist, so
+    # the users row is only read to explain a rejection
+    key = await get_public_key_async(db, key_id=payload.public_key_id)
+    if key is None or key.user_id != payload.recipient_id:
+        if await find_user_by_id_async(db, payload.recipient_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Recipient not found.",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Public key does not belong to the recipient.",
+        )
+
+    # Hand the connection back before waiting, so queued senders cannot
+    # exhaust the pool the writer needs
+    await db.close()
+
+    message_id = uuid.uuid4()
+    row = {
+        "id": message_id,
+        "sender_id": sender.id,
+        "recipient_id": payload.recipient_id,
+        "key_id": payload.public_key_id,
+        "kem_ciphertext": (
+            _decode_field("kem_ciphertext", payload.kem_ciphertext)
+            if payload.kem_ciphertext
+            else None
+        ),
+        "payload": _decode_field("message_body", payload.message_body),
+        "signature": (
+            _decode_field("signature", payload.signature) if payload.signature else None
+        ),
+        "created_at": None,  # Set by the writer when the batch is flushed
+    }
+    await _writer.submit(row)
+    try:
+        await broker.publish(
+            payload.recipient_id,
+            {"type": "message", "envelope": to_envelope(row).model_dump(mode="json")},
+        )
+    except Exception as e:
+        # The message is stored; the recipient will still get it from the inbox
+        logger.error(f"Failed to publish message {message_id}: {e}")
+    return message_models.SendMessageResponse(
+        message_id=str(message_id),
+        signature_valid=False,
+    )
+
+
+async def _inbox_lines(
+    recipient_id: UUID, after: Optional[InboxPosition], limit: int
+) -> AsyncIterator[bytes]:
+    # Rows are stamped before their transaction commits, so with several
+    # writers or replicas a row stamped earlier can become visible after a
+    # later one has been read. Only rows older than INBOX_SETTLE_MS are
+    # synced, which keeps every cursor behind any commit still in flight;
+    # newer rows reach open sockets by push and the next sync picks them up.
+    settled = None
+    if settings.inbox_settle_ms > 0:
+        settled = datetime.utcnow() - timedelta(milliseconds=settings.inbox_settle_ms)
+    # The stream outlives the request's dependencies, so it owns its session
+    last = after
+    sent = 0
+    has_more = False
+    async with AsyncSessionLocal() as db:
+        # One extra row tells us whether another page follows
+        rows = stream_inbox_async(db, recipient_id, after, limit + 1, before=settled)
+        async with aclosing(rows):
+            async for row in rows:
+                if sent == limit:
+                    has_more = True
+                    break
+                event = {"type": "message", "envelope": to_envelope(row).model_dump(mode="json")}
+                yield (json.dumps(event) + "\n").encode()
+                last = InboxPosition(row["created_at"], row["id"])
+                sent += 1
+
+    trailer = {
+        "type": "cursor",
+        "cursor": encode_cursor(last) if last is not None else None,
+        "has_more": has_more,
+    }
+    yield (json.dumps(trailer) + "\n").encode()
+
+
+@router.get("/inbox")
+async def inbox(
+    since: Optional[str] = Query(default=None, description="Cursor from a previous sync"),
+    limit: int = Query(default=100, ge=1, le=5000),
+    user: AuthenticatedUser = Depends(current_user),
+) -> StreamingResponse:
+    """
+    Stream the caller's messages received after ``since`` as NDJSON.
+
+    Each line is a ``{"type": "message", "envelope": ...}`` event, the same
+    shape pushed over ``/api/ws``. The final line is
+    ``{"type": "cursor", "cursor": ..., "has_more": ...}``; pass the cursor as
+    ``since`` on the next sync. Returns 400 for a malformed cursor.
+
+    Delivery guarantee: each message is returned exactly once across
+    successive syncs, provided its insert commits within ``INBOX_SETTLE_MS``
+    of being stamped and replica clocks agree to within the same margin.
+    Messages younger than that are left for the next sync.
+    """
+    try:
+        after = decode_cursor(since) if since else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid inbox cursor.",
+        )
+
+    return StreamingResponse(
+        _inbox_lines(user.id, after, limit),
+        media_type="application/x-ndjson",
+    )
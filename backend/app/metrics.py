@@ -0,0 +1,214 @@
+"""
+Prometheus-style latency histograms, runtime gauges and their text exposition.
+
+Histograms are updated in-process by ``timed`` (crypto and repository hot
+paths) and ``MetricsMiddleware`` (HTTP routes); gauges and counters owned
+by other modules are read from registered collectors only when ``/metrics``
+is scraped. With ``METRICS_ENABLED=false`` ``timed`` returns functions
+unwrapped and the middleware is not installed, so nothing is measured.
+"""
+
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Callable, Iterable, NamedTuple, TypeVar
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import get_settings
+
+settings = get_settings()
+
+F = TypeVar("F", bound=Callable)
+
+# Seconds; spans sub-millisecond KEM operations up to overloaded Argon2 queues
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricFamily(NamedTuple):
+    """A gauge or counter read at scrape time, with one value per label set."""
+
+    name: str
+    help: str
+    kind: str  # "gauge" or "counter"
+    samples: list[tuple[dict[str, str], float]]
+
+
+class Histogram:
+    """Thread-safe cumulative histogram keyed by a fixed tuple of label values."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for the given label values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        """Return how many observations were recorded for the given label values."""
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+
+    def clear(self) -> None:
+        """Drop every recorded observation."""
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        """Yield the histogram in the Prometheus text format."""
+        with self._lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, counts, total in sorted(snapshot):
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket{_labels({**base, 'le': le})} {cumulative}"
+            yield f"{self.name}_sum{_labels(base)} {total!r}"
+            yield f"{self.name}_count{_labels(base)} {cumulative}"
+
+
+REQUEST_LATENCY = Histogram(
+    "pqc_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+OPERATION_LATENCY = Histogram(
+    "pqc_operation_duration_seconds",
+    "Latency of Argon2, ML-KEM and JWT operations",
+    ("operation",),
+)
+QUERY_LATENCY = Histogram(
+    "pqc_repository_query_duration_seconds",
+    "Latency of repository queries, including waiting for a pooled connection",
+    ("query",),
+)
+
+_histograms = [REQUEST_LATENCY, OPERATION_LATENCY, QUERY_LATENCY]
+_collectors: list[Callable[[], Iterable[MetricFamily]]] = []
+
+
+def timed(histogram: Histogram, label: str) -> Callable[[F], F]:
+    """
+    Decorate a function or coroutine function to record its latency under ``label``.
+
+    Failed calls are recorded too. When metrics are disabled the function is
+    returned as-is.
+    """
+
+    def decorate(fn: F) -> F:
+        if not settings.metrics_enabled:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def timed_coroutine(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, label)
+
+            return timed_coroutine
+
+        @functools.wraps(fn)
+        def timed_function(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, label)
+
+        return timed_function
+
+    return decorate
+
+
+def register_collector(collector: Callable[[], Iterable[MetricFamily]]) -> None:
+    """Add a callable that reports gauges and counters at scrape time."""
+    _collectors.append(collector)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def render() -> str:
+    """Return every histogram and collected metric in the Prometheus text format."""
+    lines: list[str] = []
+    for histogram in _histograms:
+        lines.extend(histogram.render())
+    for collector in _collectors:
+        for family in collector():
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, value in family.samples:
+                lines.append(f"{family.name}{_labels(labels)} {value!r}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording HTTP latency per route template.
+
+    Routes are labelled by their path template (``/api/attachments/{attachment_id}``),
+    not the raw path, so IDs do not create new series; unmatched paths share
+    one label. Streaming responses are timed until the last body chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            )
@@ -0,0 +1,67 @@
+"""Initial schema: users and the user_keys directory
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db_models import GUID
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases created by create_all before migrations existed already have
+    # users (and possibly user_keys); database._upgrade_legacy_users_table
+    # brings those up to date, so only create what is missing here.
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", GUID(), nullable=False),
+            sa.Column("email", sa.String(length=255), nullable=False),
+            sa.Column("password_hash", sa.String(length=255), nullable=False),
+            sa.Column("display_name", sa.String(length=100), nullable=True),
+            sa.Column("pqc_key_id", GUID(), nullable=True),
+            sa.Column("pqc_private_blob", sa.LargeBinary(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if not inspector.has_table("user_keys"):
+        op.create_table(
+            "user_keys",
+            sa.Column("id", GUID(), nullable=False),
+            sa.Column("user_id", GUID(), nullable=False),
+            sa.Column("algorithm", sa.String(length=64), nullable=False),
+            sa.Column("public_key", sa.LargeBinary(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_user_keys_user_id_created_at",
+            "user_keys",
+            ["user_id", "created_at"],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_user_keys_user_id_created_at", table_name="user_keys")
+    op.drop_table("user_keys")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
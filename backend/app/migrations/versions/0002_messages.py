@@ -0,0 +1,48 @@
+"""Message envelopes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:15:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db_models import GUID
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "messages",
+        sa.Column("id", GUID(), nullable=False),
+        sa.Column("sender_id", GUID(), nullable=False),
+        sa.Column("recipient_id", GUID(), nullable=False),
+        sa.Column("key_id", GUID(), nullable=False),
+        sa.Column("kem_ciphertext", sa.LargeBinary(), nullable=True),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["sender_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["recipient_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_messages_recipient_id_created_at",
+        "messages",
+        ["recipient_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_messages_recipient_id_created_at", table_name="messages")
+    op.drop_table("messages")
@@ -0,0 +1,36 @@
+"""Extend the inbox index with id for keyset pagination
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:45:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_messages_recipient_id_created_at_id",
+        "messages",
+        ["recipient_id", "created_at", "id"],
+    )
+    op.drop_index("ix_messages_recipient_id_created_at", table_name="messages")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        "ix_messages_recipient_id_created_at",
+        "messages",
+        ["recipient_id", "created_at"],
+    )
+    op.drop_index("ix_messages_recipient_id_created_at_id", table_name="messages")
@@ -0,0 +1,45 @@
+"""Chunk-encrypted attachments
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 13:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from db_models import GUID
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "attachments",
+        sa.Column("id", GUID(), nullable=False),
+        sa.Column("owner_id", GUID(), nullable=False),
+        sa.Column("recipient_id", GUID(), nullable=False),
+        sa.Column("content_type", sa.String(length=255), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("chunk_size", sa.Integer(), nullable=False),
+        sa.Column("content_key", sa.LargeBinary(length=32), nullable=False),
+        sa.Column("nonce_prefix", sa.LargeBinary(length=7), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["recipient_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_attachments_recipient_id", "attachments", ["recipient_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_attachments_recipient_id", table_name="attachments")
+    op.drop_table("attachments")
@@ -0,0 +1,209 @@
+"""Token-bucket rate limiting with in-memory and shared database stores."""
+
+import hashlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional, Sequence
+
+from fastapi import Request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from cache import TTLCache
+from config import get_settings
+from database import AsyncSessionLocal
+from db_models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class RateLimit(NamedTuple):
+    """Bucket shape: ``burst`` attempts at once, refilled at ``per_minute``."""
+
+    burst: int
+    per_minute: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.per_minute / 60
+
+    @property
+    def refill_seconds(self) -> float:
+        """Time for an empty bucket to fill up again."""
+        return self.burst / self.rate
+
+
+def take_token(
+    tokens: float, refilled_at: float, now: float, limit: RateLimit
+) -> tuple[float, float]:
+    """
+    Refill a bucket to ``now`` and try to take one token.
+
+    Returns:
+        (tokens left, seconds to wait); the wait is 0 if a token was taken
+    """
+    tokens = min(limit.burst, tokens + (now - refilled_at) * limit.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.rate
+
+
+class RateLimitStore(ABC):
+    """Holds token buckets keyed by a caller-chosen string."""
+
+    @abstractmethod
+    async def take(self, key: str, limit: RateLimit) -> float:
+        """
+        Take one token from the bucket for ``key``.
+
+        Returns:
+            0 if allowed, otherwise seconds until a token is available
+        """
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """
+    Per-process buckets in a bounded LRU.
+
+    A bucket left alone until it is full again carries no state, so entries
+    expire after their refill time. With several workers each one enforces
+    its own limit; use the database store to share them.
+    """
+
+    def __init__(self, maxsize: int):
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(maxsize=maxsize, ttl=60)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, refilled_at = self._buckets.get(key) or (limit.burst, now)
+        tokens, wait = take_token(tokens, refilled_at, now, limit)
+        self._buckets.set(key, (tokens, now), ttl=limit.refill_seconds)
+        return wait
+
+
+class DatabaseRateLimitStore(RateLimitStore):
+    """
+    Buckets in the ``rate_limit_buckets`` table, shared by every process.
+
+    Updates are compare-and-swap on the bucket's refill time, retried when
+    another process got there first, so no row locks are held. Idle
+    buckets are pruned every ``prune_every`` takes.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        prune_every: int = 1000,
+        max_attempts: int = 5,
+    ):
+        self._session_factory = session_factory
+        self._prune_every = prune_every
+        self._max_attempts = max_attempts
+        self._takes = 0
+        self._max_refill = 0.0
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        self._max_refill = max(self._max_refill, limit.refill_seconds)
+        self._takes += 1
+        async with self._session_factory() as db:
+            if self._takes % self._prune_every == 0:
+                await self.prune(db)
+            for _ in range(self._max_attempts):
+                wait = await self._try_take(db, key, limit)
+                if wait is not None:
+                    return wait
+        # Lost every race; the bucket is clearly busy
+        return 1 / limit.rate
+
+    async def prune(self, db: AsyncSession) -> None:
+        """Delete buckets idle long enough to have filled up again."""
+        cutoff = time.time() - self._max_refill
+        await db.execute(delete(RateLimitBucket).where(RateLimitBucket.refilled_at < cutoff))
+        await db.commit()
+
+    async def _try_take(self, db: AsyncSession, key: str, limit: RateLimit) -> Optional[float]:
+        now = time.time()
+        result = await db.execute(
+            select(RateLimitBucket.tokens, RateLimitBucket.refilled_at).where(
+                RateLimitBucket.key == key
+            )
+        )
+        row = result.first()
+
+        if row is None:
+            tokens, wait = take_token(limit.burst, now, now, limit)
+            try:
+                await db.execute(
+                    insert(RateLimitBucket).values(key=key, tokens=tokens, refilled_at=now)
+                )
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                return None
+            return wait
+
+        tokens, wait = take_token(row.tokens, row.refilled_at, now, limit)
+        swapped = await db.execute(
+            update(RateLimitBucket)
+            .where(RateLimitBucket.key == key, RateLimitBucket.refilled_at == row.refilled_at)
+            .values(tokens=tokens, refilled_at=now)
+        )
+        await db.commit()
+        return wait if swapped.rowcount == 1 else None
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    """Build the store selected by ``RATE_LIMIT_STORE``."""
+    if settings.rate_limit_store == "database":
+        return DatabaseRateLimitStore(AsyncSessionLocal)
+    return MemoryRateLimitStore(maxsize=settings.rate_limit_memory_max_keys)
+
+
+rate_limit_store = create_rate_limit_store()
+
+
+def bucket_key(scope: str, identifier: str) -> str:
+    """Build a fixed-length bucket key that does not store the identifier itself."""
+    digest = hashlib.sha256(identifier.encode()).hexdigest()[:32]
+    return f"{scope}:{digest}"
+
+
+def client_ip(request: Request) -> str:
+    """
+    Return the caller's IP, from ``X-Forwarded-For`` only when trusted.
+
+    Each proxy appends the address it received the request from, so only the
+    rightmost ``RATE_LIMIT_TRUSTED_PROXY_HOPS`` entries were written by our
+    own proxies; anything left of them is client-supplied and ignored.
+    """
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        entries = [entry.strip() for entry in forwarded.split(",") if entry.strip()]
+        hops = settings.rate_limit_trusted_proxy_hops
+        if len(entries) >= hops:
+            return entries[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+async def check_rate_limits(limits: Sequence[tuple[str, RateLimit]]) -> float:
+    """
+    Take a token from each bucket.
+
+    Store failures are logged and let the request through, so an outage of
+    the shared store does not lock everyone out.
+
+    Returns:
+        0 if every bucket allowed it, otherwise the longest wait in seconds
+    """
+    wait = 0.0
+    for key, limit in limits:
+        try:
+            wait = max(wait, await rate_limit_store.take(key, limit))
+        except Exception as e:
+            logger.error(f"Rate limit store failed for {key.split(':')[0]}: {e}")
+    return wait
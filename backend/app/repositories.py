@@ -1,44 +1,610 @@
 """Repository pattern helpers for database operations."""
 
-from typing import Optional
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, NamedTuple, Optional, Sequence
 from uuid import UUID
 
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db_models import User
+from cache import TTLCache
+from config import get_settings
+from crypto.kek import wrap_private_key
+from crypto.pqc import get_kem_registry
+from crypto.tokens import hash_refresh_token, new_refresh_token
+from db_models import Attachment, Message, RefreshToken, User, UserKey
+from metrics import QUERY_LATENCY, timed
 
+settings = get_settings()
 
+
+class UserKeyMaterial(NamedTuple):
+    """
+    ML-KEM key bytes for a user's current key, tagged with its algorithm.
+
+    ``private_key`` is the stored blob; lease the raw key with
+    ``crypto.kek.unwrap_private_key`` before use.
+    """
+
+    key_id: Optional[UUID]
+    public_key: Optional[bytes]
+    private_key: Optional[bytes]
+    algorithm: Optional[str]
+
+
+class InboxPosition(NamedTuple):
+    """Keyset position of the last message a client has seen."""
+
+    created_at: datetime
+    message_id: UUID
+
+
+class RefreshGrant(NamedTuple):
+    """Result of rotating a refresh token."""
+
+    user_id: UUID
+    session_binding: Optional[str]
+    refresh_token: str
+
+
+class RefreshTokenReuseError(Exception):
+    """Raised when a refresh token that was already rotated is presented again."""
+
+
+class AttachmentRecord(NamedTuple):
+    """Detached attachment metadata, usable after the session closes."""
+
+    id: UUID
+    owner_id: UUID
+    recipient_id: UUID
+    content_type: str
+    size: int
+    chunk_size: int
+    content_key: bytes
+    nonce_prefix: bytes
+
+
+class PublicKeyRecord(NamedTuple):
+    """Detached key directory entry, safe to cache across sessions."""
+
+    key_id: UUID
+    user_id: UUID
+    algorithm: str
+    public_key: bytes
+    created_at: datetime
+    expires_at: Optional[datetime]
+
+
+# Keyed by ("key", key_id) and ("user", user_id). Each worker process has its
+# own cache, so rotations made elsewhere become visible within the TTL.
+_public_key_cache: TTLCache[tuple[str, UUID], PublicKeyRecord] = TTLCache(
+    maxsize=settings.public_key_cache_size,
+    ttl=settings.public_key_cache_ttl_seconds,
+)
+
+
+@timed(QUERY_LATENCY, "create_user")
 def create_user(
     db: Session,
     email: str,
     password_hash: str,
-    pqc_public_key: Optional[str] = None,
-    pqc_private_blob: Optional[str] = None,
+    pqc_public_key: Optional[bytes] = None,
+    pqc_private_blob: Optional[bytes] = None,
+    display_name: Optional[str] = None,
+    pqc_algorithm: Optional[str] = None,
 ) -> User:
-    """Create a new user in the database."""
+    """Create a new user in the database, publishing their public key if given."""
+    user_id = uuid.uuid4()
     user = User(
+        id=user_id,
         email=email.lower().strip(),
         password_hash=password_hash,
-        pqc_public_key=pqc_public_key,
-        pqc_private_blob=pqc_private_blob,
+        display_name=display_name,
+        pqc_private_blob=(
+            wrap_private_key(user_id, pqc_private_blob) if pqc_private_blob else None
+        ),
     )
     db.add(user)
+    if pqc_public_key is not None:
+        db.flush()
+        key = UserKey(
+            user_id=user.id,
+            algorithm=pqc_algorithm or get_kem_registry().default,
+            public_key=pqc_public_key,
+        )
+        db.add(key)
+        db.flush()
+        user.pqc_key_id = key.id
     db.commit()
     db.refresh(user)
     return user
 
 
+@timed(QUERY_LATENCY, "find_user_by_email")
 def find_user_by_email(db: Session, email: str) -> Optional[User]:
     """Find a user by email address."""
     return db.query(User).filter(User.email == email.lower().strip()).first()
 
 
-def find_user_by_id(db: Session, user_id: UUID | str) -> Optional[User]:
-    """Find a user by ID."""
-    if isinstance(user_id, str):
+def _coerce_uuid(value: UUID | str) -> Optional[UUID]:
+    """Parse an ID, returning None if it is not a valid UUID."""
+    if isinstance(value, str):
         try:
-            user_id = UUID(user_id)
+            return UUID(value)
         except ValueError:
             return None
+    return value
+
+
+@timed(QUERY_LATENCY, "find_user_by_id")
+def find_user_by_id(db: Session, user_id: UUID | str) -> Optional[User]:
+    """Find a user by ID."""
+    user_id = _coerce_uuid(user_id)
+    if user_id is None:
+        return None
     return db.query(User).filter(User.id == user_id).first()
 
+
+def _key_material_query(user_id: UUID):
+    return (
+        select(User.pqc_key_id, User.pqc_private_blob, UserKey.public_key, UserKey.algorithm)
+        .outerjoin(UserKey, UserKey.id == User.pqc_key_id)
+        .where(User.id == user_id)
+    )
+
+
+def _to_key_material(row) -> Optional[UserKeyMaterial]:
+    if row is None:
+        return None
+    return UserKeyMaterial(
+        key_id=row.pqc_key_id,
+        public_key=row.public_key,
+        private_key=row.pqc_private_blob,
+        algorithm=row.algorithm,
+    )
+
+
+@timed(QUERY_LATENCY, "get_user_key_material")
+def get_user_key_material(db: Session, user_id: UUID | str) -> Optional[UserKeyMaterial]:
+    """Fetch only a user's current key ID and raw key bytes."""
+    user_id = _coerce_uuid(user_id)
+    if user_id is None:
+        return None
+    return _to_key_material(db.execute(_key_material_query(user_id)).first())
+
+
+def _to_record(key: UserKey) -> PublicKeyRecord:
+    return PublicKeyRecord(
+        key_id=key.id,
+        user_id=key.user_id,
+        algorithm=key.algorithm,
+        public_key=key.public_key,
+        created_at=key.created_at,
+        expires_at=key.expires_at,
+    )
+
+
+def _cache_record(cache_key: tuple[str, UUID], record: PublicKeyRecord) -> None:
+    """Cache a record, never past the key's own expiry."""
+    ttl = None
+    if record.expires_at is not None:
+        ttl = min(
+            settings.public_key_cache_ttl_seconds,
+            (record.expires_at - datetime.utcnow()).total_seconds(),
+        )
+    _public_key_cache.set(cache_key, record, ttl=ttl)
+
+
+def _public_key_lookup(user_id: UUID | str | None, key_id: UUID | str | None):
+    """
+    Resolve lookup arguments to a cache key and query.
+
+    Returns (None, None) for malformed IDs.
+    """
+    if key_id is not None:
+        key_id = _coerce_uuid(key_id)
+        if key_id is None:
+            return None, None
+        return ("key", key_id), select(UserKey).where(UserKey.id == key_id)
+
+    if user_id is None:
+        raise ValueError("get_public_key requires user_id or key_id")
+    user_id = _coerce_uuid(user_id)
+    if user_id is None:
+        return None, None
+    return ("user", user_id), (
+        select(UserKey)
+        .where(UserKey.user_id == user_id, _key_is_active(datetime.utcnow()))
+        .order_by(UserKey.created_at.desc())
+        .limit(1)
+    )
+
+
+def _key_is_active(now: datetime):
+    return or_(UserKey.expires_at.is_(None), UserKey.expires_at > now)
+
+
+@timed(QUERY_LATENCY, "get_public_key")
+def get_public_key(
+    db: Session,
+    user_id: UUID | str | None = None,
+    key_id: UUID | str | None = None,
+) -> Optional[PublicKeyRecord]:
+    """
+    Look up a public key by key ID, or a user's current key by user ID.
+
+    Lookups are served from an in-process LRU cache when possible and never
+    read the ``users`` row. Key ID lookups return expired keys too, so callers
+    can tell "expired" from "unknown" via ``expires_at``.
+    """
+    cache_key, query = _public_key_lookup(user_id, key_id)
+    if cache_key is None:
+        return None
+    record = _public_key_cache.get(cache_key)
+    if record is None:
+        key = db.execute(query).scalars().first()
+        if key is None:
+            return None
+        record = _to_record(key)
+        _cache_record(cache_key, record)
+    return record
+
+
+def _new_key_statements(user_id: UUID, key: UserKey, private_blob: bytes):
+    """
+    Build the statements that retire a user's keys and point them at ``key``.
+
+    ``private_blob`` is the raw private key; it is wrapped under the active
+    KEK (if one is configured) before it is stored.
+    """
+    now = datetime.utcnow()
+    retire = (
+        update(UserKey)
+        .where(UserKey.user_id == user_id, UserKey.id != key.id, _key_is_active(now))
+        .values(expires_at=now)
+        .returning(UserKey.id)
+    )
+    repoint = (
+        update(User)
+        .where(User.id == user_id)
+        .values(pqc_key_id=key.id, pqc_private_blob=wrap_private_key(user_id, private_blob))
+    )
+    return retire, repoint
+
+
+@timed(QUERY_LATENCY, "rotate_user_key")
+def rotate_user_key(
+    db: Session,
+    user_id: UUID,
+    public_key: bytes,
+    private_blob: bytes,
+    algorithm: str,
+) -> PublicKeyRecord:
+    """
+    Publish a new current key for a user and expire the previous ones.
+
+    Cached lookups for the user and their old keys are invalidated.
+    """
+    key = UserKey(user_id=user_id, algorithm=algorithm, public_key=public_key)
+    db.add(key)
+    db.flush()
+    retire, repoint = _new_key_statements(user_id, key, private_blob)
+    old_key_ids = list(db.execute(retire).scalars())
+    db.execute(repoint)
+    db.commit()
+    db.refresh(key)
+
+    invalidate_public_keys(user_id, old_key_ids)
+    return _to_record(key)
+
+
+def invalidate_public_keys(user_id: UUID, key_ids: list[UUID]) -> None:
+    """Drop cached key directory entries for a user and specific key IDs."""
+    _public_key_cache.pop(("user", user_id))
+    for key_id in key_ids:
+        _public_key_cache.pop(("key", key_id))
+
+
+def public_key_cache() -> TTLCache:
+    """Return the shared public key cache (for stats and tests)."""
+    return _public_key_cache
+
+
+@timed(QUERY_LATENCY, "create_user_async")
+async def create_user_async(
+    db: AsyncSession,
+    email: str,
+    password_hash: str,
+    pqc_public_key: Optional[bytes] = None,
+    pqc_private_blob: Optional[bytes] = None,
+    display_name: Optional[str] = None,
+    pqc_algorithm: Optional[str] = None,
+) -> User:
+    """Create a new user in the database, publishing their public key if given."""
+    user_id = uuid.uuid4()
+    user = User(
+        id=user_id,
+        email=email.lower().strip(),
+        password_hash=password_hash,
+        display_name=display_name,
+        pqc_private_blob=(
+            wrap_private_key(user_id, pqc_private_blob) if pqc_private_blob else None
+        ),
+    )
+    db.add(user)
+    if pqc_public_key is not None:
+        await db.flush()
+        key = UserKey(
+            user_id=user.id,
+            algorithm=pqc_algorithm or get_kem_registry().default,
+            public_key=pqc_public_key,
+        )
+        db.add(key)
+        await db.flush()
+        user.pqc_key_id = key.id
+    await db.commit()
+    return user
+
+
+@timed(QUERY_LATENCY, "find_user_by_email_async")
+async def find_user_by_email_async(db: AsyncSession, email: str) -> Optional[User]:
+    """Find a user by email address."""
+    result = await db.execute(select(User).where(User.email == email.lower().strip()))
+    return result.scalars().first()
+
+
+@timed(QUERY_LATENCY, "find_user_by_id_async")
+async def find_user_by_id_async(db: AsyncSession, user_id: UUID | str) -> Optional[User]:
+    """Find a user by ID."""
+    user_id = _coerce_uuid(user_id)
+    if user_id is None:
+        return None
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
+
+@timed(QUERY_LATENCY, "update_password_hash_async")
+async def update_password_hash_async(
+    db: AsyncSession, user_id: UUID, old_hash: str, new_hash: str
+) -> bool:
+    """
+    Replace a user's password hash if it is still ``old_hash``.
+
+    The check keeps a slow background rehash from overwriting a password
+    changed in the meantime.
+
+    Returns:
+        True if the hash was replaced
+    """
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.password_hash == old_hash)
+        .values(password_hash=new_hash)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+@timed(QUERY_LATENCY, "get_user_key_material_async")
+async def get_user_key_material_async(
+    db: AsyncSession, user_id: UUID | str
+) -> Optional[UserKeyMaterial]:
+    """Fetch only a user's current key ID and raw key bytes."""
+    user_id = _coerce_uuid(user_id)
+    if user_id is None:
+        return None
+    result = await db.execute(_key_material_query(user_id))
+    return _to_key_material(result.first())
+
+
+@timed(QUERY_LATENCY, "get_public_key_async")
+async def get_public_key_async(
+    db: AsyncSession,
+    user_id: UUID | str | None = None,
+    key_id: UUID | str | None = None,
+) -> Optional[PublicKeyRecord]:
+    """Look up a public key by key ID or user ID; see ``get_public_key``."""
+    cache_key, query = _public_key_lookup(user_id, key_id)
+    if cache_key is None:
+        return None
+    record = _public_key_cache.get(cache_key)
+    if record is None:
+        key = (await db.execute(query)).scalars().first()
+        if key is None:
+            return None
+        record = _to_record(key)
+        _cache_record(cache_key, record)
+    return record
+
+
+@timed(QUERY_LATENCY, "rotate_user_key_async")
+async def rotate_user_key_async(
+    db: AsyncSession,
+    user_id: UUID,
+    public_key: bytes,
+    private_blob: bytes,
+    algorithm: str,
+) -> PublicKeyRecord:
+    """Publish a new current key for a user; see ``rotate_user_key``."""
+    key = UserKey(user_id=user_id, algorithm=algorithm, public_key=public_key)
+    db.add(key)
+    await db.flush()
+    retire, repoint = _new_key_statements(user_id, key, private_blob)
+    old_key_ids = list((await db.execute(retire)).scalars())
+    await db.execute(repoint)
+    await db.commit()
+    await db.refresh(key)
+
+    invalidate_public_keys(user_id, old_key_ids)
+    return _to_record(key)
+
+
+@timed(QUERY_LATENCY, "insert_messages_async")
+async def insert_messages_async(db: AsyncSession, messages: Sequence[dict]) -> None:
+    """
+    Insert message envelope rows in a single transaction.
+
+    Rows carry every ``Message`` column, including ``id`` and ``created_at``,
+    so no values need to be read back.
+    """
+    await db.execute(insert(Message), list(messages))
+    await db.commit()
+
+
+async def stream_inbox_async(
+    db: AsyncSession,
+    recipient_id: UUID,
+    after: Optional[InboxPosition],
+    limit: int,
+    chunk_size: int = 200,
+    before: Optional[datetime] = None,
+) -> AsyncIterator[RowMapping]:
+    """
+    Stream a recipient's messages in (created_at, id) order, after ``after``
+    and (if given) created strictly before ``before``.
+
+    Uses keyset pagination on the (recipient_id, created_at, id) index, so
+    every page costs the same however far into the inbox it starts. Rows are
+    fetched ``chunk_size`` at a time rather than loaded all at once.
+    """
+    query = select(*Message.__table__.c).where(Message.recipient_id == recipient_id)
+    if after is not None:
+        query = query.where(
+            or_(
+                Message.created_at > after.created_at,
+                and_(Message.created_at == after.created_at, Message.id > after.message_id),
+            )
+        )
+    if before is not None:
+        query = query.where(Message.created_at < before)
+    query = (
+        query.order_by(Message.created_at, Message.id)
+        .limit(limit)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(query)
+    async for row in result.mappings():
+        yield row
+
+
+def _new_refresh_token_row(
+    user_id: UUID, family_id: UUID, session_binding: Optional[str]
+) -> tuple[str, RefreshToken]:
+    token, digest = new_refresh_token()
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=digest,
+        family_id=family_id,
+        session_binding=session_binding,
+        expires_at=datetime.utcnow() + timedelta(days=settings.refresh_token_expiration_days),
+    )
+    return token, row
+
+
+@timed(QUERY_LATENCY, "issue_refresh_token_async")
+async def issue_refresh_token_async(
+    db: AsyncSession, user_id: UUID, session_binding: Optional[str] = None
+) -> str:
+    """Start a new refresh token family for a login and return its first token."""
+    token, row = _new_refresh_token_row(user_id, uuid.uuid4(), session_binding)
+    db.add(row)
+    await db.commit()
+    return token
+
+
+@timed(QUERY_LATENCY, "rotate_refresh_token_async")
+async def rotate_refresh_token_async(db: AsyncSession, token: str) -> Optional[RefreshGrant]:
+    """
+    Exchange a refresh token for its successor in the same family.
+
+    Each token can be rotated once. Presenting a token that was already
+    rotated means it was copied, so the whole family is revoked.
+
+    Returns:
+        RefreshGrant, or None if the token is unknown, expired or revoked
+
+    Raises:
+        RefreshTokenReuseError: If the token was already rotated
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    )
+    record = result.scalars().first()
+    if record is None or record.revoked_at is not None or record.expires_at <= now:
+        return None
+
+    # Claim the token atomically so two concurrent refreshes cannot both win
+    claimed = await db.execute(
+        update(RefreshToken)
+        .where(
+            RefreshToken.id == record.id,
+            RefreshToken.used_at.is_(None),
+            RefreshToken.revoked_at.is_(None),
+        )
+        .values(used_at=now)
+    )
+    if claimed.rowcount != 1:
+        await _revoke_family(db, record.family_id, now)
+        await db.commit()
+        raise RefreshTokenReuseError(f"Refresh token family {record.family_id} reused")
+
+    new_token, row = _new_refresh_token_row(
+        record.user_id, record.family_id, record.session_binding
+    )
+    db.add(row)
+    await db.commit()
+    return RefreshGrant(record.user_id, record.session_binding, new_token)
+
+
+@timed(QUERY_LATENCY, "revoke_refresh_token_async")
+async def revoke_refresh_token_async(db: AsyncSession, token: str) -> bool:
+    """
+    Revoke the family a refresh token belongs to (logout).
+
+    Returns:
+        True if the token was known
+    """
+    result = await db.execute(
+        select(RefreshToken.family_id).where(
+            RefreshToken.token_hash == hash_refresh_token(token)
+        )
+    )
+    family_id = result.scalar()
+    if family_id is None:
+        return False
+    await _revoke_family(db, family_id, datetime.utcnow())
+    await db.commit()
+    return True
+
+
+async def _revoke_family(db: AsyncSession, family_id: UUID, now: datetime) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now)
+    )
+
+
+@timed(QUERY_LATENCY, "create_attachment_async")
+async def create_attachment_async(db: AsyncSession, record: AttachmentRecord) -> None:
+    """Store metadata for an attachment whose file has been written."""
+    await db.execute(insert(Attachment).values(**record._asdict()))
+    await db.commit()
+
+
+@timed(QUERY_LATENCY, "get_attachment_async")
+async def get_attachment_async(
+    db: AsyncSession, attachment_id: UUID
+) -> Optional[AttachmentRecord]:
+    """Fetch attachment metadata, including its content key."""
+    result = await db.execute(
+        select(*(getattr(Attachment, field) for field in AttachmentRecord._fields)).where(
+            Attachment.id == attachment_id
+        )
+    )
+    row = result.first()
+    return AttachmentRecord(*row) if row is not None else None
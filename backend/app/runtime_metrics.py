@@ -0,0 +1,167 @@
+"""Scrape-time gauges and counters read from the stats each subsystem already keeps."""
+
+from typing import Iterable
+
+from sqlalchemy.pool import QueuePool
+
+from cache import CacheStats
+from crypto.jwt import jwt_claims_cache
+from crypto.kek import private_key_cache_stats
+from crypto.password import hashing_in_flight, hashing_queue_depth, password_verify_stats
+from crypto.pqc import kem_pool_stats
+from crypto.reservoir import keypair_reservoir_stats
+from crypto.session import session_cache_stats
+from database import async_engine, engine
+from hub import hub_stats
+from messages import message_writer_stats
+from metrics import MetricFamily, register_collector
+from repositories import public_key_cache
+
+
+def _gauge(name: str, help: str, value: float, **labels: str) -> MetricFamily:
+    return MetricFamily(name, help, "gauge", [(labels, value)])
+
+
+def _counter(name: str, help: str, value: float, **labels: str) -> MetricFamily:
+    return MetricFamily(name, help, "counter", [(labels, value)])
+
+
+def _database_pools() -> Iterable[MetricFamily]:
+    samples = []
+    for label, pool in (("sync", engine.pool), ("async", async_engine.pool)):
+        if not isinstance(pool, QueuePool):
+            continue
+        samples.append(({"engine": label, "state": "checked_out"}, pool.checkedout()))
+        samples.append(({"engine": label, "state": "idle"}, pool.checkedin()))
+        samples.append(({"engine": label, "state": "overflow"}, max(0, pool.overflow())))
+    yield MetricFamily(
+        "pqc_db_pool_connections", "Pooled database connections by state", "gauge", samples
+    )
+
+
+def _executors() -> Iterable[MetricFamily]:
+    yield _gauge(
+        "pqc_hashing_queue_depth",
+        "Argon2 jobs waiting for a free hashing worker",
+        hashing_queue_depth(),
+    )
+    yield _gauge(
+        "pqc_hashing_in_flight", "Argon2 jobs queued or running", hashing_in_flight()
+    )
+    writer = message_writer_stats()
+    yield _gauge(
+        "pqc_message_writer_pending", "Messages waiting for the next group commit", writer.pending
+    )
+    yield _counter("pqc_message_writer_batches_total", "Group commits written", writer.batches)
+    yield _counter("pqc_message_writer_rows_total", "Messages written by group commits", writer.rows)
+
+
+def _password_verifies() -> Iterable[MetricFamily]:
+    # Dummy verifies also go through verify_password, so subtract them
+    stats = password_verify_stats()
+    yield MetricFamily(
+        "pqc_password_verifies_total",
+        "Argon2 verifications, for known accounts and dummies for unknown emails",
+        "counter",
+        [
+            ({"kind": "account"}, stats.verifies - stats.dummy_verifies),
+            ({"kind": "dummy"}, stats.dummy_verifies),
+        ],
+    )
+
+
+def _caches() -> Iterable[MetricFamily]:
+    sender, recipient = session_cache_stats()
+    caches: list[tuple[str, CacheStats]] = [
+        ("private_key", private_key_cache_stats()),
+        ("session_sender", sender),
+        ("session_recipient", recipient),
+        ("public_key", public_key_cache().stats()),
+        ("jwt_claims", jwt_claims_cache().stats()),
+    ]
+    for field, kind, help in (
+        ("size", "gauge", "Entries held by each in-process cache"),
+        ("hits", "counter", "Cache lookups answered from memory"),
+        ("misses", "counter", "Cache lookups that fell through"),
+        ("evictions", "counter", "Cache entries dropped by TTL, size or invalidation"),
+    ):
+        name = "pqc_cache_entries" if field == "size" else f"pqc_cache_{field}_total"
+        samples = [({"cache": cache}, getattr(stats, field)) for cache, stats in caches]
+        yield MetricFamily(name, help, kind, samples)
+
+
+def _kem() -> Iterable[MetricFamily]:
+    pools = kem_pool_stats()
+    yield MetricFamily(
+        "pqc_kem_contexts",
+        "Pooled liboqs KEM contexts by state",
+        "gauge",
+        [({"algorithm": p.algorithm, "state": "idle"}, p.idle) for p in pools]
+        + [({"algorithm": p.algorithm, "state": "in_use"}, p.in_use) for p in pools],
+    )
+    # Created far below checkouts means pooling is saving liboqs allocations
+    yield MetricFamily(
+        "pqc_kem_contexts_created_total",
+        "liboqs KEM contexts allocated by the pool",
+        "counter",
+        [({"algorithm": p.algorithm}, p.created) for p in pools],
+    )
+    yield MetricFamily(
+        "pqc_kem_checkouts_total",
+        "KEM operations served from the context pool",
+        "counter",
+        [({"algorithm": p.algorithm}, p.checkouts) for p in pools],
+    )
+
+
+def _reservoir() -> Iterable[MetricFamily]:
+    # Misses mean registration fell back to generating a keypair inline
+    reservoirs = keypair_reservoir_stats()
+    for name, kind, help, field in (
+        (
+            "pqc_kem_reservoir_available",
+            "gauge",
+            "Pregenerated ML-KEM keypairs ready for registration",
+            "available",
+        ),
+        (
+            "pqc_kem_reservoir_hits_total",
+            "counter",
+            "Registrations served a pregenerated keypair",
+            "hits",
+        ),
+        (
+            "pqc_kem_reservoir_misses_total",
+            "counter",
+            "Registrations that found the reservoir empty and generated inline",
+            "misses",
+        ),
+        (
+            "pqc_kem_reservoir_generated_total",
+            "counter",
+            "Keypairs generated by the background refill",
+            "generated",
+        ),
+        (
+            "pqc_kem_reservoir_refill_rate",
+            "gauge",
+            "Keypairs generated per second of refill work",
+            "refill_rate",
+        ),
+    ):
+        samples = [({"algorithm": r.algorithm}, getattr(r, field)) for r in reservoirs]
+        yield MetricFamily(name, help, kind, samples)
+
+
+def _hub() -> Iterable[MetricFamily]:
+    stats = hub_stats()
+    yield _gauge("pqc_ws_connections", "Open WebSocket delivery connections", stats.connections)
+    yield _gauge("pqc_ws_users", "Users with at least one open connection", stats.users)
+    yield _counter("pqc_ws_delivered_total", "Envelopes pushed to sockets", stats.delivered)
+    yield _counter("pqc_ws_evicted_total", "Slow connections evicted", stats.evicted)
+
+
+def register_runtime_metrics() -> None:
+    """Register every scrape-time collector with the metrics registry."""
+    for collector in (_database_pools, _executors, _password_verifies, _caches, _kem, _reservoir, _hub):
+        register_collector(collector)
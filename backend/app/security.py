@@ -0,0 +1,53 @@
+"""Bearer-token authentication dependencies for protected routes."""
+
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from crypto.jwt import verify_jwt_token_cached
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+class AuthenticatedUser(NamedTuple):
+    """Caller identity resolved from a verified JWT."""
+
+    id: UUID
+    claims: dict
+
+
+def authenticate_token(token: Optional[str]) -> Optional[AuthenticatedUser]:
+    """Resolve a JWT to the caller, or None if it is missing or invalid."""
+    claims = verify_jwt_token_cached(token) if token else None
+    if not claims:
+        return None
+    try:
+        return AuthenticatedUser(id=UUID(claims["sub"]), claims=claims)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def require_token(token: Optional[str]) -> AuthenticatedUser:
+    """
+    Resolve a JWT to the caller.
+
+    Raises:
+        HTTPException: 401 if the token is missing or invalid
+    """
+    user = authenticate_token(token)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> AuthenticatedUser:
+    """Dependency resolving the caller from the bearer token; 401 if invalid."""
+    return require_token(credentials.credentials if credentials else None)
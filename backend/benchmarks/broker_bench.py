@@ -0,0 +1,145 @@
+"""
+Multi-process benchmark for cross-replica delivery through the database broker.
+
+Starts ``--workers`` processes that each run a DatabaseBroker against one
+shared database, publish ``--events`` events concurrently, and record how
+long events from the other workers take to arrive.
+
+Usage (from backend/):
+    python benchmarks/broker_bench.py --workers 4 --events 2000
+    python benchmarks/broker_bench.py --database-url postgresql://user:pw@db/bench
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+
+def _import_app(database_url: str) -> None:
+    # Settings are read at import time, so point them at the bench database first
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DATABASE_AUTO_MIGRATE"] = "false"
+    if str(APP_DIR) not in sys.path:
+        sys.path.insert(0, str(APP_DIR))
+
+
+async def _run_worker(index: int, args, barrier, results) -> None:
+    from broker import DatabaseBroker
+    from database import AsyncSessionLocal, close_async_db
+
+    expected = args.events * (args.workers - 1)
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    def deliver(recipient_id, event):
+        if event["worker"] != index:
+            latencies.append(time.time() - event["sent"])
+            if len(latencies) >= expected:
+                done.set()
+
+    broker = DatabaseBroker(
+        AsyncSessionLocal,
+        poll_interval=args.poll_interval_ms / 1000,
+        retention=300,
+        settle=1,
+        max_batch=args.batch_size,
+        max_delay=args.batch_delay_ms / 1000,
+    )
+    await broker.start(deliver)
+    barrier.wait()
+
+    recipient = uuid.uuid4()
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            broker.publish(recipient, {"worker": index, "seq": seq, "sent": time.time()})
+            for seq in range(args.events)
+        )
+    )
+    publish_seconds = time.perf_counter() - started
+
+    try:
+        await asyncio.wait_for(done.wait(), timeout=args.timeout)
+    except asyncio.TimeoutError:
+        pass
+    await broker.stop()
+    await close_async_db()
+    results.put((publish_seconds, latencies, expected))
+
+
+def _worker(index: int, args, barrier, results) -> None:
+    _import_app(args.database_url)
+    asyncio.run(_run_worker(index, args, barrier, results))
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--events", type=int, default=1000, help="events published per worker")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--poll-interval-ms", type=float, default=20.0)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--batch-delay-ms", type=float, default=5.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite:///{Path(tmpdir.name) / 'broker_bench.db'}"
+
+    _import_app(args.database_url)
+    from database import run_migrations
+
+    run_migrations()
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(index, args, barrier, results))
+        for index in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    publish_seconds = max(report[0] for report in reports)
+    latencies = [latency for report in reports for latency in report[1]]
+    expected = sum(report[2] for report in reports)
+    published = args.events * args.workers
+
+    print(f"workers={args.workers} events/worker={args.events} url={args.database_url}")
+    print(f"publish throughput: {published / publish_seconds:,.0f} events/s")
+    print(f"delivered: {len(latencies)}/{expected}")
+    if latencies:
+        print(
+            "delivery latency ms: "
+            f"p50={_percentile(latencies, 0.50) * 1000:.1f} "
+            f"p95={_percentile(latencies, 0.95) * 1000:.1f} "
+            f"p99={_percentile(latencies, 0.99) * 1000:.1f} "
+            f"mean={statistics.fmean(latencies) * 1000:.1f}"
+        )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
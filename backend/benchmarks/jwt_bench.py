@@ -0,0 +1,61 @@
+"""
+Compare JWT sign/verify throughput for HS256, EdDSA and ML-DSA keyrings.
+
+Usage (from backend/):
+    python benchmarks/jwt_bench.py --iterations 2000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+import crypto.jwt as jwt_module  # noqa: E402
+from crypto.keyring import (  # noqa: E402
+    ENABLED_ML_DSA_ALGORITHMS,
+    generate_key_entry,
+    load_keyring_file,
+)
+
+
+def _rate(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    algorithms = ["HS256", "EdDSA", *ENABLED_ML_DSA_ALGORITHMS]
+    print(f"{'algorithm':<12}{'sign/s':>12}{'verify/s':>12}{'token bytes':>14}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for algorithm in algorithms:
+            path = Path(tmpdir) / f"{algorithm}.json"
+            path.write_text(
+                json.dumps({"active": "bench", "keys": [generate_key_entry(algorithm, "bench")]})
+            )
+            keyring = load_keyring_file(path)
+            jwt_module.get_keyring = lambda keyring=keyring: keyring
+
+            user_id = uuid.uuid4()
+            token = jwt_module.create_jwt_token(user_id)
+            assert jwt_module.decode_jwt_token(token) is not None
+
+            sign_rate = _rate(lambda: jwt_module.create_jwt_token(user_id), args.iterations)
+            verify_rate = _rate(lambda: jwt_module.decode_jwt_token(token), args.iterations)
+            print(f"{algorithm:<12}{sign_rate:>12,.0f}{verify_rate:>12,.0f}{len(token):>14,}")
+
+
+if __name__ == "__main__":
+    main()
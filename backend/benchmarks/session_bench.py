@@ -0,0 +1,80 @@
+"""
+Measure hybrid session sealing: key exchange cost and AEAD throughput per core.
+
+Runs on a single thread, so the MB/s reported is per core. The run fails
+(exit status 1) if the cached-key throughput for the largest payload is
+below ``--target-mbps``.
+
+Usage (from backend/):
+    python benchmarks/session_bench.py --target-mbps 500
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+from crypto.session import (  # noqa: E402
+    AEAD_ALGORITHMS,
+    SessionCipher,
+    clear_session_keys,
+    generate_hybrid_keypair,
+    hybrid_encapsulate,
+    seal_for_recipient,
+)
+
+PAYLOAD_SIZES = (1024, 64 * 1024, 1024 * 1024)
+
+
+def _elapsed(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--target-mbps", type=float, default=500.0)
+    args = parser.parse_args()
+
+    keypair = generate_hybrid_keypair()
+    ids = (uuid.uuid4(), uuid.uuid4(), uuid.uuid4())
+
+    encapsulate_ms = _elapsed(lambda: hybrid_encapsulate(keypair.public_key), args.iterations)
+    print(f"hybrid key exchange: {encapsulate_ms / args.iterations * 1000:.3f} ms")
+
+    clear_session_keys()
+    seal_for_recipient(*ids, keypair.public_key, b"warm")
+    cached_ms = _elapsed(
+        lambda: seal_for_recipient(*ids, keypair.public_key, b"x" * 256), args.iterations
+    )
+    print(f"cached 256 B seal:   {cached_ms / args.iterations * 1000:.3f} ms\n")
+
+    print(f"{'aead':<20}{'payload':>10}{'MB/s/core':>12}")
+    largest = {}
+    for aead in AEAD_ALGORITHMS:
+        cipher = SessionCipher(bytes(32), aead)
+        for size in PAYLOAD_SIZES:
+            payload = memoryview(bytearray(size))
+            iterations = max(10, args.iterations * 64 * 1024 // size)
+            elapsed = _elapsed(lambda: cipher.seal(payload), iterations)
+            mbps = size * iterations / elapsed / 1e6
+            largest[aead] = mbps
+            print(f"{aead:<20}{size:>10,}{mbps:>12,.0f}")
+
+    best = max(largest.values())
+    verdict = "meets" if best >= args.target_mbps else "misses"
+    print(f"\nBest 1 MiB throughput {best:,.0f} MB/s/core {verdict} target {args.target_mbps:,.0f}")
+    if best < args.target_mbps:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
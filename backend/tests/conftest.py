@@ -0,0 +1,48 @@
+"""Shared pytest configuration for backend tests."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+# Application modules import each other as top-level modules (``from database
+# import ...``) because the container runs them from ``/app``; mirror that here
+# so tests and the app share a single copy of each module.
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
+
+# Fixtures build and drop the schema themselves; migrations are tested on
+# their own database in test_migrations.py.
+os.environ.setdefault("DATABASE_AUTO_MIGRATE", "false")
+# Many tests log in from the same client; rate limiting is enabled per test
+os.environ.setdefault("LOGIN_RATE_LIMIT_ENABLED", "false")
+# Tests sync right after sending; the settle window is exercised on its own
+os.environ.setdefault("INBOX_SETTLE_MS", "0")
+
+from database import Base, SessionLocal, engine  # noqa: E402
+from main import app  # noqa: E402
+
+
+@pytest.fixture(scope="function")
+def db_session():
+    """Create a fresh database session for each test."""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def client(db_session: Session):
+    """Create test client sharing the test database with ``db_session``."""
+    # Handlers use the async engine on the same database; rows committed
+    # through db_session are visible to them and vice versa.
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,134 @@
+"""Tests for chunked attachment encryption and the attachment endpoints."""
+
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from fastapi.testclient import TestClient
+
+import attachments
+from attachments import parse_range
+from crypto.stream import StreamDecryptor, StreamEncryptor, ciphertext_size, new_stream_key
+
+
+def _seal(data: bytes, chunk_size: int, pieces: int = 7) -> tuple[bytes, bytes, list[bytes]]:
+    key, prefix = new_stream_key()
+    encryptor = StreamEncryptor(key, prefix, chunk_size)
+    chunks = []
+    step = max(1, len(data) // pieces)
+    for i in range(0, len(data), step):
+        chunks.extend(encryptor.update(data[i : i + step]))
+    chunks.append(encryptor.finish())
+    return key, prefix, chunks
+
+
+@pytest.mark.parametrize("size", [0, 5, 16, 32, 100])
+def test_stream_roundtrip(size):
+    """Chunks decrypt back to the input, whatever the size and write pattern."""
+    data = os.urandom(size)
+    key, prefix, chunks = _seal(data, chunk_size=16)
+    decryptor = StreamDecryptor(key, prefix, 16, size)
+
+    assert len(chunks) == decryptor.chunks
+    assert sum(map(len, chunks)) == ciphertext_size(size, 16)
+    assert b"".join(decryptor.open_chunk(i, c) for i, c in enumerate(chunks)) == data
+
+
+def test_stream_detects_truncation_and_reordering():
+    """Dropping the final chunk or swapping chunks fails authentication."""
+    key, prefix, chunks = _seal(os.urandom(48), chunk_size=16)
+
+    # Claiming the stream ended one chunk early makes chunk 2 the "last"
+    truncated = StreamDecryptor(key, prefix, 16, 48 - 16)
+    with pytest.raises(InvalidTag):
+        truncated.open_chunk(2, chunks[2])
+
+    decryptor = StreamDecryptor(key, prefix, 16, 48)
+    with pytest.raises(InvalidTag):
+        decryptor.open_chunk(0, chunks[1])
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=10-19", 100) == (10, 19)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-5", 100) == (95, 99)
+    assert parse_range("bytes=95-500", 100) == (95, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Store attachments in a temporary directory with tiny chunks."""
+    monkeypatch.setattr(attachments.settings, "attachment_storage_dir", str(tmp_path))
+    monkeypatch.setattr(attachments.settings, "attachment_chunk_size", 64)
+    monkeypatch.setattr(attachments.settings, "attachment_max_bytes", 4096)
+    return tmp_path
+
+
+def _register(client: TestClient, email: str) -> dict:
+    response = client.post(
+        "/api/auth/register",
+        json={"email": email, "password": "TestPassword123!", "display_name": "Files"},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_upload_and_download_attachment(client: TestClient, storage):
+    """An upload is stored encrypted and served whole or by range."""
+    owner = _register(client, "owner@example.com")
+    recipient = _register(client, "reader@example.com")
+    stranger = _register(client, "stranger@example.com")
+    data = os.urandom(1000)
+
+    response = client.post(
+        "/api/attachments",
+        params={"recipient_id": recipient["user_id"]},
+        content=data,
+        headers={
+            "Authorization": f"Bearer {owner['auth_token']}",
+            "Content-Type": "image/png",
+        },
+    )
+    assert response.status_code == 201
+    body = response.json()
+    assert body["size"] == 1000
+    stored = (storage / f"{body['attachment_id']}.bin").read_bytes()
+    assert data[:64] not in stored
+    assert len(stored) == ciphertext_size(1000, 64)
+
+    url = f"/api/attachments/{body['attachment_id']}"
+    reader = {"Authorization": f"Bearer {recipient['auth_token']}"}
+    full = client.get(url, headers=reader)
+    assert full.status_code == 200
+    assert full.content == data
+    assert full.headers["content-type"] == "image/png"
+
+    partial = client.get(url, headers={**reader, "Range": "bytes=100-299"})
+    assert partial.status_code == 206
+    assert partial.content == data[100:300]
+    assert partial.headers["content-range"] == "bytes 100-299/1000"
+
+    outside = client.get(url, headers={**reader, "Range": "bytes=1000-"})
+    assert outside.status_code == 416
+
+    other = client.get(url, headers={"Authorization": f"Bearer {stranger['auth_token']}"})
+    assert other.status_code == 404
+
+
+def test_upload_rejects_oversized_attachment(client: TestClient, storage):
+    """Bodies past the limit are refused and leave no file behind."""
+    owner = _register(client, "big@example.com")
+
+    response = client.post(
+        "/api/attachments",
+        params={"recipient_id": owner["user_id"]},
+        content=os.urandom(5000),
+        headers={"Authorization": f"Bearer {owner['auth_token']}"},
+    )
+
+    assert response.status_code == 413
+    assert list(storage.iterdir()) == []
@@ -1,40 +1,26 @@
 """Tests for /auth/login endpoint."""
 
 import pytest
+from argon2 import PasswordHasher
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from app.crypto.password import hash_password
-from app.db_models import User
-from app.database import Base, SessionLocal, engine, get_db
-from app.main import app
-from app.repositories import create_user
-
-
-@pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database session for each test."""
-    Base.metadata.create_all(bind=engine)
-    session = SessionLocal()
-    try:
-        yield session
-    finally:
-        session.close()
-        Base.metadata.drop_all(bind=engine)
-
-
-@pytest.fixture
-def client(db_session: Session):
-    """Create test client with database dependency override."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
-    app.dependency_overrides[get_db] = override_get_db
-    yield TestClient(app)
-    app.dependency_overrides.clear()
+from crypto.jwt import decode_jwt_token
+from crypto.password import (
+    hash_password,
+    password_needs_rehash,
+    password_verify_stats,
+    verify_password,
+)
+from crypto.pqc import (
+    derive_session_binding,
+    encapsulate,
+    encode_key_base64,
+    generate_kem_keypair,
+    get_kem_registry,
+)
+from db_models import User
+from repositories import create_user
 
 
 @pytest.fixture
@@ -49,6 +35,20 @@ def test_user(db_session: Session):
     return user
 
 
+@pytest.fixture
+def pqc_user(db_session: Session):
+    """Create a test user with a server-side ML-KEM keypair."""
+    keypair, _ = generate_kem_keypair()
+    user = create_user(
+        db_session,
+        email="pqc@example.com",
+        password_hash=hash_password("TestPassword123!"),
+        pqc_public_key=keypair.public_key,
+        pqc_private_blob=keypair.private_key,
+    )
+    return user, keypair
+
+
 def test_login_success(client: TestClient, test_user: User):
     """Test successful login returns JWT token and redirect."""
     response = client.post(
@@ -80,6 +80,21 @@ def test_login_invalid_email(client: TestClient, test_user: User):
     assert "Invalid credentials" in response.json()["detail"]
 
 
+def test_login_invalid_email_spends_dummy_verify(client: TestClient, test_user: User):
+    """Unknown emails cost one dummy Argon2 verification, like wrong passwords."""
+    before = password_verify_stats()
+
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "nonexistent@example.com", "password": "TestPassword123!"},
+    )
+
+    after = password_verify_stats()
+    assert response.status_code == 401
+    assert after.dummy_verifies == before.dummy_verifies + 1
+    assert after.verifies == before.verifies + 1
+
+
 def test_login_invalid_password(client: TestClient, test_user: User):
     """Test login with invalid password returns 401."""
     response = client.post(
@@ -105,3 +120,102 @@ def test_login_missing_fields(client: TestClient):
     
     assert response.status_code == 422  # Validation error
 
+
+def test_login_kem_handshake_binds_session(client: TestClient, pqc_user):
+    """Test the client ciphertext is decapsulated and bound into the token."""
+    _, keypair = pqc_user
+    enc_result = encapsulate(keypair.public_key)
+
+    response = client.post(
+        "/api/auth/login",
+        json={
+            "email": "pqc@example.com",
+            "password": "TestPassword123!",
+            "kem_ciphertext": encode_key_base64(enc_result.ciphertext),
+        },
+    )
+
+    assert response.status_code == 200
+    claims = decode_jwt_token(response.json()["token"])
+    assert claims["kem"] == derive_session_binding(enc_result.shared_secret)
+
+
+def test_login_without_ciphertext_has_no_binding(client: TestClient, pqc_user):
+    """Test login without a ciphertext skips the KEM work entirely."""
+    response = client.post(
+        "/api/auth/login",
+        json={
+            "email": "pqc@example.com",
+            "password": "TestPassword123!",
+        },
+    )
+
+    assert response.status_code == 200
+    assert "kem" not in decode_jwt_token(response.json()["token"])
+
+
+def test_login_invalid_kem_ciphertext(client: TestClient, pqc_user):
+    """Test a malformed ciphertext returns 400."""
+    response = client.post(
+        "/api/auth/login",
+        json={
+            "email": "pqc@example.com",
+            "password": "TestPassword123!",
+            "kem_ciphertext": "not-base64!",
+        },
+    )
+
+    assert response.status_code == 400
+
+
+def test_login_kem_handshake_uses_stored_algorithm(client: TestClient, db_session: Session):
+    """A key tagged with a non-default ML-KEM variant decapsulates with that variant."""
+    algorithm = next(
+        (name for name in get_kem_registry().names() if name != get_kem_registry().default),
+        None,
+    )
+    if algorithm is None:
+        pytest.skip("liboqs build has a single ML-KEM variant")
+    keypair, _ = generate_kem_keypair(algorithm)
+    create_user(
+        db_session,
+        email="kem1024@example.com",
+        password_hash=hash_password("TestPassword123!"),
+        pqc_public_key=keypair.public_key,
+        pqc_private_blob=keypair.private_key,
+        pqc_algorithm=algorithm,
+    )
+    enc_result = encapsulate(keypair.public_key, algorithm)
+
+    response = client.post(
+        "/api/auth/login",
+        json={
+            "email": "kem1024@example.com",
+            "password": "TestPassword123!",
+            "kem_ciphertext": encode_key_base64(enc_result.ciphertext),
+        },
+    )
+
+    assert response.status_code == 200
+    claims = decode_jwt_token(response.json()["token"])
+    assert claims["kem"] == derive_session_binding(enc_result.shared_secret)
+
+
+def test_login_upgrades_stale_password_hash(client: TestClient, db_session: Session):
+    """A hash made with outdated Argon2 parameters is replaced after login."""
+    weak = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1)
+    user = create_user(
+        db_session,
+        email="stale@example.com",
+        password_hash=weak.hash("TestPassword123!"),
+    )
+
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "stale@example.com", "password": "TestPassword123!"},
+    )
+
+    assert response.status_code == 200
+    db_session.refresh(user)
+    assert not password_needs_rehash(user.password_hash)
+    assert verify_password("TestPassword123!", user.password_hash)
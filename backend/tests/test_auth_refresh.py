@@ -0,0 +1,78 @@
+"""Tests for /auth/refresh and /auth/logout endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from crypto.jwt import decode_jwt_token
+from crypto.password import hash_password
+from repositories import create_user
+
+
+@pytest.fixture
+def login(client: TestClient, db_session: Session) -> dict:
+    """Create a user and log in, returning the login response body."""
+    user = create_user(
+        db_session,
+        email="refresh@example.com",
+        password_hash=hash_password("TestPassword123!"),
+    )
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "refresh@example.com", "password": "TestPassword123!"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    data["user_id"] = str(user.id)
+    return data
+
+
+def test_login_issues_refresh_token(login: dict):
+    """Login returns a short-lived JWT alongside an opaque refresh token."""
+    assert login["refresh_token"]
+    claims = decode_jwt_token(login["token"])
+    assert claims["exp"] - claims["iat"] <= 15 * 60
+
+
+def test_refresh_rotates_token(client: TestClient, login: dict):
+    """Refreshing returns a new token pair for the same user."""
+    response = client.post(
+        "/api/auth/refresh", json={"refresh_token": login["refresh_token"]}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["refresh_token"] != login["refresh_token"]
+    assert decode_jwt_token(data["token"])["sub"] == login["user_id"]
+
+
+def test_refresh_reuse_revokes_family(client: TestClient, login: dict):
+    """Replaying a rotated refresh token revokes its successor too."""
+    first = client.post(
+        "/api/auth/refresh", json={"refresh_token": login["refresh_token"]}
+    ).json()
+
+    replay = client.post("/api/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert replay.status_code == 401
+
+    successor = client.post("/api/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert successor.status_code == 401
+
+
+def test_refresh_unknown_token(client: TestClient, db_session: Session):
+    """Unknown refresh tokens are rejected."""
+    response = client.post("/api/auth/refresh", json={"refresh_token": "not-a-token"})
+
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Invalid refresh token."
+
+
+def test_logout_revokes_refresh_token(client: TestClient, login: dict):
+    """A refresh token cannot be used after logout."""
+    response = client.post("/api/auth/logout", json={"refresh_token": login["refresh_token"]})
+    assert response.status_code == 204
+
+    response = client.post(
+        "/api/auth/refresh", json={"refresh_token": login["refresh_token"]}
+    )
+    assert response.status_code == 401
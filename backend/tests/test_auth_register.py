@@ -0,0 +1,88 @@
+"""Tests for /auth/register endpoint."""
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from crypto.pqc import decode_key_base64, encode_key_base64, generate_kem_keypair
+from repositories import find_user_by_email, get_public_key, get_user_key_material
+
+
+def test_register_success(client: TestClient, db_session: Session):
+    """Test registration stores the user with a server-generated keypair."""
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "email": "new@example.com",
+            "password": "TestPassword123!",
+            "display_name": "New User",
+            "generate_on_device": False,
+        },
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    assert len(data["auth_token"]) > 0
+    assert data["public_key"] is not None
+    assert data["key_id"] is not None
+
+    user = find_user_by_email(db_session, "new@example.com")
+    assert str(user.id) == data["user_id"]
+    assert user.display_name == "New User"
+    record = get_public_key(db_session, key_id=data["key_id"])
+    assert record.user_id == user.id
+    assert record.public_key == decode_key_base64(data["public_key"])
+
+
+def test_register_generate_on_device_stores_client_public_key(
+    client: TestClient, db_session: Session
+):
+    """Test on-device registration publishes the client's key without a private blob."""
+    keypair, algorithm = generate_kem_keypair()
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "email": "device@example.com",
+            "password": "TestPassword123!",
+            "display_name": "Device User",
+            "generate_on_device": True,
+            "public_key": encode_key_base64(keypair.public_key),
+        },
+    )
+
+    assert response.status_code == 201
+    data = response.json()
+    record = get_public_key(db_session, key_id=data["key_id"])
+    assert record.public_key == keypair.public_key
+    assert record.algorithm == algorithm
+    assert data["public_key"] == encode_key_base64(keypair.public_key)
+    keys = get_user_key_material(db_session, data["user_id"])
+    assert keys.private_key is None
+
+
+def test_register_generate_on_device_requires_valid_public_key(client: TestClient):
+    """Test on-device registration rejects a missing or wrongly sized public key."""
+    payload = {
+        "email": "device@example.com",
+        "password": "TestPassword123!",
+        "display_name": "Device User",
+        "generate_on_device": True,
+    }
+    assert client.post("/api/auth/register", json=payload).status_code == 400
+
+    payload["public_key"] = encode_key_base64(b"short")
+    assert client.post("/api/auth/register", json=payload).status_code == 400
+
+
+def test_register_duplicate_email(client: TestClient):
+    """Test registering an existing email returns 409."""
+    payload = {
+        "email": "dup@example.com",
+        "password": "TestPassword123!",
+        "display_name": "Dup",
+    }
+    assert client.post("/api/auth/register", json=payload).status_code == 201
+
+    response = client.post("/api/auth/register", json=payload)
+
+    assert response.status_code == 409
+    assert "already registered" in response.json()["detail"]
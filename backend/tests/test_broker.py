@@ -0,0 +1,60 @@
+"""Tests for the local and database-backed delivery brokers."""
+
+import asyncio
+import uuid
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from broker import DatabaseBroker, LocalBroker
+from database import Base
+
+
+def test_local_broker_delivers_immediately():
+    """Test the local broker hands events straight to the callback."""
+    received = []
+    recipient = uuid.uuid4()
+
+    async def scenario():
+        broker = LocalBroker()
+        await broker.start(lambda user_id, event: received.append((user_id, event)))
+        await broker.publish(recipient, {"n": 1})
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+    assert received == [(recipient, {"n": 1})]
+
+
+def test_database_broker_relays_between_processes(tmp_path):
+    """Test events published by one broker reach another exactly once."""
+    recipient = uuid.uuid4()
+    received: dict[str, list] = {"a": [], "b": []}
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        def make_broker():
+            return DatabaseBroker(sessions, poll_interval=0.01, retention=60, settle=1)
+
+        broker_a, broker_b = make_broker(), make_broker()
+        await broker_a.start(lambda user_id, event: received["a"].append(event))
+        await broker_b.start(lambda user_id, event: received["b"].append(event))
+
+        await broker_a.publish(recipient, {"n": 1})
+        for _ in range(100):
+            if received["b"]:
+                break
+            await asyncio.sleep(0.01)
+        # Let several polls re-read the settle window
+        await asyncio.sleep(0.05)
+
+        await broker_a.stop()
+        await broker_b.stop()
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+    assert received == {"a": [{"n": 1}], "b": [{"n": 1}]}
@@ -0,0 +1,48 @@
+"""Tests for the in-process TTL/LRU cache."""
+
+import time
+
+from cache import TTLCache
+
+
+def test_cache_evicts_least_recently_used():
+    """Test the oldest untouched entry is evicted when full."""
+    evicted = []
+    cache = TTLCache(maxsize=2, ttl=60, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert evicted == ["b"]
+    assert cache.stats().evictions == 1
+
+
+def test_cache_entries_expire():
+    """Test entries are dropped once their TTL passes."""
+    evicted = []
+    cache = TTLCache(maxsize=10, ttl=60, on_evict=lambda key, value: evicted.append(value))
+    cache.set("short", "value", ttl=0.01)
+
+    time.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert evicted == ["value"]
+    assert cache.stats().misses == 1
+
+
+def test_cache_pop_and_clear_notify():
+    """Test invalidation reports every removed entry."""
+    evicted = []
+    cache = TTLCache(maxsize=10, ttl=60, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    cache.clear()
+
+    assert evicted == ["a", "b"]
+    assert len(cache) == 0
@@ -0,0 +1,27 @@
+"""Tests for environment-driven settings."""
+
+import pytest
+
+from config import Settings
+
+
+def test_legacy_jwt_expiration_hours_is_converted(monkeypatch):
+    """JWT_EXPIRATION_HOURS still sets the lifetime, with a deprecation warning."""
+    monkeypatch.delenv("JWT_EXPIRATION_MINUTES", raising=False)
+    monkeypatch.setenv("JWT_EXPIRATION_HOURS", "2")
+
+    with pytest.warns(FutureWarning, match="JWT_EXPIRATION_HOURS"):
+        settings = Settings(_env_file=None)
+
+    assert settings.jwt_expiration_minutes == 120
+
+
+def test_jwt_expiration_minutes_wins_over_hours(monkeypatch):
+    """When both are set, the minutes setting is used and the hours one is flagged."""
+    monkeypatch.setenv("JWT_EXPIRATION_MINUTES", "10")
+    monkeypatch.setenv("JWT_EXPIRATION_HOURS", "2")
+
+    with pytest.warns(FutureWarning, match="ignored"):
+        settings = Settings(_env_file=None)
+
+    assert settings.jwt_expiration_minutes == 10
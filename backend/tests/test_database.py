@@ -0,0 +1,52 @@
+"""Tests for engine configuration, Postgres options and the SQLite tuning profile."""
+
+import pytest
+
+from database import _engine_options, async_database_url, engine, settings, sync_database_url
+
+
+def test_sqlite_pragmas_applied_on_connect():
+    """Test new connections pick up the tuned SQLite profile."""
+    if engine.dialect.name != "sqlite":
+        pytest.skip("SQLite tuning only applies to SQLite databases")
+
+    with engine.connect() as connection:
+        pragma = connection.exec_driver_sql
+        assert pragma("PRAGMA journal_mode").scalar() == "wal"
+        assert pragma("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert pragma("PRAGMA busy_timeout").scalar() == 5000
+
+
+def test_async_database_url_maps_drivers():
+    """Test sync URLs are mapped to their async drivers."""
+    assert async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert (
+        async_database_url("postgresql://user:pw@db:5432/app")
+        == "postgresql+asyncpg://user:pw@db:5432/app"
+    )
+    with pytest.raises(ValueError):
+        async_database_url("mysql://db/app")
+
+
+def test_sync_database_url_picks_psycopg_for_postgres():
+    """Test bare Postgres URLs use psycopg while explicit drivers are kept."""
+    assert (
+        sync_database_url("postgresql://user:pw@db:5432/app")
+        == "postgresql+psycopg://user:pw@db:5432/app"
+    )
+    assert sync_database_url("postgresql+psycopg2://db/app") == "postgresql+psycopg2://db/app"
+    assert sync_database_url("sqlite:///./app.db") == "sqlite:///./app.db"
+
+
+def test_postgres_engine_options_size_pool_and_prepare_statements():
+    """Test Postgres engines get pool sizing and prepared statement caching."""
+    options = _engine_options("postgresql+asyncpg://db/app")
+
+    assert options["pool_size"] == settings.database_pool_size
+    assert options["max_overflow"] == settings.database_max_overflow
+    assert options["pool_pre_ping"] is settings.database_pool_pre_ping
+    assert options["pool_recycle"] == settings.database_pool_recycle
+    assert options["connect_args"] == {
+        "prepared_statement_cache_size": settings.database_statement_cache_size
+    }
+    assert "prepare_threshold" in _engine_options("postgresql+psycopg://db/app")["connect_args"]
@@ -0,0 +1,89 @@
+"""Tests for WebSocket push delivery and the fan-out hub."""
+
+import asyncio
+import base64
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from hub import DeliveryHub
+
+
+def _register(client: TestClient, email: str) -> dict:
+    response = client.post(
+        "/api/auth/register",
+        json={"email": email, "password": "TestPassword123!", "display_name": "Listener"},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_websocket_rejects_missing_token(client: TestClient):
+    """Test sockets without a valid JWT are closed before accept."""
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with client.websocket_connect("/api/ws?token=invalid") as websocket:
+            websocket.receive_json()
+    assert exc_info.value.code == 1008
+
+
+def test_sent_message_is_pushed_to_recipient(client: TestClient):
+    """Test a committed message is pushed to the recipient's socket."""
+    sender = _register(client, "push-sender@example.com")
+    recipient = _register(client, "push-recipient@example.com")
+
+    with client.websocket_connect(f"/api/ws?token={recipient['auth_token']}") as websocket:
+        response = client.post(
+            "/api/messages/send",
+            json={
+                "recipient_id": recipient["user_id"],
+                "message_body": base64.b64encode(b"sealed").decode(),
+                "public_key_id": recipient["key_id"],
+            },
+            headers={"Authorization": f"Bearer {sender['auth_token']}"},
+        )
+        assert response.status_code == 201
+        event = websocket.receive_json()
+
+    assert event["type"] == "message"
+    assert event["envelope"]["message_id"] == response.json()["message_id"]
+    assert event["envelope"]["sender_id"] == sender["user_id"]
+    assert base64.b64decode(event["envelope"]["message_body"]) == b"sealed"
+
+
+class _StalledSocket:
+    """WebSocket stand-in whose peer never reads or sends."""
+
+    def __init__(self):
+        self.close_code = None
+
+    async def receive(self):
+        await asyncio.Event().wait()
+
+    async def send_json(self, data):
+        await asyncio.Event().wait()
+
+    async def close(self, code: int, reason: str = ""):
+        self.close_code = code
+
+
+def test_slow_consumer_is_evicted():
+    """Test a connection whose queue fills up is closed and unregistered."""
+    hub = DeliveryHub(queue_size=2, send_timeout=60)
+    user_id = uuid.uuid4()
+    websocket = _StalledSocket()
+
+    async def scenario():
+        serving = asyncio.create_task(hub.serve(user_id, websocket))
+        await asyncio.sleep(0)
+        # One event is stuck in send, two fill the queue, the next overflows
+        queued = [hub.publish(user_id, {"n": n}) for n in range(5)]
+        await asyncio.wait_for(serving, timeout=1)
+        return queued
+
+    queued = asyncio.run(scenario())
+
+    assert queued[0] == 1 and queued[-1] == 0
+    assert websocket.close_code == 1013
+    assert hub.stats() == (0, 0, 0, 1)
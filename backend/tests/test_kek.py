@@ -0,0 +1,199 @@
+"""Tests for private key envelope encryption."""
+
+import os
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import crypto.kek as kek_module
+from crypto.jwt import decode_jwt_token
+from crypto.kek import (
+    clear_private_key_cache,
+    load_kek_file,
+    private_key_cache_stats,
+    unwrap_private_key,
+    wrap_private_key,
+    wrapped_kid,
+)
+from crypto.password import hash_password
+from crypto.pqc import (
+    derive_session_binding,
+    encapsulate,
+    encode_key_base64,
+    generate_kem_keypair,
+)
+from db_models import User
+from kek_cli import main, rewrap_all
+from repositories import create_user
+
+
+@pytest.fixture
+def kek_file(tmp_path, monkeypatch):
+    """Configure a KEK file with a single active key."""
+    path = tmp_path / "kek.json"
+    main(["generate", "--file", str(path), "--kid", "first"])
+    monkeypatch.setattr(kek_module, "get_kek_ring", lambda: load_kek_file(path))
+    clear_private_key_cache()
+    yield path
+    clear_private_key_cache()
+
+
+def test_wrap_roundtrip(kek_file):
+    """A wrapped key unwraps to the original bytes for the same user."""
+    user_id = uuid.uuid4()
+    blob = wrap_private_key(user_id, b"k" * 64)
+
+    assert wrapped_kid(blob) == "first"
+    assert b"k" * 64 not in blob
+    with unwrap_private_key(user_id, blob) as private_key:
+        assert private_key == b"k" * 64
+
+
+def test_unwrap_for_other_user_fails(kek_file):
+    """A blob copied onto another user's row does not unwrap."""
+    blob = wrap_private_key(uuid.uuid4(), b"k" * 64)
+
+    with pytest.raises(ValueError):
+        with unwrap_private_key(uuid.uuid4(), blob):
+            pass
+
+
+def test_raw_blob_passes_through(kek_file):
+    """Keys stored before wrapping are used as-is."""
+    with unwrap_private_key(uuid.uuid4(), b"raw-key") as private_key:
+        assert private_key == b"raw-key"
+
+
+def test_no_kek_stores_raw(monkeypatch):
+    """Without a KEK file, keys are stored unwrapped."""
+    monkeypatch.setattr(kek_module, "get_kek_ring", lambda: None)
+
+    assert wrap_private_key(uuid.uuid4(), b"raw-key") == b"raw-key"
+
+
+def test_unwrapped_keys_are_cached_and_zeroed(kek_file):
+    """Repeat unwraps hit the cache and evicted keys are zeroed."""
+    user_id = uuid.uuid4()
+    blob = wrap_private_key(user_id, b"k" * 64)
+    before = private_key_cache_stats()
+
+    with unwrap_private_key(user_id, blob) as first:
+        pass
+    with unwrap_private_key(user_id, blob) as second:
+        pass
+
+    assert second is first
+    assert private_key_cache_stats().hits == before.hits + 1
+    clear_private_key_cache()
+    assert first == bytes(64)
+
+
+def test_key_evicted_while_in_use_is_not_zeroed(kek_file):
+    """Eviction during a lease leaves the key intact until the lease ends."""
+    user_id = uuid.uuid4()
+    blob = wrap_private_key(user_id, b"k" * 64)
+
+    with unwrap_private_key(user_id, blob) as private_key:
+        clear_private_key_cache()
+        assert private_key == b"k" * 64
+        # A fresh unwrap gets its own copy rather than the evicted one
+        with unwrap_private_key(user_id, blob) as other:
+            assert other is not private_key
+            assert other == b"k" * 64
+        clear_private_key_cache()
+        assert private_key == b"k" * 64
+        assert other == bytes(64)
+    assert private_key == bytes(64)
+
+
+def test_rotated_kek_still_unwraps_and_rewraps(kek_file, db_session: Session):
+    """Blobs under a retired KEK unwrap, and rewrap moves them to the active one."""
+    user = create_user(
+        db_session,
+        email="kek@example.com",
+        password_hash=hash_password("TestPassword123!"),
+        pqc_public_key=b"p" * 32,
+        pqc_private_blob=b"k" * 64,
+    )
+    main(["generate", "--file", str(kek_file), "--kid", "second", "--activate"])
+
+    assert rewrap_all() == 1
+    db_session.expire_all()
+    blob = db_session.execute(select(User.pqc_private_blob)).scalar_one()
+    assert wrapped_kid(blob) == "second"
+    with unwrap_private_key(user.id, blob) as private_key:
+        assert private_key == b"k" * 64
+
+
+def test_login_with_wrapped_private_key(kek_file, client: TestClient, db_session: Session):
+    """The login handshake decapsulates with a KEK-wrapped stored key."""
+    keypair, _ = generate_kem_keypair()
+    create_user(
+        db_session,
+        email="kek@example.com",
+        password_hash=hash_password("TestPassword123!"),
+        pqc_public_key=keypair.public_key,
+        pqc_private_blob=keypair.private_key,
+    )
+    blob = db_session.execute(select(User.pqc_private_blob)).scalar_one()
+    assert wrapped_kid(blob) == "first"
+
+    enc_result = encapsulate(keypair.public_key)
+    response = client.post(
+        "/api/auth/login",
+        json={
+            "email": "kek@example.com",
+            "password": "TestPassword123!",
+            "kem_ciphertext": encode_key_base64(enc_result.ciphertext),
+        },
+    )
+
+    assert response.status_code == 200
+    claims = decode_jwt_token(response.json()["token"])
+    assert claims["kem"] == derive_session_binding(enc_result.shared_secret)
+
+
+def test_login_with_unwrappable_key_is_server_error(
+    kek_file, client: TestClient, db_session: Session, monkeypatch
+):
+    """A key that no configured KEK opens is reported as a 500, not a bad ciphertext."""
+    keypair, _ = generate_kem_keypair()
+    create_user(
+        db_session,
+        email="kek@example.com",
+        password_hash=hash_password("TestPassword123!"),
+        pqc_public_key=keypair.public_key,
+        pqc_private_blob=keypair.private_key,
+    )
+    other = kek_file.with_name("other.json")
+    main(["generate", "--file", str(other), "--kid", "other"])
+    monkeypatch.setattr(kek_module, "get_kek_ring", lambda: load_kek_file(other))
+
+    response = client.post(
+        "/api/auth/login",
+        json={
+            "email": "kek@example.com",
+            "password": "TestPassword123!",
+            "kem_ciphertext": encode_key_base64(encapsulate(keypair.public_key).ciphertext),
+        },
+    )
+
+    assert response.status_code == 500
+
+
+def test_generate_writes_owner_only_file(tmp_path):
+    """The KEK CLI never leaves KEKs readable by others, even with umask 0."""
+    path = tmp_path / "kek.json"
+    previous = os.umask(0)
+    try:
+        main(["generate", "--file", str(path), "--kid", "first"])
+        main(["generate", "--file", str(path), "--kid", "second", "--activate"])
+    finally:
+        os.umask(previous)
+
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == ["kek.json"]
+    assert load_kek_file(path).active == "second"
@@ -0,0 +1,125 @@
+"""Tests for the kid-tagged JWT keyring and asymmetric signing modes."""
+
+import json
+import os
+import uuid
+
+import jwt
+import pytest
+
+import crypto.jwt as jwt_module
+from crypto.keyring import (
+    ENABLED_ML_DSA_ALGORITHMS,
+    MLDSAAlgorithm,
+    generate_key_entry,
+    load_keyring_file,
+    main,
+    public_keyring,
+)
+
+ALGORITHMS = [
+    "HS256",
+    "EdDSA",
+    pytest.param(
+        "ML-DSA-65",
+        marks=pytest.mark.skipif(
+            "ML-DSA-65" not in ENABLED_ML_DSA_ALGORITHMS,
+            reason="ML-DSA-65 not enabled in liboqs",
+        ),
+    ),
+]
+
+
+def _write_keyring(path, entries, active):
+    path.write_text(json.dumps({"active": active, "keys": entries}))
+    return load_keyring_file(path)
+
+
+@pytest.mark.parametrize("algorithm", ALGORITHMS)
+def test_tokens_round_trip_with_kid(tmp_path, monkeypatch, algorithm):
+    """Test tokens are signed by the active key and carry its kid."""
+    keyring = _write_keyring(
+        tmp_path / "keyring.json", [generate_key_entry(algorithm, "k1")], "k1"
+    )
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: keyring)
+    user_id = uuid.uuid4()
+
+    token = jwt_module.create_jwt_token(user_id)
+
+    assert jwt.get_unverified_header(token) == {"alg": algorithm, "kid": "k1", "typ": "JWT"}
+    assert jwt_module.decode_jwt_token(token)["sub"] == str(user_id)
+
+
+def test_rotation_keeps_old_tokens_valid(tmp_path, monkeypatch):
+    """Test tokens signed by a retired key verify until it is removed."""
+    path = tmp_path / "keyring.json"
+    old_entry = generate_key_entry("EdDSA", "old")
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: _write_keyring(path, [old_entry], "old"))
+    old_token = jwt_module.create_jwt_token(uuid.uuid4())
+
+    new_entry = generate_key_entry("EdDSA", "new")
+    rotated = _write_keyring(path, [old_entry, new_entry], "new")
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: rotated)
+    new_token = jwt_module.create_jwt_token(uuid.uuid4())
+
+    assert jwt.get_unverified_header(new_token)["kid"] == "new"
+    assert jwt_module.decode_jwt_token(old_token) is not None
+    removed = _write_keyring(path, [new_entry], "new")
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: removed)
+    assert jwt_module.decode_jwt_token(old_token) is None
+
+
+def test_public_keyring_verifies_but_cannot_sign(tmp_path, monkeypatch):
+    """Test an exported public keyring verifies tokens without private keys."""
+    entry = generate_key_entry("EdDSA", "edge")
+    signer = _write_keyring(tmp_path / "full.json", [entry], "edge")
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: signer)
+    token = jwt_module.create_jwt_token(uuid.uuid4())
+
+    public = public_keyring({"active": "edge", "keys": [entry]})
+    assert "private_key" not in public["keys"][0]
+    verifier = _write_keyring(tmp_path / "public.json", public["keys"], None)
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: verifier)
+
+    assert jwt_module.decode_jwt_token(token) is not None
+    with pytest.raises(RuntimeError):
+        jwt_module.create_jwt_token(uuid.uuid4())
+
+
+def test_kid_pins_algorithm(tmp_path, monkeypatch):
+    """Test unknown kids and algorithms other than the key's are rejected."""
+    entry = generate_key_entry("EdDSA", "ed")
+    keyring = _write_keyring(tmp_path / "keyring.json", [entry], "ed")
+    monkeypatch.setattr(jwt_module, "get_keyring", lambda: keyring)
+    claims = {"sub": str(uuid.uuid4()), "exp": 4102444800}
+
+    forged = jwt.encode(claims, entry["public_key"], algorithm="HS256", headers={"kid": "ed"})
+    unknown = jwt.encode(claims, "secret-" * 6, algorithm="HS256", headers={"kid": "missing"})
+
+    assert jwt_module.decode_jwt_token(forged) is None
+    assert jwt_module.decode_jwt_token(unknown) is None
+
+
+def test_generate_writes_owner_only_file(tmp_path):
+    """The keyring CLI never leaves secret keys readable by others, even with umask 0."""
+    path = tmp_path / "keyring.json"
+    previous = os.umask(0)
+    try:
+        main(["generate", "--file", str(path), "--alg", "HS256", "--kid", "a", "--activate"])
+        main(["generate", "--file", str(path), "--alg", "HS256", "--kid", "b"])
+    finally:
+        os.umask(previous)
+
+    assert path.stat().st_mode & 0o777 == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == ["keyring.json"]
+    assert load_keyring_file(path).active.kid == "a"
+
+
+def test_ml_dsa_keys_refuse_jwk_conversion():
+    """ML-DSA keys have no JWK form, so conversion fails with a JWT key error."""
+    algorithm = MLDSAAlgorithm("ML-DSA-65")
+
+    with pytest.raises(jwt.exceptions.InvalidKeyError, match="no JWK representation"):
+        algorithm.to_jwk(b"key")
+    with pytest.raises(jwt.exceptions.InvalidKeyError, match="no JWK representation"):
+        algorithm.from_jwk({"kty": "AKP", "alg": "ML-DSA-65"})
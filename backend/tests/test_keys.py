@@ -0,0 +1,54 @@
+"""Tests for the public key directory endpoints."""
+
+from fastapi.testclient import TestClient
+
+from crypto.pqc import decode_key_base64
+
+
+def _register(client: TestClient, email: str) -> dict:
+    response = client.post(
+        "/api/auth/register",
+        json={
+            "email": email,
+            "password": "TestPassword123!",
+            "display_name": "Key Owner",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def test_lookup_public_key_by_id_and_user(client: TestClient):
+    """Test a registered key can be resolved by key ID and by user ID."""
+    registered = _register(client, "lookup@example.com")
+
+    by_key = client.get(f"/api/keys/{registered['key_id']}")
+    by_user = client.get(f"/api/keys/users/{registered['user_id']}")
+
+    assert by_key.status_code == 200
+    assert by_key.json() == by_user.json()
+    assert decode_key_base64(by_key.json()["public_key"]) == decode_key_base64(
+        registered["public_key"]
+    )
+
+
+def test_rotate_key_requires_token(client: TestClient):
+    """Test rotation rejects unauthenticated callers."""
+    assert client.post("/api/keys/rotate").status_code == 401
+
+
+def test_rotate_key_replaces_current_key(client: TestClient):
+    """Test rotation publishes a new current key and expires the old one."""
+    registered = _register(client, "rotate@example.com")
+
+    response = client.post(
+        "/api/keys/rotate",
+        headers={"Authorization": f"Bearer {registered['auth_token']}"},
+    )
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["key_id"] != registered["key_id"]
+    current = client.get(f"/api/keys/users/{registered['user_id']}").json()
+    assert current["key_id"] == rotated["key_id"]
+    assert client.get(f"/api/keys/{registered['key_id']}").json()["expires_at"] is not None
@@ -0,0 +1,188 @@
+"""Tests for the message send and inbox endpoints and the group-commit writer."""
+
+import asyncio
+import base64
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+import messages
+from db_models import Message
+from group_commit import GroupCommitWriter
+
+
+def _register(client: TestClient, email: str) -> dict:
+    response = client.post(
+        "/api/auth/register",
+        json={"email": email, "password": "TestPassword123!", "display_name": "Messenger"},
+    )
+    assert response.status_code == 201
+    return response.json()
+
+
+def _envelope(recipient: dict, **overrides) -> dict:
+    envelope = {
+        "recipient_id": recipient["user_id"],
+        "message_body": base64.b64encode(b"\x00aead-ciphertext").decode(),
+        "public_key_id": recipient["key_id"],
+        "kem_ciphertext": base64.b64encode(b"kem").decode(),
+    }
+    envelope.update(overrides)
+    return envelope
+
+
+def test_send_message_stores_binary_envelope(client: TestClient, db_session: Session):
+    """Test a sent envelope is stored with its fields decoded to bytes."""
+    sender = _register(client, "sender@example.com")
+    recipient = _register(client, "recipient@example.com")
+
+    response = client.post(
+        "/api/messages/send",
+        json=_envelope(recipient, auth_token=sender["auth_token"]),
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["signature_valid"] is False
+    message = db_session.query(Message).one()
+    assert str(message.id) == body["message_id"]
+    assert str(message.sender_id) == sender["user_id"]
+    assert message.payload == b"\x00aead-ciphertext"
+    assert message.kem_ciphertext == b"kem"
+
+
+def test_send_message_rejects_bad_requests(client: TestClient):
+    """Test missing tokens, unknown recipients and bad base64 are rejected."""
+    sender = _register(client, "bad-sender@example.com")
+    recipient = _register(client, "bad-recipient@example.com")
+    headers = {"Authorization": f"Bearer {sender['auth_token']}"}
+
+    assert client.post("/api/messages/send", json=_envelope(recipient)).status_code == 401
+    unknown = dict(recipient, user_id="00000000-0000-0000-0000-000000000000")
+    assert (
+        client.post("/api/messages/send", json=_envelope(unknown), headers=headers).status_code
+        == 404
+    )
+    garbled = _envelope(recipient, message_body="not base64!")
+    assert client.post("/api/messages/send", json=garbled, headers=headers).status_code == 400
+
+
+def test_send_message_rejects_foreign_or_unknown_key(client: TestClient):
+    """Test the key ID must name one of the recipient's keys."""
+    sender = _register(client, "key-sender@example.com")
+    recipient = _register(client, "key-recipient@example.com")
+    headers = {"Authorization": f"Bearer {sender['auth_token']}"}
+
+    foreign = _envelope(recipient, public_key_id=sender["key_id"])
+    unknown = _envelope(recipient, public_key_id="00000000-0000-0000-0000-000000000000")
+
+    for envelope in (foreign, unknown):
+        response = client.post("/api/messages/send", json=envelope, headers=headers)
+        assert response.status_code == 400
+
+
+def test_group_commit_batches_concurrent_submits():
+    """Test rows submitted together are written in one flush."""
+    flushed: list[list[int]] = []
+
+    async def flush(rows):
+        flushed.append(list(rows))
+
+    writer = GroupCommitWriter(flush, max_batch=100, max_delay=0.05, max_pending=100)
+
+    async def scenario():
+        await asyncio.gather(*(writer.submit(i) for i in range(10)))
+        await writer.stop()
+
+    asyncio.run(scenario())
+
+    assert flushed == [list(range(10))]
+    assert writer.stats().largest_batch == 10
+
+
+def test_group_commit_isolates_failed_rows():
+    """Test one failing row does not fail the rest of its batch."""
+
+    async def flush(rows):
+        if "bad" in rows:
+            raise ValueError("rejected")
+
+    writer = GroupCommitWriter(flush, max_batch=100, max_delay=0.05, max_pending=100)
+
+    async def scenario():
+        results = await asyncio.gather(
+            writer.submit("good"), writer.submit("bad"), return_exceptions=True
+        )
+        await writer.stop()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert results[0] is None
+    assert isinstance(results[1], ValueError)
+
+
+def _sync_inbox(client: TestClient, token: str, **params) -> tuple[list[dict], dict]:
+    response = client.get(
+        "/api/messages/inbox",
+        params=params,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    return [line["envelope"] for line in lines[:-1]], lines[-1]
+
+
+def test_inbox_pages_with_cursor(client: TestClient):
+    """Test the inbox returns messages in order and resumes from its cursor."""
+    sender = _register(client, "inbox-sender@example.com")
+    recipient = _register(client, "inbox-recipient@example.com")
+    headers = {"Authorization": f"Bearer {sender['auth_token']}"}
+    sent_ids = [
+        client.post("/api/messages/send", json=_envelope(recipient), headers=headers).json()[
+            "message_id"
+        ]
+        for _ in range(5)
+    ]
+
+    first, trailer = _sync_inbox(client, recipient["auth_token"], limit=3)
+    assert trailer["has_more"] is True
+    rest, trailer = _sync_inbox(client, recipient["auth_token"], since=trailer["cursor"], limit=3)
+    assert trailer["has_more"] is False
+    empty, final = _sync_inbox(client, recipient["auth_token"], since=trailer["cursor"])
+
+    assert sorted(e["message_id"] for e in first + rest) == sorted(sent_ids)
+    assert [e["created_at"] for e in first + rest] == sorted(e["created_at"] for e in first + rest)
+    assert empty == [] and final["cursor"] == trailer["cursor"]
+    assert _sync_inbox(client, sender["auth_token"])[0] == []
+
+
+def test_inbox_rejects_bad_cursor(client: TestClient):
+    """Test malformed cursors and missing tokens are rejected."""
+    recipient = _register(client, "cursor@example.com")
+
+    assert client.get("/api/messages/inbox").status_code == 401
+    response = client.get(
+        "/api/messages/inbox",
+        params={"since": "garbage"},
+        headers={"Authorization": f"Bearer {recipient['auth_token']}"},
+    )
+    assert response.status_code == 400
+
+
+def test_inbox_holds_back_unsettled_messages(client: TestClient, monkeypatch):
+    """Test messages newer than the settle window wait for a later sync."""
+    sender = _register(client, "settle-sender@example.com")
+    recipient = _register(client, "settle-recipient@example.com")
+    headers = {"Authorization": f"Bearer {sender['auth_token']}"}
+    sent = client.post("/api/messages/send", json=_envelope(recipient), headers=headers)
+
+    monkeypatch.setattr(messages.settings, "inbox_settle_ms", 60_000)
+    held, trailer = _sync_inbox(client, recipient["auth_token"])
+    assert held == [] and trailer["cursor"] is None
+
+    monkeypatch.setattr(messages.settings, "inbox_settle_ms", 0)
+    settled, _ = _sync_inbox(client, recipient["auth_token"])
+    assert [e["message_id"] for e in settled] == [sent.json()["message_id"]]
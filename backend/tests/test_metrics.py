@@ -0,0 +1,126 @@
+"""Tests for the /metrics endpoint and latency histograms."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from crypto.password import hash_password
+from crypto.pqc import encapsulate, generate_kem_keypair
+from metrics import OPERATION_LATENCY, QUERY_LATENCY, REQUEST_LATENCY, Histogram, timed
+from repositories import create_user
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and inclusive of their upper bound."""
+    histogram = Histogram("test_seconds", "Test latency", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+
+    lines = list(histogram.render())
+
+    assert 'test_seconds_bucket{op="a",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{op="a",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{op="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{op="a"} 4' in lines
+    assert 'test_seconds_sum{op="a"} 3.65' in lines
+
+
+def test_timed_records_coroutines_and_failures():
+    """Coroutines are timed when awaited and failed calls still count."""
+    histogram = Histogram("test_seconds", "Test latency", ("op",))
+
+    @timed(histogram, "ok")
+    async def succeed():
+        return 1
+
+    @timed(histogram, "fail")
+    def fail():
+        raise ValueError
+
+    assert asyncio.run(succeed()) == 1
+    try:
+        fail()
+    except ValueError:
+        pass
+
+    assert histogram.count("ok") == 1
+    assert histogram.count("fail") == 1
+
+
+def test_login_records_route_and_hot_path_timings(client: TestClient, db_session: Session):
+    """A login is timed by route template, Argon2, JWT and repository lookups."""
+    create_user(db_session, email="metrics@example.com", password_hash=hash_password("Secret123!"))
+    before = (
+        REQUEST_LATENCY.count("POST", "/api/auth/login", "200"),
+        OPERATION_LATENCY.count("verify_password"),
+        OPERATION_LATENCY.count("create_jwt_token"),
+        QUERY_LATENCY.count("find_user_by_email_async"),
+    )
+
+    response = client.post(
+        "/api/auth/login", json={"email": "metrics@example.com", "password": "Secret123!"}
+    )
+
+    assert response.status_code == 200
+    after = (
+        REQUEST_LATENCY.count("POST", "/api/auth/login", "200"),
+        OPERATION_LATENCY.count("verify_password"),
+        OPERATION_LATENCY.count("create_jwt_token"),
+        QUERY_LATENCY.count("find_user_by_email_async"),
+    )
+    assert all(a == b + 1 for a, b in zip(after, before))
+
+
+def test_route_label_uses_path_template(client: TestClient, db_session: Session):
+    """Path parameters do not create a series per ID."""
+    client.get("/api/attachments/00000000-0000-0000-0000-000000000000")
+
+    assert REQUEST_LATENCY.count("GET", "/api/attachments/{attachment_id}", "401") >= 1
+
+
+def test_metrics_endpoint_exposes_histograms_and_gauges(client: TestClient):
+    """The scrape output includes histograms and runtime gauges in text format."""
+    client.get("/api/healthz")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE pqc_http_request_duration_seconds histogram" in body
+    assert 'route="/api/healthz"' in body
+    assert "pqc_hashing_queue_depth " in body
+    assert 'pqc_password_verifies_total{kind="dummy"}' in body
+    assert 'pqc_cache_hits_total{cache="private_key"}' in body
+    assert "# TYPE pqc_db_pool_connections gauge" in body
+
+
+def test_metrics_export_reservoir_counters(client: TestClient):
+    """Reservoir hits and inline-keygen misses are visible after a registration."""
+    response = client.post(
+        "/api/auth/register",
+        json={"email": "reservoir@example.com", "password": "Secret123!", "display_name": "R"},
+    )
+    assert response.status_code == 201
+
+    body = client.get("/metrics").text
+
+    for name in (
+        "pqc_kem_reservoir_hits_total",
+        "pqc_kem_reservoir_misses_total",
+        "pqc_kem_reservoir_generated_total",
+        "pqc_kem_reservoir_refill_rate",
+    ):
+        assert f"{name}{{algorithm=" in body
+
+
+def test_metrics_export_kem_pool_counters(client: TestClient):
+    """KEM context allocations and checkouts are exported per algorithm."""
+    keypair, algorithm = generate_kem_keypair()
+    encapsulate(keypair.public_key, algorithm)
+
+    body = client.get("/metrics").text
+
+    assert f'pqc_kem_contexts_created_total{{algorithm="{algorithm}"}}' in body
+    assert f'pqc_kem_checkouts_total{{algorithm="{algorithm}"}}' in body
@@ -0,0 +1,61 @@
+"""Tests for Alembic migrations and Postgres type mapping."""
+
+import uuid
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import Base, run_migrations
+from db_models import GUID, User, UserKey
+
+
+def test_migrations_create_schema(tmp_path):
+    """Test upgrading an empty database creates every mapped table."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+
+    run_migrations(bind=engine)
+
+    inspector = inspect(engine)
+    assert set(Base.metadata.tables) <= set(inspector.get_table_names())
+    assert {index["name"] for index in inspector.get_indexes("user_keys")} >= {
+        "ix_user_keys_user_id_created_at"
+    }
+    with engine.connect() as connection:
+        version = connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    assert version is not None
+    engine.dispose()
+
+
+def test_migrations_adopt_existing_schema(tmp_path):
+    """Test a database built by create_all is stamped without being rebuilt."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # The tables that existed before the schema was managed by migrations
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, UserKey.__table__])
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO users (id, email, password_hash, created_at) "
+                "VALUES (:id, 'kept@example.com', 'hash', CURRENT_TIMESTAMP)"
+            ),
+            {"id": str(uuid.uuid4())},
+        )
+
+    run_migrations(bind=engine)
+    run_migrations(bind=engine)
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT COUNT(*) FROM users")).scalar() == 1
+    engine.dispose()
+
+
+def test_guid_uses_native_uuid_on_postgres():
+    """Test GUID maps to UUID on Postgres and strings elsewhere."""
+    guid = GUID()
+    value = uuid.uuid4()
+    pg, lite = postgresql.dialect(), sqlite.dialect()
+
+    assert isinstance(guid.load_dialect_impl(pg), postgresql.UUID)
+    assert guid.process_bind_param(value, pg) == value
+    assert guid.process_bind_param(value, lite) == str(value)
+    assert guid.process_result_value(value, pg) == value
+    assert guid.process_result_value(str(value), lite) == value
@@ -0,0 +1,74 @@
+"""Tests for Argon2id hashing and the bounded hashing executor."""
+
+import asyncio
+import threading
+
+import pytest
+from argon2 import PasswordHasher
+
+from crypto import password
+from crypto.calibrate import Argon2Params, CalibrationResult, measure, recommend
+from crypto.password import (
+    HashingOverloadedError,
+    hash_password,
+    password_needs_rehash,
+    verify_password_async,
+)
+
+
+@pytest.fixture
+def small_executor(monkeypatch):
+    """Run the hashing executor with one worker and no queue."""
+    password.shutdown_hashing_executor()
+    monkeypatch.setattr(password.settings, "password_hash_workers", 1)
+    monkeypatch.setattr(password.settings, "password_hash_max_queue", 0)
+    yield
+    password.shutdown_hashing_executor()
+
+
+def test_verify_password_async():
+    """Test async verification matches the stored hash."""
+    password_hash = hash_password("TestPassword123!")
+
+    assert asyncio.run(verify_password_async("TestPassword123!", password_hash))
+    assert not asyncio.run(verify_password_async("WrongPassword", password_hash))
+
+
+def test_verify_password_async_rejects_when_queue_full(small_executor):
+    """Test that jobs beyond the concurrency limit are rejected, not queued."""
+    release = threading.Event()
+
+    async def scenario():
+        blocker = password._submit(release.wait)
+        assert password.hashing_in_flight() == 1
+
+        with pytest.raises(HashingOverloadedError):
+            await verify_password_async("TestPassword123!", "unused")
+
+        release.set()
+        await blocker
+
+    asyncio.run(scenario())
+    assert password.hashing_in_flight() == 0
+
+
+def test_password_needs_rehash():
+    """Hashes made with other parameters are flagged for upgrade."""
+    weak = PasswordHasher(time_cost=1, memory_cost=8192, parallelism=1)
+
+    assert password_needs_rehash(weak.hash("TestPassword123!"))
+    assert not password_needs_rehash(hash_password("TestPassword123!"))
+
+
+def test_calibrate_recommends_strongest_within_target():
+    """Calibration picks the strongest measured set under the latency target."""
+    fast = measure(Argon2Params(1, 8192, 1), concurrency=2, rounds=2)
+    assert fast.p95_ms >= fast.p50_ms > 0
+
+    results = [
+        CalibrationResult(Argon2Params(2, 65536, 4), 90.0, 120.0, 30.0),
+        CalibrationResult(Argon2Params(3, 65536, 4), 140.0, 180.0, 20.0),
+        CalibrationResult(Argon2Params(4, 65536, 4), 190.0, 260.0, 15.0),
+    ]
+    assert recommend(results, target_ms=200).params.time_cost == 3
+    assert recommend(results, target_ms=100) is None
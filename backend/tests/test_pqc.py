@@ -2,7 +2,7 @@
 
 import pytest
 
-from app.crypto.pqc import (
+from crypto.pqc import (
     decapsulate,
     encapsulate,
     generate_kem_keypair,
@@ -45,7 +45,7 @@ def test_encapsulate_decapsulate_roundtrip():
 
 def test_key_encoding():
     """Test base64 encoding/decoding of keys."""
-    from app.crypto.pqc import decode_key_base64, encode_key_base64
+    from crypto.pqc import decode_key_base64, encode_key_base64
     
     keypair, _ = generate_kem_keypair()
     
@@ -62,3 +62,104 @@ def test_key_encoding():
     assert decoded_private == keypair.private_key
 
 
+
+def test_kem_contexts_are_reused():
+    """Test that repeated KEM operations reuse pooled contexts."""
+    from crypto.pqc import clear_kem_pool, kem_pool_stats
+
+    clear_kem_pool()
+    keypair, algorithm = generate_kem_keypair()
+    created_before = _pool_stats(kem_pool_stats(), algorithm).created
+
+    for _ in range(5):
+        enc_result = encapsulate(keypair.public_key, algorithm)
+        assert decapsulate(keypair.private_key, enc_result.ciphertext, algorithm) == (
+            enc_result.shared_secret
+        )
+
+    stats = _pool_stats(kem_pool_stats(), algorithm)
+    assert stats.created == created_before
+    assert stats.in_use == 0
+    assert stats.idle >= 1
+
+
+def test_pooled_context_secret_key_is_wiped():
+    """Test that a context returned to the pool no longer holds a secret key."""
+    from crypto.pqc import _kem_pool
+
+    keypair, algorithm = generate_kem_keypair()
+    enc_result = encapsulate(keypair.public_key, algorithm)
+    decapsulate(keypair.private_key, enc_result.ciphertext, algorithm)
+
+    with _kem_pool.checkout(algorithm) as kem:
+        secret_key = getattr(kem, "secret_key", None)
+        assert not secret_key or not any(bytes(secret_key))
+
+
+def _pool_stats(stats, algorithm):
+    return next(entry for entry in stats if entry.algorithm == algorithm)
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_batch_encapsulate_decapsulate(parallel):
+    """Test batch operations return per-item results in input order."""
+    from crypto.pqc import decapsulate_many, encapsulate_many
+
+    keypair, algorithm = generate_kem_keypair()
+    public_keys = [keypair.public_key] * 9
+    public_keys[4] = b"truncated"
+
+    enc_results = encapsulate_many(public_keys, algorithm, parallel=parallel)
+
+    assert len(enc_results) == 9
+    assert enc_results[4].value is None
+    assert enc_results[4].error is not None
+    assert all(result.error is None for i, result in enumerate(enc_results) if i != 4)
+
+    ciphertexts = [result.value.ciphertext for result in enc_results if result.value]
+    dec_results = decapsulate_many(keypair.private_key, ciphertexts, algorithm, parallel=parallel)
+
+    expected = [result.value.shared_secret for result in enc_results if result.value]
+    assert [result.value for result in dec_results] == expected
+
+
+def test_kem_registry_preloads_enabled_mechanisms():
+    """Every enabled candidate is registered with its sizes."""
+    from crypto.pqc import get_kem_registry
+
+    registry = get_kem_registry()
+    mechanism = registry.get()
+    keypair, algorithm = generate_kem_keypair()
+
+    assert algorithm == registry.default == mechanism.name
+    assert len(keypair.public_key) == mechanism.public_key_size
+    assert len(keypair.private_key) == mechanism.secret_key_size
+    with pytest.raises(ValueError):
+        registry.get("Classic-McEliece-348864")
+
+
+def test_operations_dispatch_on_key_algorithm():
+    """Keys of different ML-KEM variants work side by side."""
+    from crypto.pqc import get_kem_registry
+
+    for algorithm in get_kem_registry().names():
+        keypair, _ = generate_kem_keypair(algorithm)
+        result = encapsulate(keypair.public_key, algorithm)
+        assert decapsulate(keypair.private_key, result.ciphertext, algorithm) == result.shared_secret
+
+
+def test_malformed_sizes_rejected_before_liboqs():
+    """Wrong-sized keys and ciphertexts raise ValueError without a KEM call."""
+    from crypto.pqc import kem_pool_stats
+
+    keypair, algorithm = generate_kem_keypair()
+    result = encapsulate(keypair.public_key, algorithm)
+    before = {entry.algorithm: entry.checkouts for entry in kem_pool_stats()}
+
+    with pytest.raises(ValueError):
+        encapsulate(keypair.public_key[:-1], algorithm)
+    with pytest.raises(ValueError):
+        decapsulate(keypair.private_key, result.ciphertext + b"\x00", algorithm)
+
+    after = {entry.algorithm: entry.checkouts for entry in kem_pool_stats()}
+    assert after == before
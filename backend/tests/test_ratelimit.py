@@ -0,0 +1,107 @@
+"""Tests for token-bucket rate limiting and the login limiter."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+import ratelimit
+from crypto.password import hash_password
+from database import AsyncSessionLocal
+from ratelimit import (
+    DatabaseRateLimitStore,
+    MemoryRateLimitStore,
+    RateLimit,
+    take_token,
+)
+from repositories import create_user
+
+
+def test_take_token_refills_over_time():
+    """An empty bucket waits for refill, then allows one more attempt."""
+    limit = RateLimit(burst=2, per_minute=60)
+
+    tokens, wait = take_token(0.0, 0.0, 0.0, limit)
+    assert wait == pytest.approx(1.0)
+
+    tokens, wait = take_token(tokens, 0.0, 1.0, limit)
+    assert wait == 0
+    assert tokens == pytest.approx(0.0)
+
+    tokens, _ = take_token(0.0, 0.0, 100.0, limit)
+    assert tokens == pytest.approx(1.0)  # Capped at burst before the take
+
+
+@pytest.mark.parametrize("store_type", ["memory", "database"])
+def test_store_rejects_after_burst(store_type, db_session: Session):
+    """Both stores allow ``burst`` attempts, then report a wait."""
+    limit = RateLimit(burst=3, per_minute=1)
+    if store_type == "memory":
+        store = MemoryRateLimitStore(maxsize=100)
+    else:
+        store = DatabaseRateLimitStore(AsyncSessionLocal)
+
+    async def scenario():
+        waits = [await store.take("login-ip:test", limit) for _ in range(4)]
+        other = await store.take("login-ip:other", limit)
+        return waits, other
+
+    waits, other = asyncio.run(scenario())
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] > 0
+    assert other == 0
+
+
+@pytest.fixture
+def limited_login(monkeypatch, db_session: Session):
+    """Enable a tight login limit on a fresh in-memory store."""
+    monkeypatch.setattr(ratelimit.settings, "login_rate_limit_enabled", True)
+    monkeypatch.setattr(ratelimit.settings, "login_ip_burst", 10)
+    monkeypatch.setattr(ratelimit.settings, "login_email_burst", 2)
+    monkeypatch.setattr(ratelimit.settings, "login_email_per_minute", 1.0)
+    monkeypatch.setattr(ratelimit, "rate_limit_store", MemoryRateLimitStore(maxsize=100))
+    create_user(
+        db_session,
+        email="limited@example.com",
+        password_hash=hash_password("TestPassword123!"),
+    )
+
+
+def test_login_rate_limited_per_email(client: TestClient, limited_login):
+    """Attempts beyond the email burst get 429 even with the right password."""
+    wrong = {"email": "limited@example.com", "password": "WrongPassword"}
+    assert client.post("/api/auth/login", json=wrong).status_code == 401
+    assert client.post("/api/auth/login", json=wrong).status_code == 401
+
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "limited@example.com", "password": "TestPassword123!"},
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    other = client.post(
+        "/api/auth/login", json={"email": "other@example.com", "password": "x"}
+    )
+    assert other.status_code == 401
+
+
+def test_spoofed_forwarded_for_counts_against_real_client(
+    client: TestClient, limited_login, monkeypatch
+):
+    """A fake leftmost X-Forwarded-For entry does not give the client a fresh bucket."""
+    monkeypatch.setattr(ratelimit.settings, "rate_limit_trust_forwarded_for", True)
+    monkeypatch.setattr(ratelimit.settings, "rate_limit_trusted_proxy_hops", 1)
+    monkeypatch.setattr(ratelimit.settings, "login_ip_burst", 3)
+
+    statuses = [
+        client.post(
+            "/api/auth/login",
+            json={"email": f"user{i}@example.com", "password": "x"},
+            headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.7"},
+        ).status_code
+        for i in range(4)
+    ]
+
+    assert statuses == [401, 401, 401, 429]
@@ -0,0 +1,153 @@
+"""Tests for repository helpers and the public key directory."""
+
+import asyncio
+import base64
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+import repositories
+from crypto.pqc import KemRegistry
+from database import Base, _upgrade_legacy_users_table
+from repositories import (
+    create_user,
+    get_public_key,
+    get_user_key_material,
+    public_key_cache,
+    rotate_user_key,
+)
+
+
+def test_get_user_key_material_returns_bytes(db_session: Session):
+    """Test key material comes back as raw bytes."""
+    user = create_user(
+        db_session,
+        email="keys@example.com",
+        password_hash="unused",
+        pqc_public_key=b"\x01public",
+        pqc_private_blob=b"\x02private",
+    )
+
+    keys = get_user_key_material(db_session, str(user.id))
+
+    assert keys.key_id == user.pqc_key_id
+    assert keys.public_key == b"\x01public"
+    assert keys.private_key == b"\x02private"
+    assert get_user_key_material(db_session, "not-a-uuid") is None
+
+
+def test_get_public_key_by_user_and_key_id(db_session: Session):
+    """Test both lookup forms resolve the same directory entry from cache."""
+    public_key_cache().clear()
+    user = create_user(
+        db_session,
+        email="directory@example.com",
+        password_hash="unused",
+        pqc_public_key=b"directory-key",
+        pqc_algorithm="ML-KEM-1024",
+    )
+
+    by_user = get_public_key(db_session, user_id=user.id)
+    by_key = get_public_key(db_session, key_id=str(user.pqc_key_id))
+    hits_before = public_key_cache().stats().hits
+    get_public_key(db_session, key_id=user.pqc_key_id)
+
+    assert by_user == by_key
+    assert by_key.algorithm == "ML-KEM-1024"
+    assert by_key.public_key == b"directory-key"
+    assert public_key_cache().stats().hits == hits_before + 1
+
+
+def test_rotate_user_key_invalidates_cache(db_session: Session):
+    """Test rotation publishes a new key and expires the cached old one."""
+    user = create_user(
+        db_session,
+        email="rotate@example.com",
+        password_hash="unused",
+        pqc_public_key=b"old-key",
+        pqc_private_blob=b"old-private",
+    )
+    old = get_public_key(db_session, user_id=user.id)
+
+    new = rotate_user_key(db_session, user.id, b"new-key", b"new-private", "ML-KEM-768")
+
+    assert get_public_key(db_session, user_id=user.id) == new
+    assert get_public_key(db_session, key_id=old.key_id).expires_at is not None
+    assert get_user_key_material(db_session, user.id).private_key == b"new-private"
+
+
+def test_legacy_users_table_is_upgraded(tmp_path):
+    """Test base64 TEXT keys from older schemas move into the key directory."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE users (id VARCHAR(36) PRIMARY KEY, email VARCHAR(255), "
+                "password_hash VARCHAR(255), pqc_public_key TEXT, pqc_private_blob TEXT, "
+                "created_at DATETIME)"
+            )
+        )
+        connection.execute(
+            text("INSERT INTO users VALUES (:id, 'old@example.com', 'x', :pk, :sk, :ts)"),
+            {
+                "id": "8d5e9a3c-7f4b-4a61-9d0e-2b1c3a4f5e6d",
+                "pk": base64.b64encode(b"legacy-public").decode("ascii"),
+                "sk": base64.b64encode(b"legacy-private").decode("ascii"),
+                "ts": "2025-01-01 00:00:00",
+            },
+        )
+    Base.metadata.create_all(bind=engine)
+
+    _upgrade_legacy_users_table(engine)
+
+    with Session(engine) as session:
+        keys = get_user_key_material(session, "8d5e9a3c-7f4b-4a61-9d0e-2b1c3a4f5e6d")
+        assert keys.public_key == b"legacy-public"
+        assert keys.private_key == b"legacy-private"
+    engine.dispose()
+
+
+def test_async_repositories_round_trip(db_session: Session):
+    """Test async repository helpers see the same data as the sync session."""
+    from database import AsyncSessionLocal, close_async_db
+    from repositories import (
+        create_user_async,
+        find_user_by_email_async,
+        find_user_by_id_async,
+        get_public_key_async,
+    )
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user = await create_user_async(
+                db,
+                email="Async@Example.com",
+                password_hash="unused",
+                pqc_public_key=b"async-key",
+            )
+            by_email = await find_user_by_email_async(db, "async@example.com")
+            by_id = await find_user_by_id_async(db, str(user.id))
+            record = await get_public_key_async(db, user_id=user.id)
+        await close_async_db()
+        return user, by_email, by_id, record
+
+    user, by_email, by_id, record = asyncio.run(scenario())
+
+    assert by_email.id == by_id.id == user.id
+    assert record.public_key == b"async-key"
+    assert get_public_key(db_session, key_id=record.key_id) == record
+
+
+def test_untagged_key_records_registry_default(db_session: Session, monkeypatch):
+    """Keys created without an algorithm take the configured KEM default, not a constant."""
+    monkeypatch.setattr(
+        repositories, "get_kem_registry", lambda: KemRegistry({}, default="ML-KEM-1024")
+    )
+    user = create_user(
+        db_session,
+        email="default-alg@example.com",
+        password_hash="hash",
+        pqc_public_key=b"p" * 32,
+    )
+
+    assert get_public_key(db_session, user_id=user.id).algorithm == "ML-KEM-1024"
@@ -0,0 +1,77 @@
+"""Tests for the pre-generated ML-KEM keypair reservoir."""
+
+import asyncio
+import threading
+import time
+
+import crypto.reservoir as reservoir_module
+from crypto.reservoir import KeypairReservoir
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for reservoir"
+        time.sleep(0.01)
+
+
+def test_reservoir_refills_to_high_watermark():
+    """Test the worker thread fills the reservoir in the background."""
+    reservoir = KeypairReservoir(low_watermark=2, high_watermark=4)
+    reservoir.start()
+    try:
+        _wait_for(lambda: reservoir.stats()[0].available == 4)
+        stats = reservoir.stats()[0]
+        assert stats.generated == 4
+        assert stats.refill_rate > 0
+    finally:
+        reservoir.stop()
+
+
+def test_reservoir_hands_out_each_keypair_once():
+    """Test that taken keypairs are unique and counted as hits."""
+    reservoir = KeypairReservoir(low_watermark=2, high_watermark=4)
+    reservoir.start()
+    try:
+        _wait_for(lambda: reservoir.stats()[0].available == 4)
+        taken = [reservoir.take() for _ in range(4)]
+        public_keys = {keypair.public_key for keypair, _ in taken}
+
+        assert len(public_keys) == 4
+        assert reservoir.stats()[0].hits == 4
+    finally:
+        reservoir.stop()
+
+    assert reservoir.stats()[0].available == 0
+
+
+def test_reservoir_miss_generates_inline():
+    """Test that an empty reservoir still returns a keypair and records a miss."""
+    reservoir = KeypairReservoir(low_watermark=2, high_watermark=4)
+
+    keypair, algorithm = reservoir.take()
+
+    assert len(keypair.public_key) > 0
+    stats = next(entry for entry in reservoir.stats() if entry.algorithm == algorithm)
+    assert stats.misses == 1
+    assert stats.hits == 0
+
+
+def test_async_miss_generates_off_the_event_loop(monkeypatch):
+    """Test that an async take on an empty reservoir runs keygen on a worker thread."""
+    reservoir = KeypairReservoir(low_watermark=2, high_watermark=4)
+    threads = []
+
+    def generate(algorithm):
+        threads.append(threading.current_thread())
+        return original(algorithm)
+
+    original = reservoir_module.generate_kem_keypair
+    monkeypatch.setattr(reservoir_module, "generate_kem_keypair", generate)
+
+    keypair, algorithm = asyncio.run(reservoir.take_async())
+
+    assert len(keypair.public_key) > 0
+    assert threads and threads[0] is not threading.main_thread()
+    stats = next(entry for entry in reservoir.stats() if entry.algorithm == algorithm)
+    assert stats.misses == 1
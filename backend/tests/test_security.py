@@ -0,0 +1,65 @@
+"""Tests for the verified-JWT cache and the current_user dependency."""
+
+import datetime
+import uuid
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from config import get_settings
+from crypto.jwt import (
+    create_jwt_token,
+    forget_jwt_token,
+    jwt_claims_cache,
+    verify_jwt_token_cached,
+)
+from security import authenticate_token, require_token
+
+
+def test_verified_claims_are_cached():
+    """Test a token is verified once and then served from the cache."""
+    token = create_jwt_token(uuid.uuid4())
+    before = jwt_claims_cache().stats()
+
+    first = verify_jwt_token_cached(token)
+    second = verify_jwt_token_cached(token)
+
+    after = jwt_claims_cache().stats()
+    assert first is second
+    assert after.misses == before.misses + 1
+    assert after.hits == before.hits + 1
+
+    forget_jwt_token(token)
+    assert verify_jwt_token_cached(token) is not second
+
+
+def test_invalid_and_expired_tokens_are_not_cached():
+    """Test rejected tokens never enter the cache."""
+    settings = get_settings()
+    expired = jwt.encode(
+        {
+            "sub": str(uuid.uuid4()),
+            "exp": datetime.datetime.utcnow() - datetime.timedelta(seconds=1),
+        },
+        settings.jwt_secret_key,
+        algorithm=settings.jwt_algorithm,
+    )
+    size = len(jwt_claims_cache())
+
+    assert verify_jwt_token_cached("not-a-token") is None
+    assert verify_jwt_token_cached(expired) is None
+    assert len(jwt_claims_cache()) == size
+
+
+def test_require_token_resolves_user():
+    """Test tokens resolve to the user ID and bad tokens raise 401."""
+    user_id = uuid.uuid4()
+
+    user = authenticate_token(create_jwt_token(user_id))
+
+    assert user.id == user_id
+    assert authenticate_token(None) is None
+    with pytest.raises(HTTPException) as exc_info:
+        require_token("garbage")
+    assert exc_info.value.status_code == 401
@@ -0,0 +1,91 @@
+"""Tests for hybrid X25519 + ML-KEM session keys and AEAD sealing."""
+
+import uuid
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from crypto import session
+from crypto.session import (
+    SessionCipher,
+    generate_hybrid_keypair,
+    hybrid_decapsulate,
+    hybrid_encapsulate,
+    open_from_sender,
+    seal_for_recipient,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_session_cache():
+    session.clear_session_keys()
+    yield
+    session.clear_session_keys()
+
+
+def test_hybrid_encapsulation_roundtrip():
+    """Both sides derive the same session key."""
+    keypair = generate_hybrid_keypair()
+    result = hybrid_encapsulate(keypair.public_key)
+
+    derived = hybrid_decapsulate(
+        keypair.private_key, result.ephemeral_public_key, result.kem_ciphertext
+    )
+
+    assert derived == result.session_key
+    assert len(derived) == 32
+
+
+@pytest.mark.parametrize("aead", ["ChaCha20-Poly1305", "AES-256-GCM"])
+def test_session_cipher_accepts_memoryview(aead):
+    """Sealing works on memoryviews and detects tampering."""
+    cipher = SessionCipher(b"k" * 32, aead)
+    payload = bytearray(b"attack at dawn" * 100)
+
+    sealed = cipher.seal(memoryview(payload), b"header")
+    assert cipher.open(memoryview(sealed), b"header") == bytes(payload)
+
+    sealed[-1] ^= 1
+    with pytest.raises(InvalidTag):
+        cipher.open(sealed, b"header")
+
+
+def test_follow_up_messages_reuse_cached_key():
+    """Only the first message per (sender, recipient, key) runs the KEM."""
+    keypair = generate_hybrid_keypair()
+    sender, recipient, key_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+    first = seal_for_recipient(sender, recipient, key_id, keypair.public_key, b"one")
+    second = seal_for_recipient(sender, recipient, key_id, keypair.public_key, b"two")
+
+    assert second.kem_ciphertext == first.kem_ciphertext
+    assert second.sealed[:12] != first.sealed[:12]
+    assert open_from_sender(sender, recipient, key_id, keypair.private_key, first) == b"one"
+    assert open_from_sender(sender, recipient, key_id, keypair.private_key, second) == b"two"
+
+    sender_stats, recipient_stats = session.session_cache_stats()
+    assert sender_stats.hits == 1
+    assert recipient_stats.hits == 1
+
+
+def test_message_bound_to_ids():
+    """A message replayed under another sender fails authentication."""
+    keypair = generate_hybrid_keypair()
+    sender, recipient, key_id = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    message = seal_for_recipient(sender, recipient, key_id, keypair.public_key, b"hi")
+
+    with pytest.raises(InvalidTag):
+        open_from_sender(uuid.uuid4(), recipient, key_id, keypair.private_key, message)
+
+
+def test_session_key_retired_after_max_messages(monkeypatch):
+    """A fresh key exchange runs once a key has sealed its quota."""
+    monkeypatch.setattr(session.settings, "session_key_max_messages", 2)
+    keypair = generate_hybrid_keypair()
+    ids = (uuid.uuid4(), uuid.uuid4(), uuid.uuid4())
+
+    headers = {
+        seal_for_recipient(*ids, keypair.public_key, b"x").kem_ciphertext for _ in range(3)
+    }
+
+    assert len(headers) == 2
@@ -32,12 +32,15 @@ class ApiClient {
     required String password,
     required String displayName,
     required bool generateOnDevice,
+    String? publicKey,
   }) async {
     final payload = {
       'email': email,
       'password': password,
       'display_name': displayName,
       'generate_on_device': generateOnDevice,
+      // Base64 ML-KEM public key; the server requires it with generateOnDevice
+      if (publicKey != null) 'public_key': publicKey,
     };
     final json = await _postJson('/api/auth/register', payload);
     return RegisterResult.fromJson(json);